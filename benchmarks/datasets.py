@@ -0,0 +1,67 @@
+import os
+import random
+
+from qgis.core import (QgsVectorLayer, QgsFeature, QgsGeometry, QgsPointXY,
+                       QgsVectorFileWriter, QgsCoordinateTransformContext)
+
+
+# Extent of the generated points, in EPSG:3857 metres
+EXTENT = (0.0, 0.0, 100000.0, 100000.0)
+
+
+def memory_layer(size, cardinality, seed=42, batch_size=50000):
+    """Create a point memory layer with categorical and numeric fields
+
+    cat_low always has 8 values, cat_high has the requested cardinality and
+    name is a free-text field with one value per 10 features.
+    """
+    layer = QgsVectorLayer(
+        "Point?crs=EPSG:3857"
+        "&field=cat_low:string(20)&field=cat_high:string(20)"
+        "&field=code:integer&field=value:double&field=name:string(40)",
+        f"bench_{size}_{cardinality}",
+        "memory"
+    )
+    provider = layer.dataProvider()
+    fields = layer.fields()
+
+    rng = random.Random(seed)
+    xmin, ymin, xmax, ymax = EXTENT
+    batch = []
+    for i in range(size):
+        feature = QgsFeature(fields)
+        feature.setGeometry(QgsGeometry.fromPointXY(
+            QgsPointXY(rng.uniform(xmin, xmax), rng.uniform(ymin, ymax))))
+        feature.setAttributes([
+            f"class_{rng.randrange(8)}",
+            f"value_{rng.randrange(cardinality)}",
+            rng.randrange(cardinality),
+            rng.uniform(0, 1000),
+            f"name_{i // 10}",
+        ])
+        batch.append(feature)
+        if len(batch) == batch_size:
+            provider.addFeatures(batch)
+            batch = []
+    if batch:
+        provider.addFeatures(batch)
+
+    layer.updateExtents()
+    return layer
+
+
+def geopackage_layer(memory, directory):
+    """Write a memory layer to a GeoPackage and open it"""
+    path = os.path.join(directory, f"{memory.name()}.gpkg")
+    options = QgsVectorFileWriter.SaveVectorOptions()
+    options.driverName = "GPKG"
+    options.layerName = memory.name()
+    error = QgsVectorFileWriter.writeAsVectorFormatV3(
+        memory, path, QgsCoordinateTransformContext(), options)
+    if error[0] != QgsVectorFileWriter.NoError:
+        raise RuntimeError(f"Could not write {path}: {error[1]}")
+
+    layer = QgsVectorLayer(f"{path}|layername={memory.name()}", memory.name(), "ogr")
+    if not layer.isValid():
+        raise RuntimeError(f"Could not open {path}")
+    return layer
@@ -0,0 +1,203 @@
+"""Headless benchmarks of the QuickStyle hot paths
+
+Run with the Python interpreter of a QGIS installation, no display needed:
+
+    python benchmarks/run_benchmarks.py --sizes 10000 100000 --output results.json
+"""
+import os
+import sys
+import json
+import time
+import types
+import argparse
+import platform
+import tempfile
+import importlib
+import statistics
+
+# Render without a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from qgis.PyQt.QtCore import QSize
+from qgis.core import (Qgis, QgsApplication, QgsMapSettings, QgsMapRendererSequentialJob,
+                       QgsCategorizedSymbolRenderer, QgsFeatureRequest)
+
+import datasets
+
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_plugin_module(name):
+    """Import a module of the plugin as part of its package"""
+    parent = os.path.dirname(PLUGIN_DIR)
+    if parent not in sys.path:
+        sys.path.insert(0, parent)
+    return importlib.import_module(f"{os.path.basename(PLUGIN_DIR)}.{name}")
+
+
+def timed(func, repeat):
+    """Run a function several times and summarize its durations"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000.0)
+    return {
+        'min_ms': round(min(durations), 3),
+        'median_ms': round(statistics.median(durations), 3),
+        'max_ms': round(max(durations), 3),
+    }
+
+
+def render(layer, image_size):
+    """Render a layer to an image the way the canvas would"""
+    settings = QgsMapSettings()
+    settings.setLayers([layer])
+    settings.setDestinationCrs(layer.crs())
+    settings.setExtent(layer.extent())
+    settings.setOutputSize(QSize(image_size, image_size))
+
+    job = QgsMapRendererSequentialJob(settings)
+    job.start()
+    job.waitForFinished()
+    return job.renderedImage()
+
+
+def first_paint(dialog):
+    """Show a dialog until it has been painted once, then hide it"""
+    dialog.show()
+    QgsApplication.processEvents()
+    dialog.hide()
+
+
+def run_cases(layer, repeat, image_size):
+    """Time every hot path on one layer"""
+    counting = import_plugin_module("counting")
+    styling = import_plugin_module("styling")
+    quickstyle = import_plugin_module("quickstyle")
+
+    cases = {}
+    cases['field_profile'] = timed(lambda: counting.field_unique_counts(layer), repeat)
+
+    def profile_approximate():
+        counting.invalidate_cardinalities(layer.id())
+        return counting.field_cardinalities(layer)
+
+    cases['field_profile_approximate'] = timed(profile_approximate, repeat)
+    cases['count_combinations'] = timed(
+        lambda: counting.count_combinations(layer, ['cat_low', 'cat_high']), repeat)
+    # A tiny memory budget times the spill-to-disk path
+    cases['count_combinations_spilled'] = timed(
+        lambda: counting.count_combinations(layer, ['cat_low', 'cat_high'], QgsFeatureRequest(), max_bytes=16384),
+        repeat)
+
+    # File-based layers also time the single-process and sharded column readers
+    source = counting.columnar_source(layer, ['cat_low', 'cat_high'])
+    if source is not None:
+        columnar = import_plugin_module("columnar")
+        sharded = import_plugin_module("sharded_counting")
+        cases['count_combinations_columnar'] = timed(
+            lambda: columnar.count_combinations_columnar(source), repeat)
+        cases['count_combinations_sharded'] = timed(
+            lambda: sharded.count_combinations_sharded(source, counting.count_workers()), repeat)
+
+    values = sorted(layer.uniqueValues(layer.fields().lookupField('cat_high')))
+
+    def build_renderer():
+        categories = styling.build_categories(layer.geometryType(), values, styling.PALETTE)
+        return QgsCategorizedSymbolRenderer('cat_high', categories)
+
+    cases['renderer_build'] = timed(build_renderer, repeat)
+
+    cases['render_single'] = timed(lambda: render(layer, image_size), repeat)
+    layer.setRenderer(build_renderer())
+    cases['render_categorized'] = timed(lambda: render(layer, image_size), repeat)
+
+    # Rule-based categorize output: concat() expression against filter rules
+    fields = ['cat_low', 'cat_high']
+    combinations = sorted(counting.count_combinations(layer, fields))
+    labels = [counting.combination_label(values) for values in combinations]
+    categories = styling.build_categories(layer.geometryType(), labels, styling.PALETTE)
+    layer.setRenderer(QgsCategorizedSymbolRenderer(styling.combination_expression(fields), categories))
+    cases['render_combination_expression'] = timed(lambda: render(layer, image_size), repeat)
+    layer.setRenderer(styling.build_rule_based_renderer(
+        layer.geometryType(), fields, combinations, styling.PALETTE))
+    cases['render_combination_rules'] = timed(lambda: render(layer, image_size), repeat)
+    layer.setRenderer(styling.build_rule_based_renderer(
+        layer.geometryType(), fields, combinations, styling.PALETTE, group=True))
+    cases['render_combination_rules_grouped'] = timed(lambda: render(layer, image_size), repeat)
+
+    # Labels are set up through the plugin dialog as the tool does
+    plugin = types.SimpleNamespace(colors=list(styling.PALETTE))
+    dialog = quickstyle.LabelingDialog(layer, plugin)
+    dialog.selected_fields = ['cat_low']
+    cases['label_setup'] = timed(dialog.apply_simple_labeling, repeat)
+    cases['render_labels'] = timed(lambda: render(layer, image_size), repeat)
+    layer.setLabelsEnabled(False)
+
+    # Time to first paint of the tool dialogs, built from scratch or reused
+    def reuse(dialog):
+        dialog.bind(layer)
+        return dialog
+
+    symbology = quickstyle.SymbologyDialog(layer)
+    cases['symbology_dialog_build'] = timed(lambda: first_paint(quickstyle.SymbologyDialog(layer)), repeat)
+    cases['symbology_dialog_reuse'] = timed(lambda: first_paint(reuse(symbology)), repeat)
+    cases['labeling_dialog_build'] = timed(
+        lambda: first_paint(quickstyle.LabelingDialog(layer, plugin)), repeat)
+    cases['labeling_dialog_reuse'] = timed(lambda: first_paint(reuse(dialog)), repeat)
+
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--cardinalities', type=int, nargs='+', default=[10, 1000])
+    parser.add_argument('--formats', nargs='+', choices=['memory', 'gpkg'], default=['memory', 'gpkg'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--image-size', type=int, default=1024)
+    parser.add_argument('--output', help='JSON file to write, printed to stdout when omitted')
+    args = parser.parse_args()
+
+    app = QgsApplication([], True)
+    app.initQgis()
+
+    report = {
+        'qgis': Qgis.QGIS_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': [],
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            for cardinality in args.cardinalities:
+                memory = datasets.memory_layer(size, cardinality)
+                for data_format in args.formats:
+                    if data_format == 'gpkg':
+                        layer = datasets.geopackage_layer(memory, directory)
+                    else:
+                        layer = memory
+                    print(f"{data_format} {size} features, cardinality {cardinality}", file=sys.stderr)
+                    report['results'].append({
+                        'format': data_format,
+                        'size': size,
+                        'cardinality': cardinality,
+                        'cases': run_cases(layer, args.repeat, args.image_size),
+                    })
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    app.exitQgis()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+import math
+import random
+
+from qgis.core import QgsFeatureRequest, QgsRendererRange, QgsGraduatedSymbolRenderer
+
+from .counting import attribute_value, columnar_source
+from .columnar import read_batches
+from .styling import category_symbol
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+METHODS = ['Quantile', 'Equal Interval', 'Jenks', 'Pretty']
+
+# Jenks is quadratic in the number of values, so it runs on an even subsample
+JENKS_MAX_VALUES = 3000 if np is not None else 1000
+
+
+def numeric_values(layer, field_name, max_values=500000, seed=None):
+    """Read a numeric column once, sampling huge layers
+
+    Up to max_values non-NULL values are kept. Above that a reservoir
+    sample (Algorithm L) is taken so memory stays bounded, with its lowest
+    and highest values replaced by the true minimum and maximum of the
+    column so the classes cover every feature. Returns a sorted NumPy array
+    when NumPy is available, otherwise a sorted list. File-based layers
+    are read column-wise through Arrow when possible.
+    """
+    source = columnar_source(layer, [field_name])
+    if source is not None:
+        try:
+            return numeric_values_columnar(source, max_values, seed)
+        except (RuntimeError, IOError, KeyError, ValueError, TypeError):
+            # Read the features one by one instead
+            pass
+
+    index = layer.fields().lookupField(field_name)
+    request = QgsFeatureRequest()
+    request.setFlags(QgsFeatureRequest.NoGeometry)
+    request.setSubsetOfAttributes([index])
+
+    rng = random.Random(seed)
+    values = []
+    features = (attribute_value(feature.attributes()[index]) for feature in layer.getFeatures(request))
+    extremes = [math.inf, -math.inf]
+
+    def tracked(features):
+        # The sample misses most values, the extremes are kept on the side
+        for value in features:
+            if value is None:
+                continue
+            value = float(value)
+            if value < extremes[0]:
+                extremes[0] = value
+            if value > extremes[1]:
+                extremes[1] = value
+            yield value
+
+    numbers = tracked(features)
+
+    for value in numbers:
+        values.append(value)
+        if len(values) == max_values:
+            break
+    else:
+        return sorted_values(values)
+
+    # Reservoir is full, skip ahead geometrically instead of drawing per value
+    w = math.exp(math.log(rng.random()) / max_values)
+    while True:
+        skip = int(math.log(rng.random()) / math.log(1 - w))
+        value = None
+        for value in numbers:
+            if skip == 0:
+                break
+            skip -= 1
+        else:
+            return sorted_values(values, extremes)
+        values[rng.randrange(max_values)] = value
+        w *= math.exp(math.log(rng.random()) / max_values)
+
+
+def numeric_values_columnar(source, max_values, seed=None):
+    """Read a numeric column in Arrow batches, sampling huge layers
+
+    Every value gets a random key and the max_values lowest keys are kept,
+    batch by batch, which is a uniform sample like the reservoir of
+    numeric_values but drawn with vectorized operations.
+    """
+    rng = np.random.default_rng(seed)
+    values = np.empty(0)
+    keys = np.empty(0)
+    low, high = math.inf, -math.inf
+    for columns in read_batches(source):
+        column, mask = columns[0]
+        batch = column[~mask].astype(float)
+        if not len(batch):
+            continue
+        low = min(low, batch.min())
+        high = max(high, batch.max())
+        values = np.concatenate([values, batch])
+        keys = np.concatenate([keys, rng.random(len(batch))])
+        if len(values) > max_values:
+            kept = np.argpartition(keys, max_values)[:max_values]
+            values, keys = values[kept], keys[kept]
+
+    values.sort()
+    if len(values):
+        # The sample misses most values, the extremes are kept on the side
+        values[0], values[-1] = low, high
+    return values
+
+
+def sorted_values(values, extremes=None):
+    if np is not None:
+        values = np.asarray(values, dtype=float)
+        values.sort()
+    else:
+        values = sorted(values)
+    if extremes is not None:
+        values[0], values[-1] = extremes
+    return values
+
+
+def equal_interval_breaks(values, classes):
+    """Split the value range into classes of equal width"""
+    low, high = values[0], values[-1]
+    step = (high - low) / classes
+    return [low + step * i for i in range(1, classes)] + [high]
+
+
+def quantile_breaks(values, classes):
+    """Put the same number of values in every class"""
+    n = len(values)
+    if np is not None:
+        breaks = np.quantile(values, [i / classes for i in range(1, classes + 1)]).tolist()
+    else:
+        breaks = []
+        for i in range(1, classes + 1):
+            position = (n - 1) * i / classes
+            lower = int(math.floor(position))
+            upper = min(lower + 1, n - 1)
+            breaks.append(values[lower] + (values[upper] - values[lower]) * (position - lower))
+    return unique_breaks(breaks)
+
+
+def pretty_breaks(values, classes):
+    """Breaks on round numbers covering the value range"""
+    low, high = values[0], values[-1]
+    if high == low:
+        return [high]
+
+    raw_step = (high - low) / classes
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    for factor in (1, 2, 2.5, 5, 10):
+        step = factor * magnitude
+        if step >= raw_step:
+            break
+
+    start = math.floor(low / step) * step
+    breaks = []
+    value = start + step
+    while value < high:
+        breaks.append(round(value, 10))
+        value += step
+    breaks.append(round(math.ceil(high / step) * step, 10))
+    return breaks
+
+
+def jenks_breaks(values, classes):
+    """Fisher-Jenks natural breaks minimizing the within-class variance"""
+    n = len(values)
+    if n > JENKS_MAX_VALUES:
+        stride = n / JENKS_MAX_VALUES
+        values = [values[int(i * stride)] for i in range(JENKS_MAX_VALUES)] + [values[-1]]
+        n = len(values)
+    classes = min(classes, n)
+
+    if np is not None:
+        return jenks_breaks_numpy(np.asarray(values, dtype=float), classes)
+
+    # Prefix sums give the squared deviation of any run of values in O(1)
+    s1 = [0.0]
+    s2 = [0.0]
+    for value in values:
+        s1.append(s1[-1] + value)
+        s2.append(s2[-1] + value * value)
+
+    def cost(first, last):
+        count = last - first
+        total = s1[last] - s1[first]
+        return (s2[last] - s2[first]) - total * total / count
+
+    # best[i] is the lowest cost of splitting values[:i] into the current class count
+    best = [cost(0, i) if i else 0.0 for i in range(n + 1)]
+    splits = []
+    for k in range(2, classes + 1):
+        new_best = [math.inf] * (n + 1)
+        split = [0] * (n + 1)
+        for i in range(k, n + 1):
+            for m in range(k - 1, i):
+                candidate = best[m] + cost(m, i)
+                if candidate < new_best[i]:
+                    new_best[i] = candidate
+                    split[i] = m
+        best = new_best
+        splits.append(split)
+
+    return jenks_backtrack(values, splits, n)
+
+
+def jenks_breaks_numpy(values, classes):
+    """Vectorized Fisher-Jenks, one array operation per end position"""
+    n = len(values)
+    s1 = np.concatenate(([0.0], np.cumsum(values)))
+    s2 = np.concatenate(([0.0], np.cumsum(values * values)))
+
+    counts = np.arange(1, n + 1)
+    best = s2[1:] - s1[1:] ** 2 / counts
+    best = np.concatenate(([0.0], best))
+
+    splits = []
+    for k in range(2, classes + 1):
+        new_best = np.full(n + 1, np.inf)
+        split = np.zeros(n + 1, dtype=int)
+        for i in range(k, n + 1):
+            m = np.arange(k - 1, i)
+            count = i - m
+            total = s1[i] - s1[m]
+            candidates = best[m] + (s2[i] - s2[m]) - total * total / count
+            j = int(np.argmin(candidates))
+            new_best[i] = candidates[j]
+            split[i] = m[j]
+        best = new_best
+        splits.append(split)
+
+    return jenks_backtrack(values, splits, n)
+
+
+def jenks_backtrack(values, splits, n):
+    """Turn the recorded split positions into upper class bounds"""
+    breaks = [float(values[n - 1])]
+    end = n
+    for split in reversed(splits):
+        end = int(split[end])
+        breaks.append(float(values[end - 1]))
+    return sorted(breaks)
+
+
+def unique_breaks(breaks):
+    result = []
+    for value in breaks:
+        if not result or value > result[-1]:
+            result.append(float(value))
+    return result
+
+
+def class_breaks(values, method, classes):
+    """Compute the upper bounds of each class with the given method"""
+    if len(values) == 0:
+        return []
+    if method == 'Quantile':
+        return quantile_breaks(values, classes)
+    if method == 'Jenks':
+        return jenks_breaks(values, classes)
+    if method == 'Pretty':
+        return pretty_breaks(values, classes)
+    return equal_interval_breaks(values, classes)
+
+
+def build_graduated_renderer(field_name, geometry_type, values, breaks, colors):
+    """Create a graduated renderer with one palette color per class"""
+    ranges = []
+    lower = float(values[0])
+    for i, upper in enumerate(breaks):
+        symbol = category_symbol(geometry_type, colors[i % len(colors)])
+        ranges.append(QgsRendererRange(lower, upper, symbol, f"{lower:g} - {upper:g}"))
+        lower = upper
+    return QgsGraduatedSymbolRenderer(field_name, ranges)
@@ -0,0 +1,172 @@
+# No QGIS imports here, worker processes import this module on their own
+import sys
+
+try:
+    import numpy as np
+    from osgeo import gdal
+except ImportError:
+    np = None
+    gdal = None
+
+
+BATCH_SIZE = 65536
+
+# Measured cost of one combination counted under a tuple of values, besides
+# the values themselves: tuple, count and dict slot, plus a tuple slot per value
+BYTES_PER_COMBINATION = 100
+BYTES_PER_TUPLE_SLOT = 8
+
+
+class TooManyCombinations(Exception):
+    """Raised when a count holds more combinations than its budget"""
+
+
+def available():
+    """Check that NumPy and GDAL 3.6 or later with Arrow streams are present"""
+    return np is not None and int(gdal.VersionNum()) >= 3060000
+
+
+def open_layer(source):
+    """Open the dataset read-only and select its layer, keeping both alive"""
+    dataset = gdal.OpenEx(source['path'], gdal.OF_VECTOR | gdal.OF_READONLY)
+    if dataset is None:
+        return None, None
+    if source['layer_name']:
+        ogr_layer = dataset.GetLayerByName(source['layer_name'])
+    else:
+        ogr_layer = dataset.GetLayer(source['layer_id'] or 0)
+    return dataset, ogr_layer
+
+
+def read_batches(source, batch_size=BATCH_SIZE):
+    """Yield the requested columns in record batches
+
+    Each batch is a list with one (values, null mask) pair of NumPy arrays
+    per field. Geometries and other fields are never read. The FID column,
+    which QGIS lists as a field of GeoPackage layers, is read as a column
+    when it is requested. Raises KeyError for fields the file does not have.
+    """
+    dataset, ogr_layer = open_layer(source)
+    if ogr_layer is None:
+        raise IOError(f"Could not open {source['path']}")
+
+    wanted = set(source['fields'])
+    definition = ogr_layer.GetLayerDefn()
+    names = [definition.GetFieldDefn(i).GetName() for i in range(definition.GetFieldCount())]
+    fid_column = ogr_layer.GetFIDColumn()
+    include_fid = bool(fid_column) and fid_column in wanted
+    missing = wanted - set(names) - {fid_column}
+    if missing:
+        raise KeyError(sorted(missing)[0])
+    ogr_layer.SetIgnoredFields([name for name in names if name not in wanted] + ['OGR_GEOMETRY', 'OGR_STYLE'])
+    if source['subset']:
+        ogr_layer.SetAttributeFilter(source['subset'])
+
+    stream = ogr_layer.GetArrowStreamAsNumPy(
+        options=[f"INCLUDE_FID={'YES' if include_fid else 'NO'}", f'MAX_FEATURES_IN_BATCH={batch_size}'])
+    for batch in stream:
+        columns = []
+        for name in source['fields']:
+            column = batch[name]
+            mask = np.ma.getmaskarray(column)
+            values = np.ma.getdata(column)
+            if values.dtype == object and mask.any():
+                # Masked entries may hold None, which cannot be sorted with bytes
+                values = values.copy()
+                values[mask] = b''
+            columns.append((values, mask))
+        yield columns
+
+    # The dataset must outlive the stream
+    del stream
+    del dataset
+
+
+def python_values(uniques):
+    """Convert distinct values to the Python values QGIS would return"""
+    # Strings are only decoded once they are distinct
+    return [value.decode('utf-8') if isinstance(value, bytes) else value for value in uniques.tolist()]
+
+
+def encode_column(values, mask):
+    """Get the distinct values of a column as Python values and a code per row
+
+    Code 0 stands for NULL, code i for the distinct value at index i - 1.
+    """
+    present = ~mask
+    if present.all():
+        uniques, inverse = np.unique(values, return_inverse=True)
+        return python_values(uniques), inverse.astype(np.int64).ravel() + 1
+    uniques, inverse = np.unique(values[present], return_inverse=True)
+    codes = np.zeros(len(values), dtype=np.int64)
+    codes[present] = inverse.ravel() + 1
+    return python_values(uniques), codes
+
+
+def combination_bytes(combination):
+    """Estimate the memory a combination held as a dict key takes"""
+    return BYTES_PER_COMBINATION + sum(sys.getsizeof(value) + BYTES_PER_TUPLE_SLOT for value in combination)
+
+
+def count_combinations_columnar(source, max_bytes=None, canceled=None):
+    """Count rows per combination of values with vectorized group-by
+
+    Every column is dictionary-encoded per batch, the codes are packed
+    into one integer per row and counted with np.unique. The result uses
+    the same keys as counting.count_combinations. Raises
+    TooManyCombinations once the combinations held take more than
+    max_bytes. Returns None as soon as canceled(), checked between
+    batches, is true.
+    """
+    combinations = {}
+    held = 0
+    for columns in read_batches(source):
+        if canceled is not None and canceled():
+            return None
+        encoded = [encode_column(values, mask) for values, mask in columns]
+
+        radixes = [len(uniques) + 1 for uniques, codes in encoded]
+        if np.prod(radixes, dtype=float) < 2 ** 62:
+            packed = np.zeros(len(columns[0][0]), dtype=np.int64)
+            radix = 1
+            for (uniques, codes), size in zip(encoded, radixes):
+                packed += codes * radix
+                radix *= size
+            keys, counts = np.unique(packed, return_counts=True)
+            code_rows = []
+            for key in keys.tolist():
+                row = []
+                for size in radixes:
+                    key, code = divmod(key, size)
+                    row.append(code)
+                code_rows.append(row)
+        else:
+            # Too many values to pack into one integer, group on the code matrix
+            keys, counts = np.unique(np.stack([codes for uniques, codes in encoded]), axis=1, return_counts=True)
+            code_rows = keys.T.tolist()
+
+        for row, count in zip(code_rows, counts.tolist()):
+            combination = tuple(
+                uniques[code - 1] if code else None for (uniques, codes), code in zip(encoded, row)
+            )
+            previous = combinations.get(combination)
+            if previous is None:
+                combinations[combination] = count
+                held += combination_bytes(combination)
+            else:
+                combinations[combination] = previous + count
+        if max_bytes is not None and held > max_bytes:
+            raise TooManyCombinations(len(combinations))
+    return combinations
+
+
+def distinct_values_columnar(source):
+    """Yield, per batch, the list of distinct values of every column"""
+    for columns in read_batches(source):
+        batch = []
+        for values, mask in columns:
+            distinct, codes = encode_column(values, mask)
+            if mask.any():
+                distinct.append(None)
+            batch.append(distinct)
+        yield batch
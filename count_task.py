@@ -0,0 +1,41 @@
+from qgis.core import QgsTask, QgsFeedback, QgsVectorLayerFeatureSource
+
+from .counting import columnar_source, count_columns, count_combinations, rect_request
+
+
+class CombinationCountTask(QgsTask):
+    """Counts the field combinations of a layer in the background
+
+    The layer is only read on the main thread: the task counts a
+    snapshot of its feature source, or reads the file column-wise. The
+    callback runs on the main thread with the counts once they are exact,
+    or with None when counting failed or was canceled.
+    With a rectangle only the features inside it are counted.
+    """
+
+    def __init__(self, layer, fields, callback, rect=None):
+        super().__init__(f"Counting combinations of {layer.name()}", QgsTask.CanCancel)
+        self.fields = list(fields)
+        self.callback = callback
+        self.rect = rect
+        self.column_source = columnar_source(layer, fields) if rect is None else None
+        self.feature_count = layer.featureCount()
+        self.source = QgsVectorLayerFeatureSource(layer)
+        self.feedback = QgsFeedback()
+        self.combinations = None
+
+    def run(self):
+        if self.column_source is not None:
+            self.combinations = count_columns(self.column_source, self.feature_count, feedback=self.feedback)
+        if self.combinations is None:
+            self.combinations = count_combinations(
+                self.source, self.fields, rect_request(self.rect), feedback=self.feedback)
+        return self.combinations is not None and not self.isCanceled()
+
+    def cancel(self):
+        self.feedback.cancel()
+        super().cancel()
+
+    def finished(self, result):
+        # None tells the callback the count failed or was canceled
+        self.callback(self.combinations if result else None)
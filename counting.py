@@ -0,0 +1,323 @@
+import os
+import random
+from collections import Counter
+
+from qgis.PyQt.QtCore import QVariant, QSettings
+from qgis.core import (QgsFeatureRequest, QgsVectorLayer, QgsProviderRegistry, QgsProject, QgsFields,
+                       QgsCoordinateTransform, QgsCsException)
+
+from .sketches import HeavyHitters, HyperLogLog
+from . import columnar
+from .columnar import TooManyCombinations, count_combinations_columnar, distinct_values_columnar
+from .sharded_counting import count_combinations_sharded
+from .spill_counter import CombinationCounter
+
+
+# Cardinality sketches per layer id, with the schema they were built for
+_cardinality_cache = {}
+_cache_watched = set()
+
+# Layers this large are counted by several worker processes
+SHARDED_MIN_FEATURES = 2000000
+
+# Field types whose values convert to the same Python values as QGIS gives
+COLUMNAR_TYPES = (QVariant.Int, QVariant.UInt, QVariant.LongLong, QVariant.ULongLong,
+                  QVariant.Double, QVariant.String)
+
+
+def attribute_value(value):
+    """Convert a NULL attribute value to None"""
+    if isinstance(value, QVariant) and value.isNull():
+        return None
+    return value
+
+
+def columnar_source(layer, fields):
+    """Describe an OGR layer whose columns can be streamed through Arrow
+
+    Returns None when the fast path does not apply: NumPy or GDAL 3.6 are
+    missing, the layer is not OGR-backed, it has unsaved edits, or one of
+    the fields is not a column of the file, such as a joined or expression
+    field, or has a type that would not convert to the same values.
+    """
+    if not columnar.available():
+        return None
+    if not isinstance(layer, QgsVectorLayer) or layer.providerType() != 'ogr':
+        return None
+    if layer.editBuffer() is not None and layer.editBuffer().isModified():
+        return None
+
+    layer_fields = layer.fields()
+    for name in fields:
+        index = layer_fields.lookupField(name)
+        if index < 0 or layer_fields.fieldOrigin(index) != QgsFields.OriginProvider:
+            return None
+        if layer_fields.field(index).type() not in COLUMNAR_TYPES:
+            return None
+
+    parts = QgsProviderRegistry.instance().decodeUri('ogr', layer.source())
+    if not parts.get('path'):
+        return None
+    return {
+        'path': parts['path'],
+        'layer_name': parts.get('layerName'),
+        'layer_id': parts.get('layerId'),
+        'subset': layer.subsetString(),
+        'fields': list(fields),
+    }
+
+
+def visible_rect(layer, canvas):
+    """Get the canvas extent in the layer CRS, None if it cannot be transformed"""
+    transform = QgsCoordinateTransform(canvas.mapSettings().destinationCrs(), layer.crs(), QgsProject.instance())
+    try:
+        return transform.transformBoundingBox(canvas.extent())
+    except QgsCsException:
+        return None
+
+
+def rect_request(rect):
+    """Get a request for the features in a rectangle, or for all features"""
+    # The provider answers a filter rectangle from its spatial index
+    if rect is None:
+        return None
+    return QgsFeatureRequest().setFilterRect(rect)
+
+
+def count_workers():
+    """Get the number of worker processes used for sharded counting"""
+    default = max(1, (os.cpu_count() or 1) - 1)
+    return int(QSettings().value("QuickStyle/countWorkers", default))
+
+
+def count_memory_bytes():
+    """Get the memory combination counting may take before spilling to disk"""
+    megabytes = int(QSettings().value("QuickStyle/countMemoryMB", 256))
+    return megabytes * 1024 * 1024
+
+
+def combination_label(values):
+    """Get the text of a combination as shown in the results table"""
+    return " + ".join("NULL" if value is None else str(value) for value in values)
+
+
+def field_unique_counts(layer):
+    """Get the number of unique values of every field of a layer"""
+    fields = layer.fields()
+    return [(field.name(), len(layer.uniqueValues(i))) for i, field in enumerate(fields)]
+
+
+def schema_key(layer):
+    """Get a key identifying the fields and filter of a layer"""
+    fields = tuple((field.name(), field.typeName()) for field in layer.fields())
+    return fields, layer.subsetString()
+
+
+def invalidate_cardinalities(layer_id):
+    """Forget the cached sketches of a layer"""
+    _cardinality_cache.pop(layer_id, None)
+
+
+def field_cardinality_sketches(layer, chunk_size=10000):
+    """Get a HyperLogLog sketch per field, built in one pass and cached
+
+    Values are deduplicated per chunk before hashing, so repeated values
+    cost a set insertion only. The cache is dropped when the layer data,
+    fields or filter change.
+    """
+    key = schema_key(layer)
+    cached = _cardinality_cache.get(layer.id())
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    names = [field.name() for field in layer.fields()]
+    sketches = None
+
+    # File-based layers stream their columns through Arrow when possible
+    source = columnar_source(layer, names)
+    if source is not None:
+        try:
+            sketches = [HyperLogLog() for _ in names]
+            for batch in distinct_values_columnar(source):
+                for sketch, distinct in zip(sketches, batch):
+                    sketch.add(distinct)
+        except (RuntimeError, IOError, KeyError, ValueError, TypeError):
+            sketches = None
+
+    if sketches is None:
+        sketches = [HyperLogLog() for _ in names]
+        chunks = [set() for _ in names]
+
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+
+        rows = 0
+        for feature in layer.getFeatures(request):
+            for chunk, value in zip(chunks, feature.attributes()):
+                value = attribute_value(value)
+                if isinstance(value, (list, dict)):
+                    value = str(value)
+                chunk.add(value)
+            rows += 1
+            if rows % chunk_size == 0:
+                for sketch, chunk in zip(sketches, chunks):
+                    sketch.add(chunk)
+                    chunk.clear()
+        for sketch, chunk in zip(sketches, chunks):
+            sketch.add(chunk)
+
+    result = dict(zip(names, sketches))
+    _cardinality_cache[layer.id()] = (key, result)
+
+    if layer.id() not in _cache_watched:
+        _cache_watched.add(layer.id())
+        layer_id = layer.id()
+        layer.dataChanged.connect(lambda: invalidate_cardinalities(layer_id))
+        layer.willBeDeleted.connect(lambda: invalidate_cardinalities(layer_id))
+    return result
+
+
+def field_cardinalities(layer):
+    """Get (field name, estimated unique count, exact) for every field"""
+    sketches = field_cardinality_sketches(layer)
+    return [(name, sketch.estimate(), sketch.is_exact) for name, sketch in sketches.items()]
+
+
+def count_columns(column_source, feature_count, max_bytes=None, feedback=None):
+    """Count the combinations of a columnar source outside of QGIS
+
+    Very large layers are split across worker processes. Returns None when
+    neither reader could count the source, or when the combinations take
+    more than max_bytes, which only count_combinations can spill, or when
+    the feedback is canceled.
+    """
+    if max_bytes is None:
+        max_bytes = count_memory_bytes()
+    canceled = feedback.isCanceled if feedback is not None else None
+    workers = count_workers()
+    if workers > 1 and feature_count >= SHARDED_MIN_FEATURES:
+        try:
+            return count_combinations_sharded(column_source, workers, max_bytes, canceled)
+        except TooManyCombinations:
+            return None
+        except (RuntimeError, IOError, KeyError, ValueError, TypeError):
+            # Count in this process instead
+            pass
+    try:
+        return count_combinations_columnar(column_source, max_bytes, canceled)
+    except (TooManyCombinations, RuntimeError, IOError, KeyError, ValueError, TypeError):
+        return None
+
+
+def count_combinations(source, fields, request=None, feedback=None, max_bytes=None):
+    """Count features per combination of field values
+
+    The source can be a layer or a feature source and the keys of the
+    result are tuples of attribute values with None for NULL. Whole
+    OGR-backed layers are counted column-wise through Arrow when possible,
+    split across worker processes when they are very large. Other sources
+    are counted on interned values, spilling to disk once the held
+    combinations and values take more than max_bytes, and the counts are
+    then read from disk on demand.
+    Returns None when the feedback is canceled.
+    """
+    if max_bytes is None:
+        max_bytes = count_memory_bytes()
+    if request is None:
+        column_source = columnar_source(source, fields)
+        if column_source is not None:
+            combinations = count_columns(column_source, source.featureCount(), max_bytes, feedback)
+            if combinations is not None:
+                return combinations
+            if feedback is not None and feedback.isCanceled():
+                return None
+
+    layer_fields = source.fields()
+    indexes = [layer_fields.lookupField(name) for name in fields]
+
+    if request is None:
+        request = QgsFeatureRequest()
+    request.setFlags(request.flags() | QgsFeatureRequest.NoGeometry)
+    request.setSubsetOfAttributes(indexes)
+
+    counter = CombinationCounter(len(fields), max_bytes)
+    try:
+        for n, feature in enumerate(source.getFeatures(request)):
+            if feedback is not None and n % 10000 == 0 and feedback.isCanceled():
+                return None
+            attributes = feature.attributes()
+            counter.add([attribute_value(attributes[i]) for i in indexes])
+        return counter.result()
+    finally:
+        # A no-op once result() took over the spill table
+        counter.close()
+
+
+def sample_combinations(layer, fields, size, rect=None):
+    """Estimate the combination counts of a layer from a random sample
+
+    Returns the counts, scaled to the whole layer, and whether they are
+    estimates. Layers no larger than the sample are counted exactly. With
+    a rectangle the first features inside it are counted instead, exactly
+    when there are no more than size of them.
+    """
+    if rect is not None:
+        request = rect_request(rect).setLimit(size + 1)
+        combinations = count_combinations(layer, fields, request)
+        return combinations, sum(combinations.values()) > size
+
+    feature_count = layer.featureCount()
+    if 0 <= feature_count <= size:
+        return count_combinations(layer, fields), False
+
+    request = QgsFeatureRequest()
+    request.setFlags(QgsFeatureRequest.NoGeometry)
+    request.setNoAttributes()
+    request.setLimit(1)
+    first = next(iter(layer.getFeatures(request)), None)
+    if first is None:
+        return {}, False
+
+    combinations = {}
+    if feature_count > 0:
+        # Feature ids are mostly consecutive, fetch random ones from that range
+        fids = random.sample(range(first.id(), first.id() + feature_count), size)
+        combinations = count_combinations(layer, fields, QgsFeatureRequest().setFilterFids(fids))
+
+    sampled = sum(combinations.values())
+    if sampled < size // 4:
+        # Sparse ids, draw the sample from the ids that exist
+        feature_ids = layer.allFeatureIds()
+        fids = random.sample(feature_ids, min(size, len(feature_ids)))
+        combinations = count_combinations(layer, fields, QgsFeatureRequest().setFilterFids(fids))
+        sampled = sum(combinations.values())
+
+    if feature_count > 0 and sampled:
+        scale = feature_count / sampled
+        combinations = {key: max(1, round(count * scale)) for key, count in combinations.items()}
+    return combinations, True
+
+
+def top_values(layer, field_name, n, chunk_size=10000):
+    """Find the n most frequent non-NULL values of a field in one pass
+
+    Values are counted exactly in chunks of at most chunk_size distinct
+    values, each folded into a Misra-Gries summary, so memory does not
+    depend on the number of distinct values in the layer.
+    """
+    index = layer.fields().lookupField(field_name)
+    request = QgsFeatureRequest()
+    request.setFlags(QgsFeatureRequest.NoGeometry)
+    request.setSubsetOfAttributes([index])
+
+    sketch = HeavyHitters(max(n * 10, 100))
+    chunk = Counter()
+    for feature in layer.getFeatures(request):
+        value = attribute_value(feature.attributes()[index])
+        if value is not None:
+            chunk[value] += 1
+            if len(chunk) >= chunk_size:
+                sketch.update(chunk)
+                chunk = Counter()
+    sketch.update(chunk)
+    return sketch.top(n)
@@ -0,0 +1,191 @@
+import os
+import re
+import time
+
+from osgeo import gdal
+from qgis.PyQt.QtCore import QSettings
+from qgis.core import (QgsTask, QgsFeatureSource, QgsProviderRegistry, QgsVectorLayer, QgsRenderContext)
+
+
+def quoted_name(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def quoted_value(value):
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def ogr_target(layer):
+    """Get the (path, layer name) of a Shapefile or GeoPackage layer, None otherwise"""
+    if not isinstance(layer, QgsVectorLayer) or layer.providerType() != 'ogr':
+        return None
+    parts = QgsProviderRegistry.instance().decodeUri('ogr', layer.source())
+    path = parts.get('path')
+    if not path or not os.path.isfile(path):
+        return None
+    if os.path.splitext(path)[1].lower() not in ('.shp', '.gpkg'):
+        return None
+
+    name = parts.get('layerName')
+    if not name:
+        dataset = gdal.OpenEx(path, gdal.OF_VECTOR | gdal.OF_READONLY)
+        ogr_layer = dataset.GetLayer(parts.get('layerId') or 0) if dataset else None
+        if ogr_layer is None:
+            return None
+        name = ogr_layer.GetName()
+    return path, name
+
+
+def index_fields(layer):
+    """Get the fields the layer is categorized by, the ones worth an attribute index"""
+    fields = set()
+    renderer = layer.renderer()
+    if renderer is not None:
+        fields.update(renderer.usedAttributes(QgsRenderContext()))
+    settings = QSettings()
+    for key in ('field1', 'field2', 'field3'):
+        fields.add(settings.value(f"RuleBasedCategorization/{key}", ""))
+    layer_fields = layer.fields()
+    return sorted(name for name in fields if name and layer_fields.lookupField(name) >= 0)
+
+
+def indexed_fields(path, name):
+    """Get the fields that already have an attribute index"""
+    if path.lower().endswith('.shp'):
+        # OGR keeps the indexed field numbers of a Shapefile in the .idm file
+        idm = os.path.splitext(path)[0] + '.idm'
+        if not os.path.exists(idm):
+            return set()
+        with open(idm, encoding='utf-8', errors='replace') as f:
+            numbers = [int(n) for n in re.findall(r'<FieldIndex>(\d+)</FieldIndex>', f.read())]
+        dataset = gdal.OpenEx(path, gdal.OF_VECTOR | gdal.OF_READONLY)
+        definition = dataset.GetLayer(0).GetLayerDefn()
+        return {definition.GetFieldDefn(n).GetName() for n in numbers if n < definition.GetFieldCount()}
+
+    dataset = gdal.OpenEx(path, gdal.OF_VECTOR | gdal.OF_READONLY)
+    result = dataset.ExecuteSQL(
+        f"SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = {quoted_value(name)}")
+    fields = set()
+    if result is not None:
+        for feature in result:
+            # Only the first column of an index speeds up a filter on it
+            match = re.search(r'\(\s*"?([^",)]+)"?', feature.GetField(0) or '')
+            if match:
+                fields.add(match.group(1).strip())
+        dataset.ReleaseResultSet(result)
+    return fields
+
+
+class IndexBuildTask(QgsTask):
+    """Builds the missing spatial and attribute indexes of a Shapefile or GeoPackage layer
+
+    The same filtered read, a quarter of the extent and one value per
+    indexed field, is timed before and after building so the speedup of
+    the next scan can be reported. The callback is not called once it was
+    set to None.
+    """
+
+    def __init__(self, layer, path, name, spatial, fields, callback):
+        super().__init__(f"Indexing {layer.name()}", QgsTask.CanCancel)
+        self.layer_id = layer.id()
+        self.layer_name = layer.name()
+        self.path = path
+        self.name = name
+        self.spatial = spatial
+        self.fields = list(fields)
+        self.callback = callback
+        self.before = None
+        self.after = None
+        self.error = None
+        self.succeeded = False
+
+    def probe(self, dataset):
+        """Time a filtered read like the ones of the categorize tools"""
+        ogr_layer = dataset.GetLayerByName(self.name)
+        min_x, max_x, min_y, max_y = ogr_layer.GetExtent()
+        start = time.perf_counter()
+        ogr_layer.SetSpatialFilterRect(min_x, min_y, (min_x + max_x) / 2, (min_y + max_y) / 2)
+        for feature in ogr_layer:
+            pass
+        ogr_layer.SetSpatialFilter(None)
+        ogr_layer.ResetReading()
+        for field in self.fields:
+            feature = ogr_layer.GetNextFeature()
+            value = feature.GetField(field) if feature is not None else None
+            if value is None:
+                continue
+            ogr_layer.SetAttributeFilter(f"{quoted_name(field)} = {quoted_value(value)}")
+            for feature in ogr_layer:
+                pass
+            ogr_layer.SetAttributeFilter(None)
+            ogr_layer.ResetReading()
+        return time.perf_counter() - start
+
+    def run(self):
+        dataset = None
+        try:
+            dataset = gdal.OpenEx(self.path, gdal.OF_VECTOR | gdal.OF_UPDATE)
+            if dataset is None:
+                self.error = f"Could not open {self.path} for writing"
+                return False
+            # An untimed first read warms the file cache, so both timings read from it
+            self.probe(dataset)
+            self.before = self.probe(dataset)
+            self.setProgress(10)
+
+            table = quoted_name(self.name)
+            geopackage = self.path.lower().endswith('.gpkg')
+            if self.spatial:
+                if geopackage:
+                    geometry = dataset.GetLayerByName(self.name).GetGeometryColumn()
+                    result = dataset.ExecuteSQL(
+                        f"SELECT CreateSpatialIndex({quoted_value(self.name)}, {quoted_value(geometry)})")
+                else:
+                    result = dataset.ExecuteSQL(f"CREATE SPATIAL INDEX ON {table}")
+                if result is not None:
+                    dataset.ReleaseResultSet(result)
+            self.setProgress(50)
+
+            for i, field in enumerate(self.fields):
+                if self.isCanceled():
+                    return False
+                if geopackage:
+                    index = quoted_name(f"idx_{self.name}_{field}")
+                    dataset.ExecuteSQL(f"CREATE INDEX IF NOT EXISTS {index} ON {table} ({quoted_name(field)})")
+                else:
+                    dataset.ExecuteSQL(f"CREATE INDEX ON {table} USING {quoted_name(field)}")
+                self.setProgress(50 + 40 * (i + 1) / len(self.fields))
+
+            self.after = self.probe(dataset)
+            self.setProgress(100)
+        except RuntimeError as e:
+            self.error = str(e)
+            return False
+        finally:
+            dataset = None
+        return not self.isCanceled()
+
+    def finished(self, result):
+        self.succeeded = result
+        if self.callback is not None:
+            self.callback(self)
+
+
+def missing_indexes(layer):
+    """Find the indexes a layer lacks
+
+    Returns (path, layer name, spatial index missing, fields without an
+    attribute index), or None when the layer is not a Shapefile or
+    GeoPackage layer.
+    """
+    target = ogr_target(layer)
+    if target is None:
+        return None
+    path, name = target
+    # Providers that cannot tell are left alone
+    spatial = layer.isSpatial() and layer.hasSpatialIndex() == QgsFeatureSource.SpatialIndexNotPresent
+    existing = indexed_fields(path, name)
+    fields = [field for field in index_fields(layer) if field not in existing]
+    return path, name, spatial, fields
@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import inspect
+from functools import wraps
+
+from qgis.PyQt.QtCore import QSettings, QObject, QEvent
+from qgis.core import QgsApplication, QgsMessageLog, Qgis
+
+
+LOG_TAG = 'QuickStyle'
+SETTINGS_KEY = 'QuickStyle/instrumentation'
+
+
+class NullPhase:
+    """Phase handed out while no tool run is being recorded"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def count(self, rows):
+        pass
+
+
+NULL_PHASE = NullPhase()
+
+
+class Phase:
+    """Monotonic timer and row counter for one phase of a tool run"""
+    __slots__ = ('run', 'name', 'start', 'rows')
+
+    def __init__(self, run, name):
+        self.run = run
+        self.name = name
+        self.start = 0.0
+        self.rows = 0
+
+    def __enter__(self):
+        self.run.depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self.start
+        self.run.depth -= 1
+        if self.run.depth == 0:
+            self.run.work += seconds
+        elapsed = seconds * 1000.0
+        entry = {'name': self.name, 'ms': round(elapsed, 3)}
+        if self.rows:
+            entry['rows'] = self.rows
+        if exc_type is not None:
+            entry['error'] = exc_type.__name__
+        self.run.phases.append(entry)
+        return False
+
+    def count(self, rows):
+        """Add processed features or rows to the phase"""
+        self.rows += rows
+
+
+class Waiting:
+    """Time a tool waits on a modal dialog, recorded as a phase but not in the total
+
+    Phases run from the dialog, such as an Apply button, are work and are
+    not counted as waiting.
+    """
+    __slots__ = ('run', 'start', 'work')
+
+    def __init__(self, run):
+        self.run = run
+        self.start = 0.0
+        self.work = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.work = self.run.work
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        idle = time.perf_counter() - self.start - (self.run.work - self.work)
+        self.run.idle += idle
+        self.run.phases.append({'name': 'dialog', 'ms': round(idle * 1000.0, 3)})
+        return False
+
+
+class ToolRun:
+    """Timings collected during one invocation of a tool"""
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.phases = []
+        self.info = {}
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        # Nesting of open phases, time spent in top-level phases and waiting on dialogs
+        self.depth = 0
+        self.work = 0.0
+        self.idle = 0.0
+
+    def to_record(self, elapsed):
+        record = {
+            'tool': self.tool,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+            'total_ms': round(elapsed * 1000.0, 3),
+            'phases': self.phases,
+        }
+        record.update(self.info)
+        return record
+
+
+class FirstPaintFilter(QObject):
+    """Notes when a tool's dialog is painted for the first time"""
+
+    def __init__(self, run, widget):
+        super().__init__(widget)
+        self.run = run
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            elapsed = (time.perf_counter() - self.run.start) * 1000.0
+            self.run.info['first_paint_ms'] = round(elapsed, 3)
+            obj.removeEventFilter(self)
+            self.deleteLater()
+        return False
+
+
+class Profiler:
+    """Records tool and phase timings to the message log and a JSONL file
+
+    When disabled a tool call costs one attribute check and a phase is a
+    shared no-op context manager.
+    """
+
+    def __init__(self, max_bytes=1024 * 1024, backups=3):
+        self.enabled = QSettings().value(SETTINGS_KEY, False, type=bool)
+        self.current = None
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+    def set_enabled(self, enabled):
+        """Turn recording on or off and remember the choice"""
+        self.enabled = bool(enabled)
+        QSettings().setValue(SETTINGS_KEY, self.enabled)
+
+    def log_path(self):
+        return os.path.join(QgsApplication.qgisSettingsDirPath(), 'QuickStyle', 'timings.jsonl')
+
+    def tool(self, name):
+        """Decorator recording a tool entry point as one run"""
+        def decorator(func):
+            parameters = inspect.signature(func).parameters.values()
+            positional = sum(1 for parameter in parameters
+                             if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD))
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                # Signals such as QAction.triggered pass a checked flag the tool does not take
+                args = args[:positional]
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                if self.current is not None:
+                    # Tools called from inside another tool are one of its phases
+                    with Phase(self.current, name):
+                        return func(*args, **kwargs)
+
+                run = ToolRun(name)
+                self.current = run
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.current = None
+                    self.record(run, time.perf_counter() - run.start - run.idle)
+            return wrapper
+        return decorator
+
+    def phase(self, name):
+        """Context manager timing a phase of the running tool"""
+        run = self.current
+        if run is None:
+            return NULL_PHASE
+        return Phase(run, name)
+
+    def waiting(self):
+        """Context manager around a modal dialog, its open time is kept out of the total"""
+        run = self.current
+        if run is None:
+            return NULL_PHASE
+        return Waiting(run)
+
+    def first_paint(self, widget):
+        """Record how long after the tool started the widget is first painted"""
+        if self.current is not None:
+            widget.installEventFilter(FirstPaintFilter(self.current, widget))
+
+    def annotate(self, **info):
+        """Attach extra values such as the layer name to the running tool"""
+        if self.current is not None:
+            self.current.info.update(info)
+
+    def record(self, run, elapsed):
+        """Write a finished run to the message log and the JSONL file"""
+        record = run.to_record(elapsed)
+
+        parts = []
+        for phase in record['phases']:
+            text = f"{phase['name']} {phase['ms']:.1f} ms"
+            if 'rows' in phase:
+                text += f" ({phase['rows']} rows)"
+            parts.append(text)
+        message = f"{run.tool} {record['total_ms']:.1f} ms"
+        if parts:
+            message += " | " + ", ".join(parts)
+        QgsMessageLog.logMessage(message, LOG_TAG, Qgis.Info)
+
+        try:
+            self.write(record)
+        except OSError as e:
+            QgsMessageLog.logMessage(f"Could not write timings: {str(e)}", LOG_TAG, Qgis.Warning)
+
+    def write(self, record):
+        """Append a record, rotating the file once it grows past max_bytes"""
+        path = self.log_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if os.path.exists(path) and os.path.getsize(path) >= self.max_bytes:
+            for i in range(self.backups - 1, 0, -1):
+                older = f"{path}.{i}"
+                if os.path.exists(older):
+                    os.replace(older, f"{path}.{i + 1}")
+            os.replace(path, f"{path}.1")
+
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+
+
+# Shared by every tool of the plugin
+profiler = Profiler()
@@ -0,0 +1,75 @@
+from qgis.PyQt.QtCore import QSettings
+from qgis.PyQt.QtWidgets import QInputDialog
+from qgis.core import QgsWkbTypes
+
+from .counting import visible_rect
+
+
+# Renderers offered for point layers too large to draw marker by marker
+FAST_POINT_RENDERERS = [
+    ('simple', "Simple markers (cached)"),
+    ('cluster', "Point clusters"),
+    ('heatmap', "Heatmap"),
+]
+
+# Defaults of the thresholds above which a faster renderer is used
+LARGE_POINT_COUNT = 500000
+LARGE_POINT_DENSITY = 0.25
+
+
+def point_density(layer, canvas):
+    """Estimate the points drawn per canvas pixel
+
+    The feature count comes from the provider metadata and the points are
+    assumed to spread evenly over the layer extent, so no feature is read.
+    """
+    count = layer.featureCount()
+    rect = visible_rect(layer, canvas)
+    if count <= 0 or rect is None:
+        return 0.0
+
+    extent = layer.extent()
+    if extent.area() > 0:
+        visible = extent.intersect(rect).area() / extent.area()
+    else:
+        # All points on one spot or on a line
+        visible = 1.0 if rect.intersects(extent) else 0.0
+    pixels = max(1, canvas.width() * canvas.height())
+    return count * visible / pixels
+
+
+def is_large_point_layer(layer, canvas):
+    """Check a point layer against the configured count and density thresholds"""
+    if layer.geometryType() != QgsWkbTypes.PointGeometry:
+        return False
+    settings = QSettings()
+    max_count = int(settings.value("QuickStyle/largePointCount", LARGE_POINT_COUNT))
+    max_density = float(settings.value("QuickStyle/largePointDensity", LARGE_POINT_DENSITY))
+    return layer.featureCount() >= max_count or point_density(layer, canvas) >= max_density
+
+
+def fast_point_mode(layer, canvas, parent=None, modes=None):
+    """Get the faster renderer to use for a large point layer, None to keep markers
+
+    "QuickStyle/largePointRenderer" is 'ask' to offer the choice, one of the
+    FAST_POINT_RENDERERS keys to always use it, or 'off'. Only the keys in
+    modes, all of them by default, are offered or used, and the first one
+    is pre-selected.
+    """
+    if not is_large_point_layer(layer, canvas):
+        return None
+    renderers = [(key, label) for key, label in FAST_POINT_RENDERERS if modes is None or key in modes]
+    mode = QSettings().value("QuickStyle/largePointRenderer", 'ask')
+    if mode == 'off' or not renderers:
+        return None
+    if mode != 'ask':
+        return mode if mode in dict(renderers) else None
+
+    items = ["Keep markers"] + [label for key, label in renderers]
+    label, ok = QInputDialog.getItem(
+        parent, "Large Point Layer",
+        f"{layer.name()} has {layer.featureCount()} points, drawing each marker will be slow.\n"
+        "Render it with:", items, 1, False)
+    if not ok:
+        return None
+    return dict((label, key) for key, label in renderers).get(label)
@@ -0,0 +1,130 @@
+import json
+
+from qgis.core import QgsProject, QgsCategorizedSymbolRenderer, QgsMapLayerLegendUtils
+
+from .counting import attribute_value
+
+
+# Layer tree property keeping the user labels replaced by counts
+LABELS_PROPERTY = "QuickStyle/legendLabels"
+
+
+def count_key(value):
+    """Key matching a category value to a counted value"""
+    value = attribute_value(value)
+    return "NULL" if value is None else str(value)
+
+
+def set_native_counts(layer, enabled):
+    """Turn the layer tree's own feature counting on or off"""
+    layer_tree_layer = QgsProject.instance().layerTreeRoot().findLayer(layer.id())
+    if layer_tree_layer:
+        layer_tree_layer.setCustomProperty("showFeatureCount", enabled)
+
+
+def categorized_renderer(renderer):
+    """Get a categorized renderer, also from behind a cluster renderer, None otherwise"""
+    if renderer is not None and not isinstance(renderer, QgsCategorizedSymbolRenderer):
+        renderer = renderer.embeddedRenderer()
+    if isinstance(renderer, QgsCategorizedSymbolRenderer):
+        return renderer
+    return None
+
+
+def restore_labels(layer_tree_layer):
+    """Put back the user labels replaced by counts, returning whether there were counts"""
+    saved = layer_tree_layer.customProperty(LABELS_PROPERTY)
+    if not saved:
+        return False
+    for i, label in enumerate(json.loads(saved)):
+        # None removes the user label, the category label shows again
+        QgsMapLayerLegendUtils.setLegendNodeUserLabel(layer_tree_layer, i, label)
+    layer_tree_layer.removeCustomProperty(LABELS_PROPERTY)
+    return True
+
+
+class LegendCountCache:
+    """Legend feature counts taken from the categorize scans
+
+    QGIS would count every category again, evaluating the renderer
+    expression once per feature. Instead the counts from our own scan are
+    shown as user labels of the layer tree legend nodes and the layer tree
+    counting is turned off. The renderer labels stay untouched, so saved
+    styles and templates never carry counts. Labels the user gave the
+    nodes are kept in a layer tree property and put back once the layer
+    data or renderer changes, when QGIS counts again. The property is
+    saved with the project, so counts frozen in a saved project are
+    dropped the same way when it is read again.
+    """
+
+    def __init__(self):
+        # Layer id -> the user labels the counts replaced
+        self.entries = {}
+        self.watched = set()
+        QgsProject.instance().readProject.connect(self.restore_project)
+
+    def apply(self, layer, counts):
+        """Show counts, keyed by category value, in the legend"""
+        renderer = categorized_renderer(layer.renderer())
+        layer_tree_layer = QgsProject.instance().layerTreeRoot().findLayer(layer.id())
+        if renderer is None or layer_tree_layer is None:
+            set_native_counts(layer, True)
+            return
+        if layer.id() in self.entries:
+            restore_labels(layer_tree_layer)
+
+        counts = {count_key(value): count for value, count in counts.items()}
+        categories = renderer.categories()
+        labels = []
+        for i, category in enumerate(categories):
+            # The legend has one node per category, in category order
+            label = QgsMapLayerLegendUtils.legendNodeUserLabel(layer_tree_layer, i) or None
+            labels.append(label)
+            count = counts.get(count_key(category.value()), 0)
+            QgsMapLayerLegendUtils.setLegendNodeUserLabel(
+                layer_tree_layer, i, f"{label or category.label()} [{count}]")
+        layer_tree_layer.setCustomProperty(LABELS_PROPERTY, json.dumps(labels))
+
+        self.entries[layer.id()] = labels
+        set_native_counts(layer, False)
+        layer.legend().itemsChanged.emit()
+
+        if layer.id() not in self.watched:
+            self.watched.add(layer.id())
+            layer.dataChanged.connect(lambda: self.invalidate(layer))
+            layer.rendererChanged.connect(lambda: self.invalidate(layer))
+            layer.willBeDeleted.connect(lambda layer_id=layer.id(): self.forget(layer_id))
+
+    def invalidate(self, layer):
+        """Drop stale counts and let QGIS count the categories again"""
+        if self.entries.pop(layer.id(), None) is None:
+            return
+
+        layer_tree_layer = QgsProject.instance().layerTreeRoot().findLayer(layer.id())
+        if layer_tree_layer is not None:
+            restore_labels(layer_tree_layer)
+        set_native_counts(layer, True)
+        layer.legend().itemsChanged.emit()
+
+    def restore_project(self):
+        """Drop the counts a project was saved with"""
+        self.entries = {}
+        for layer_tree_layer in QgsProject.instance().layerTreeRoot().findLayers():
+            if restore_labels(layer_tree_layer):
+                layer_tree_layer.setCustomProperty("showFeatureCount", True)
+                layer = layer_tree_layer.layer()
+                if layer is not None:
+                    layer.legend().itemsChanged.emit()
+
+    def clear(self):
+        """Drop every count, when the plugin is unloaded"""
+        QgsProject.instance().readProject.disconnect(self.restore_project)
+        for layer_id in list(self.entries):
+            layer = QgsProject.instance().mapLayer(layer_id)
+            if layer is not None:
+                self.invalidate(layer)
+        self.entries = {}
+
+    def forget(self, layer_id):
+        self.entries.pop(layer_id, None)
+        self.watched.discard(layer_id)
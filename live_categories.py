@@ -0,0 +1,117 @@
+from qgis.PyQt.QtCore import QObject, QTimer
+from qgis.core import QgsRendererCategory, QgsExpression, QgsExpressionContext, QgsExpressionContextUtils
+from qgis.utils import iface
+
+from .counting import attribute_value
+from .legend_counts import categorized_renderer
+from .styling import category_symbol
+
+
+class LiveCategoryUpdater(QObject):
+    """Adds missing categories to a categorized renderer while a layer is edited
+
+    Only the added or changed features are evaluated, the layer is never
+    scanned again. New categories take the next palette color, the same
+    color the categorize tools would give them.
+    """
+
+    def __init__(self, layer, colors):
+        # Owned by the layer so it goes away with it
+        super().__init__(layer)
+        self.layer = layer
+        self.colors = colors
+        self.known = None
+        self.covers_all = False
+        self.expression = None
+        self.context = None
+
+        # Legend refreshes are batched while many features are digitized
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(250)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        layer.rendererChanged.connect(self.reset)
+        layer.featureAdded.connect(self.on_feature_added)
+        layer.attributeValueChanged.connect(self.on_attribute_value_changed)
+        layer.committedFeaturesAdded.connect(self.on_committed_features_added)
+        layer.committedAttributeValuesChanges.connect(self.on_committed_attribute_values)
+
+    def detach(self):
+        """Stop following the layer"""
+        layer = self.layer
+        layer.rendererChanged.disconnect(self.reset)
+        layer.featureAdded.disconnect(self.on_feature_added)
+        layer.attributeValueChanged.disconnect(self.on_attribute_value_changed)
+        layer.committedFeaturesAdded.disconnect(self.on_committed_features_added)
+        layer.committedAttributeValuesChanges.disconnect(self.on_committed_attribute_values)
+        self.refresh_timer.stop()
+
+    def reset(self):
+        """Forget the cached categories after the renderer was replaced"""
+        self.known = None
+        self.expression = None
+
+    def renderer(self):
+        """Get the categorized renderer of the layer if new categories can be added to it"""
+        # Categories behind a cluster renderer are edited in place
+        renderer = categorized_renderer(self.layer.renderer())
+        if renderer is None:
+            return None
+
+        if self.known is None:
+            values = [category.value() for category in renderer.categories()]
+            self.known = {str(value) for value in values}
+            # An "all other values" category already covers new values
+            self.covers_all = any(value == '' or value is None for value in values)
+
+            attribute = renderer.classAttribute()
+            if self.layer.fields().lookupField(attribute) < 0:
+                self.expression = QgsExpression(attribute)
+                context = QgsExpressionContext(QgsExpressionContextUtils.globalProjectLayerScopes(self.layer))
+                self.expression.prepare(context)
+                self.context = context
+
+        if self.covers_all:
+            return None
+        return renderer
+
+    def on_feature_added(self, fid):
+        self.check_feature(self.layer.getFeature(fid))
+
+    def on_attribute_value_changed(self, fid, index, value):
+        self.check_feature(self.layer.getFeature(fid))
+
+    def on_committed_features_added(self, layer_id, features):
+        for feature in features:
+            self.check_feature(feature)
+
+    def on_committed_attribute_values(self, layer_id, changed_values):
+        for fid in changed_values:
+            self.check_feature(self.layer.getFeature(fid))
+
+    def check_feature(self, feature):
+        """Add a category for the feature's value if it has none yet"""
+        renderer = self.renderer()
+        if renderer is None or not feature.isValid():
+            return
+
+        if self.expression is not None:
+            self.context.setFeature(feature)
+            value = self.expression.evaluate(self.context)
+        else:
+            value = feature[renderer.classAttribute()]
+
+        value = attribute_value(value)
+        if value is None or str(value) in self.known:
+            return
+
+        self.known.add(str(value))
+        color = self.colors[len(renderer.categories()) % len(self.colors)]
+        symbol = category_symbol(self.layer.geometryType(), color)
+        renderer.addCategory(QgsRendererCategory(value, symbol, str(value)))
+        self.refresh_timer.start()
+
+    def refresh(self):
+        self.layer.triggerRepaint()
+        iface.layerTreeView().refreshLayerSymbology(self.layer.id())
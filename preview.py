@@ -0,0 +1,102 @@
+from qgis.PyQt.QtCore import Qt, QTimer, QSize
+from qgis.PyQt.QtGui import QColor, QPixmap
+from qgis.PyQt.QtWidgets import QLabel, QFrame
+from qgis.core import (QgsProject, QgsMapSettings, QgsMapRendererParallelJob, QgsMemoryProviderUtils,
+                       QgsFeatureRequest)
+from qgis.utils import iface
+
+from .counting import visible_rect
+
+
+class PreviewPane(QLabel):
+    """Small offscreen rendering of a style on a sample of the layer
+
+    The features in the current map extent, at most max_features of them,
+    are copied once into a memory layer. Every requested style is cloned
+    onto that layer and rendered by a parallel job on worker threads.
+    Requests made while the user clicks through options are throttled, only
+    the latest one is rendered.
+    """
+
+    def __init__(self, parent=None, size=QSize(280, 180), max_features=2000, delay=150):
+        super().__init__(parent)
+        self.setFixedSize(size)
+        self.setAlignment(Qt.AlignCenter)
+        self.setFrameShape(QFrame.StyledPanel)
+        self.max_features = max_features
+
+        self.sample = None
+        self.sample_key = None
+        self.job = None
+        self.pending = None
+
+        self.throttle = QTimer(self)
+        self.throttle.setSingleShot(True)
+        self.throttle.setInterval(delay)
+        self.throttle.timeout.connect(self.render_pending)
+
+    def request(self, layer, renderer):
+        """Render the renderer on a sample of the layer once the user pauses"""
+        self.pending = (layer, renderer)
+        self.throttle.start()
+
+    def sample_layer(self, layer):
+        """Copy the features in the map extent into a memory layer, kept until the extent changes"""
+        canvas = iface.mapCanvas()
+        key = (layer.id(), canvas.extent().toString(), canvas.mapSettings().destinationCrs().authid())
+        if key == self.sample_key:
+            return self.sample
+
+        request = QgsFeatureRequest().setLimit(self.max_features)
+        rect = visible_rect(layer, canvas)
+        if rect is not None:
+            request.setFilterRect(rect)
+
+        sample = QgsMemoryProviderUtils.createMemoryLayer(
+            'preview', layer.fields(), layer.wkbType(), layer.crs())
+        sample.dataProvider().addFeatures(list(layer.getFeatures(request)))
+        self.sample = sample
+        self.sample_key = key
+        return sample
+
+    def render_pending(self):
+        if self.pending is None:
+            return
+        if self.job is not None:
+            # Rendered when the running job is done
+            return
+
+        layer, renderer = self.pending
+        self.pending = None
+        sample = self.sample_layer(layer)
+        sample.setRenderer(renderer.clone())
+
+        canvas = iface.mapCanvas()
+        settings = QgsMapSettings()
+        settings.setLayers([sample])
+        settings.setDestinationCrs(canvas.mapSettings().destinationCrs())
+        settings.setTransformContext(QgsProject.instance().transformContext())
+        settings.setExtent(canvas.extent())
+        settings.setOutputSize(self.size())
+        settings.setBackgroundColor(QColor(Qt.white))
+
+        self.job = QgsMapRendererParallelJob(settings)
+        self.job.finished.connect(self.on_rendered)
+        self.job.start()
+
+    def on_rendered(self):
+        image = self.job.renderedImage()
+        self.job = None
+        self.setPixmap(QPixmap.fromImage(image))
+        if self.pending is not None:
+            self.render_pending()
+
+    def clear_sample(self):
+        """Forget the sampled features, for instance when the dialog closes"""
+        job, self.job = self.job, None
+        if job is not None:
+            job.finished.disconnect(self.on_rendered)
+            job.cancel()
+        self.pending = None
+        self.sample = None
+        self.sample_key = None
@@ -0,0 +1,458 @@
+import os
+
+from qgis.PyQt.QtGui import QIcon
+from qgis.PyQt.QtCore import QVariant
+from qgis.core import (QgsProcessingProvider, QgsProcessingAlgorithm, QgsProcessingException,
+                       QgsProcessingParameterVectorLayer, QgsProcessingParameterMapLayer,
+                       QgsProcessingParameterField, QgsProcessingParameterCrs, QgsProcessingParameterString,
+                       QgsProcessingParameterEnum, QgsProcessingParameterNumber, QgsProcessingParameterColor,
+                       QgsProcessingParameterFileDestination, QgsProcessingParameterMultipleLayers,
+                       QgsProcessingOutputMapLayer, QgsProcessingOutputNumber, QgsProcessing,
+                       QgsVectorLayerFeatureSource, QgsCategorizedSymbolRenderer, QgsSingleSymbolRenderer,
+                       QgsRendererCategory, QgsField, QgsWkbTypes)
+
+from .counting import columnar_source, count_columns, count_combinations, combination_label, top_values
+from .styling import (PALETTE, OTHER_COLOR, SVG_SHAPES, category_symbol, build_categories,
+                      combination_expression, build_rule_based_renderer, svg_marker_symbol, line_symbol,
+                      outline_symbol, build_labeling)
+from .classification import METHODS, numeric_values, class_breaks, build_graduated_renderer
+from .style_store import save_layer_styles
+
+
+class QuickStyleAlgorithm(QgsProcessingAlgorithm):
+    """Base of the QuickStyle algorithms
+
+    The layer is read on the main thread in prepareAlgorithm, scans run on
+    a feature source snapshot in processAlgorithm, which Processing may
+    run in a background thread, and the style is applied back on the main
+    thread in postProcessAlgorithm.
+    """
+
+    INPUT = 'INPUT'
+    STYLE = 'STYLE'
+    OUTPUT = 'OUTPUT'
+
+    def createInstance(self):
+        return type(self)()
+
+    def group(self):
+        return 'Styling'
+
+    def groupId(self):
+        return 'styling'
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), 'categorize.png'))
+
+    def add_layer_parameters(self, description='Input layer'):
+        """Add the input layer and the optional style file parameters"""
+        self.addParameter(QgsProcessingParameterVectorLayer(self.INPUT, description))
+        self.addParameter(QgsProcessingParameterFileDestination(
+            self.STYLE, 'Save style as QML', 'QML files (*.qml)', optional=True))
+        self.addOutput(QgsProcessingOutputMapLayer(self.OUTPUT, 'Styled layer'))
+
+    def layer_parameter(self, parameters, context):
+        return self.parameterAsVectorLayer(parameters, self.INPUT, context)
+
+    def prepareAlgorithm(self, parameters, context, feedback):
+        self.layer = self.layer_parameter(parameters, context)
+        if self.layer is None:
+            raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
+        self.style_path = self.parameterAsFileOutput(parameters, self.STYLE, context)
+        self.results = {}
+        return self.prepare(parameters, context)
+
+    def prepare(self, parameters, context):
+        """Read the remaining parameters on the main thread"""
+        return True
+
+    def processAlgorithm(self, parameters, context, feedback):
+        self.scan(feedback)
+        if feedback.isCanceled():
+            return {}
+        return self.results
+
+    def scan(self, feedback):
+        """Read the data needed for the style, off the main thread"""
+
+    def postProcessAlgorithm(self, context, feedback):
+        self.apply()
+        self.layer.triggerRepaint()
+
+        results = dict(self.results)
+        results[self.OUTPUT] = self.layer.id()
+        if self.style_path:
+            message, saved = self.layer.saveNamedStyle(self.style_path)
+            if not saved:
+                raise QgsProcessingException(f"Could not save the style: {message}")
+            results[self.STYLE] = self.style_path
+        return results
+
+    def apply(self):
+        """Apply the style to the layer, on the main thread"""
+
+
+class SetCrsAlgorithm(QuickStyleAlgorithm):
+    CRS = 'CRS'
+
+    def name(self):
+        return 'setcrs'
+
+    def displayName(self):
+        return 'Set layer CRS'
+
+    def shortHelpString(self):
+        return "Assigns a CRS to a vector or raster layer without reprojecting it."
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterMapLayer(self.INPUT, 'Input layer'))
+        self.addParameter(QgsProcessingParameterCrs(self.CRS, 'CRS', 'EPSG:4326'))
+        self.addParameter(QgsProcessingParameterFileDestination(
+            self.STYLE, 'Save style as QML', 'QML files (*.qml)', optional=True))
+        self.addOutput(QgsProcessingOutputMapLayer(self.OUTPUT, 'Layer'))
+
+    def layer_parameter(self, parameters, context):
+        return self.parameterAsLayer(parameters, self.INPUT, context)
+
+    def prepare(self, parameters, context):
+        self.crs = self.parameterAsCrs(parameters, self.CRS, context)
+        if not self.crs.isValid():
+            raise QgsProcessingException("Invalid CRS")
+        return True
+
+    def apply(self):
+        self.layer.setCrs(self.crs)
+
+
+class AddFieldAlgorithm(QuickStyleAlgorithm):
+    FIELD_NAME = 'FIELD_NAME'
+    FIELD_TYPE = 'FIELD_TYPE'
+    FIELD_LENGTH = 'FIELD_LENGTH'
+
+    # Same types as the Add Field dialog
+    TYPES = [
+        ("Text (string)", QVariant.String, "String"),
+        ("Whole number (integer)", QVariant.Int, "Integer"),
+        ("Decimal number (real)", QVariant.Double, "Double"),
+        ("Date", QVariant.Date, "Date"),
+    ]
+
+    def name(self):
+        return 'addfield'
+
+    def displayName(self):
+        return 'Add field'
+
+    def shortHelpString(self):
+        return "Adds an empty field to the layer and saves it to the data source."
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterVectorLayer(self.INPUT, 'Input layer'))
+        self.addParameter(QgsProcessingParameterString(self.FIELD_NAME, 'Field name'))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.FIELD_TYPE, 'Field type', [label for label, _, _ in self.TYPES], defaultValue=0))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.FIELD_LENGTH, 'Field length', minValue=1, maxValue=10000, defaultValue=255))
+        self.addOutput(QgsProcessingOutputMapLayer(self.OUTPUT, 'Layer'))
+
+    def prepare(self, parameters, context):
+        self.field_name = self.parameterAsString(parameters, self.FIELD_NAME, context).strip()
+        if not self.field_name:
+            raise QgsProcessingException("Please enter a field name!")
+        if self.layer.fields().lookupField(self.field_name) >= 0:
+            raise QgsProcessingException(f"Field '{self.field_name}' already exists!")
+        _, self.field_type, self.type_name = self.TYPES[self.parameterAsEnum(parameters, self.FIELD_TYPE, context)]
+        self.field_length = self.parameterAsInt(parameters, self.FIELD_LENGTH, context)
+        return True
+
+    def apply(self):
+        field = QgsField(self.field_name, self.field_type, self.type_name, self.field_length)
+        if not self.layer.dataProvider().addAttributes([field]):
+            raise QgsProcessingException(f"Failed to add field '{self.field_name}'")
+        self.layer.updateFields()
+
+
+class CategorizeAlgorithm(QuickStyleAlgorithm):
+    FIELD = 'FIELD'
+    TOP_N = 'TOP_N'
+    CATEGORIES = 'CATEGORIES'
+
+    def name(self):
+        return 'categorize'
+
+    def displayName(self):
+        return 'Categorize by field'
+
+    def shortHelpString(self):
+        return ("Creates one category per value of the field. With a top N only the most "
+                "frequent values get a category and the rest fall into \"Other\".")
+
+    def initAlgorithm(self, config=None):
+        self.add_layer_parameters()
+        self.addParameter(QgsProcessingParameterField(self.FIELD, 'Field', parentLayerParameterName=self.INPUT))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.TOP_N, 'Most frequent values only (0 for all values)', minValue=0, defaultValue=0))
+        self.addOutput(QgsProcessingOutputNumber(self.CATEGORIES, 'Number of categories'))
+
+    def prepare(self, parameters, context):
+        self.field_name = self.parameterAsString(parameters, self.FIELD, context)
+        self.top_n = self.parameterAsInt(parameters, self.TOP_N, context)
+        self.column_source = columnar_source(self.layer, [self.field_name])
+        self.feature_count = self.layer.featureCount()
+        self.source = QgsVectorLayerFeatureSource(self.layer)
+        return True
+
+    def scan(self, feedback):
+        if self.top_n:
+            self.values = sorted(value for value, count in top_values(self.source, self.field_name, self.top_n))
+            return
+
+        combinations = None
+        if self.column_source is not None:
+            combinations = count_columns(self.column_source, self.feature_count, feedback=feedback)
+        if combinations is None:
+            combinations = count_combinations(self.source, [self.field_name], feedback=feedback) or {}
+        self.values = sorted((key[0] for key in combinations), key=lambda value: (value is None, value))
+
+    def apply(self):
+        geometry_type = self.layer.geometryType()
+        categories = build_categories(geometry_type, self.values, PALETTE)
+        if self.top_n:
+            # An empty value is the renderer's "all other values" category
+            categories.append(QgsRendererCategory('', category_symbol(geometry_type, OTHER_COLOR), "Other"))
+        self.results[self.CATEGORIES] = len(categories)
+        self.layer.setRenderer(QgsCategorizedSymbolRenderer(self.field_name, categories))
+
+
+class RuleBasedCategorizeAlgorithm(QuickStyleAlgorithm):
+    FIELDS = 'FIELDS'
+    RENDERER = 'RENDERER'
+    CATEGORIES = 'CATEGORIES'
+
+    RENDERERS = ["Categorized (expression)", "Rule-based (filters)", "Rule-based grouped by first field"]
+
+    def name(self):
+        return 'rulebasedcategorize'
+
+    def displayName(self):
+        return 'Categorize by field combinations'
+
+    def shortHelpString(self):
+        return "Creates one category or rule per combination of values of two or three fields."
+
+    def initAlgorithm(self, config=None):
+        self.add_layer_parameters()
+        self.addParameter(QgsProcessingParameterField(
+            self.FIELDS, 'Fields (2 or 3)', parentLayerParameterName=self.INPUT, allowMultiple=True))
+        self.addParameter(QgsProcessingParameterEnum(self.RENDERER, 'Output', self.RENDERERS, defaultValue=0))
+        self.addOutput(QgsProcessingOutputNumber(self.CATEGORIES, 'Number of combinations'))
+
+    def prepare(self, parameters, context):
+        self.fields = self.parameterAsFields(parameters, self.FIELDS, context)
+        if not 2 <= len(self.fields) <= 3:
+            raise QgsProcessingException("Select 2 or 3 fields")
+        self.renderer_type = self.parameterAsEnum(parameters, self.RENDERER, context)
+        self.column_source = columnar_source(self.layer, self.fields)
+        self.feature_count = self.layer.featureCount()
+        self.source = QgsVectorLayerFeatureSource(self.layer)
+        return True
+
+    def scan(self, feedback):
+        combinations = None
+        if self.column_source is not None:
+            combinations = count_columns(self.column_source, self.feature_count, feedback=feedback)
+        if combinations is None:
+            combinations = count_combinations(self.source, self.fields, feedback=feedback) or {}
+        self.combinations = list(combinations)
+        self.results[self.CATEGORIES] = len(self.combinations)
+
+    def apply(self):
+        geometry_type = self.layer.geometryType()
+        if self.renderer_type:
+            renderer = build_rule_based_renderer(
+                geometry_type, self.fields, self.combinations, PALETTE, group=self.renderer_type == 2)
+        else:
+            labels = [combination_label(values) for values in self.combinations]
+            categories = build_categories(geometry_type, labels, PALETTE)
+            renderer = QgsCategorizedSymbolRenderer(combination_expression(self.fields), categories)
+        self.layer.setRenderer(renderer)
+
+
+class GraduateAlgorithm(QuickStyleAlgorithm):
+    FIELD = 'FIELD'
+    METHOD = 'METHOD'
+    CLASSES = 'CLASSES'
+
+    def name(self):
+        return 'graduate'
+
+    def displayName(self):
+        return 'Graduate by numeric field'
+
+    def shortHelpString(self):
+        return "Classifies a numeric field into ranges with the chosen method."
+
+    def initAlgorithm(self, config=None):
+        self.add_layer_parameters()
+        self.addParameter(QgsProcessingParameterField(
+            self.FIELD, 'Field', parentLayerParameterName=self.INPUT, type=QgsProcessingParameterField.Numeric))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.METHOD, 'Method', METHODS, defaultValue=METHODS.index("Quantile")))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.CLASSES, 'Classes', minValue=2, maxValue=len(PALETTE), defaultValue=5))
+
+    def prepare(self, parameters, context):
+        self.field_name = self.parameterAsString(parameters, self.FIELD, context)
+        self.method = METHODS[self.parameterAsEnum(parameters, self.METHOD, context)]
+        self.classes = self.parameterAsInt(parameters, self.CLASSES, context)
+        self.source = QgsVectorLayerFeatureSource(self.layer)
+        return True
+
+    def scan(self, feedback):
+        self.values = numeric_values(self.source, self.field_name)
+        if len(self.values) == 0:
+            raise QgsProcessingException(f"Field '{self.field_name}' has no values!")
+        self.breaks = class_breaks(self.values, self.method, self.classes)
+
+    def apply(self):
+        self.layer.setRenderer(build_graduated_renderer(
+            self.field_name, self.layer.geometryType(), self.values, self.breaks, PALETTE))
+
+
+class SymbologyAlgorithm(QuickStyleAlgorithm):
+    COLOR = 'COLOR'
+    SIZE = 'SIZE'
+    SHAPE = 'SHAPE'
+
+    def name(self):
+        return 'symbology'
+
+    def displayName(self):
+        return 'Single symbol'
+
+    def shortHelpString(self):
+        return ("Draws every feature with one symbol: an SVG marker for points, a line "
+                "for lines and an outline for polygons. The size is the marker size or "
+                "the line width in millimeters.")
+
+    def initAlgorithm(self, config=None):
+        self.add_layer_parameters()
+        self.addParameter(QgsProcessingParameterColor(self.COLOR, 'Color', '#3579b1'))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.SIZE, 'Size or width', type=QgsProcessingParameterNumber.Double, minValue=0.1, defaultValue=1.0))
+        self.addParameter(QgsProcessingParameterEnum(self.SHAPE, 'Point shape', SVG_SHAPES, defaultValue=0))
+
+    def prepare(self, parameters, context):
+        self.color = self.parameterAsColor(parameters, self.COLOR, context).name()
+        self.size = self.parameterAsDouble(parameters, self.SIZE, context)
+        self.shape = SVG_SHAPES[self.parameterAsEnum(parameters, self.SHAPE, context)]
+        return True
+
+    def apply(self):
+        geometry_type = self.layer.geometryType()
+        if geometry_type == QgsWkbTypes.PointGeometry:
+            symbol = svg_marker_symbol(self.shape, self.size, self.color)
+        elif geometry_type == QgsWkbTypes.LineGeometry:
+            symbol = line_symbol(self.color, self.size)
+        else:
+            symbol = outline_symbol(self.color, self.size)
+        self.layer.setRenderer(QgsSingleSymbolRenderer(symbol))
+
+
+class LabelingAlgorithm(QuickStyleAlgorithm):
+    FIELDS = 'FIELDS'
+    SIZE = 'SIZE'
+    COLORS = 'COLORS'
+
+    def name(self):
+        return 'labeling'
+
+    def displayName(self):
+        return 'Label with fields'
+
+    def shortHelpString(self):
+        return "Labels features with up to 3 fields, one row per field. Colors are hex values separated by commas."
+
+    def initAlgorithm(self, config=None):
+        self.add_layer_parameters()
+        self.addParameter(QgsProcessingParameterField(
+            self.FIELDS, 'Fields (up to 3)', parentLayerParameterName=self.INPUT, allowMultiple=True))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.SIZE, 'Text size', minValue=1, maxValue=100, defaultValue=11))
+        self.addParameter(QgsProcessingParameterString(self.COLORS, 'Colors', '#ffa500'))
+
+    def prepare(self, parameters, context):
+        self.fields = self.parameterAsFields(parameters, self.FIELDS, context)
+        if not 1 <= len(self.fields) <= 3:
+            raise QgsProcessingException("Select 1 to 3 fields")
+        self.size = self.parameterAsInt(parameters, self.SIZE, context)
+        colors = self.parameterAsString(parameters, self.COLORS, context)
+        self.colors = [color.strip() for color in colors.split(',') if color.strip()]
+        return True
+
+    def apply(self):
+        self.layer.setLabeling(build_labeling(self.layer.geometryType(), self.fields, self.size, self.colors))
+        self.layer.setLabelsEnabled(True)
+
+
+class SaveStylesAlgorithm(QgsProcessingAlgorithm):
+    LAYERS = 'LAYERS'
+    SAVED = 'SAVED'
+
+    def createInstance(self):
+        return SaveStylesAlgorithm()
+
+    def name(self):
+        return 'savestyles'
+
+    def displayName(self):
+        return 'Save layer styles'
+
+    def group(self):
+        return 'Styling'
+
+    def groupId(self):
+        return 'styling'
+
+    def shortHelpString(self):
+        return ("Saves the current style of every layer with its data: as the default style "
+                "in the layer_styles table of GeoPackages, one transaction per file, and as "
+                "a .qml file next to other files.")
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterMultipleLayers(
+            self.LAYERS, 'Layers', QgsProcessing.TypeVectorAnyGeometry))
+        self.addOutput(QgsProcessingOutputNumber(self.SAVED, 'Number of saved styles'))
+
+    def prepareAlgorithm(self, parameters, context, feedback):
+        self.layers = self.parameterAsLayerList(parameters, self.LAYERS, context)
+        return True
+
+    def processAlgorithm(self, parameters, context, feedback):
+        return {}
+
+    def postProcessAlgorithm(self, context, feedback):
+        # Styles are read from the layers, so this runs on the main thread
+        saved, skipped = save_layer_styles(self.layers)
+        for layer, reason in skipped:
+            feedback.reportError(f"Style of {layer.name()} not saved: {reason}")
+        return {self.SAVED: len(saved)}
+
+
+class QuickStyleProvider(QgsProcessingProvider):
+    """Processing provider with one algorithm per QuickStyle tool"""
+
+    def id(self):
+        return 'quickstyle'
+
+    def name(self):
+        return 'QuickStyle'
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), 'categorize.png'))
+
+    def loadAlgorithms(self):
+        for algorithm in (SetCrsAlgorithm(), AddFieldAlgorithm(), CategorizeAlgorithm(),
+                          RuleBasedCategorizeAlgorithm(), GraduateAlgorithm(), SymbologyAlgorithm(),
+                          LabelingAlgorithm(), SaveStylesAlgorithm()):
+            self.addAlgorithm(algorithm)
@@ -7,22 +7,40 @@ from qgis.PyQt.QtWidgets import (QAction, QMenu, QToolButton, QDialog, QVBoxLayo
                                  QGridLayout, QLabel, QPushButton, QSpinBox, QDoubleSpinBox, 
                                  QButtonGroup, QFrame, QMessageBox, QSizePolicy, QWidget, 
                                  QLineEdit, QComboBox, QFormLayout, QScrollArea, QTableWidget, 
-                                 QTableWidgetItem, QHeaderView)
-from qgis.PyQt.QtTest import QTest
+                                 QTableWidgetItem, QHeaderView, QInputDialog)
 from qgis.core import (QgsProject, QgsVectorLayer, QgsCoordinateReferenceSystem, 
                        Qgis, QgsApplication, QgsField, QgsSymbol, QgsRendererRange, 
                        QgsGraduatedSymbolRenderer, QgsSingleSymbolRenderer,
-                       QgsSimpleMarkerSymbolLayer, QgsSimpleLineSymbolLayer,
-                       QgsSimpleFillSymbolLayer, QgsMarkerSymbol, QgsLineSymbol,
-                       QgsFillSymbol, QgsWkbTypes, QgsPalLayerSettings, 
-                       QgsVectorLayerSimpleLabeling, QgsRuleBasedLabeling,
-                       QgsTextFormat, QgsTextBufferSettings, QgsUnitTypes,
+                       QgsSimpleMarkerSymbolLayer, QgsSimpleFillSymbolLayer,
+                       QgsWkbTypes, QgsTextBufferSettings,
                        QgsCategorizedSymbolRenderer, QgsRendererCategory,
-                       QgsLayerTreeLayer, QgsRasterLayer, QgsSvgMarkerSymbolLayer)
+                       QgsLayerTreeLayer, QgsRasterLayer)
 from qgis.PyQt.QtCore import QVariant
 from qgis.gui import QgsProjectionSelectionDialog
 from qgis.utils import iface
 
+from .table_view import AttributeTableDialog
+from .selection_summary import SelectionSummaryDock
+from .instrumentation import profiler
+from .counting import (count_combinations, sample_combinations, combination_label, field_unique_counts,
+                       field_cardinalities, top_values, visible_rect, rect_request)
+from .count_task import CombinationCountTask
+from .styling import (PALETTE, OTHER_COLOR, SVG_FOLDER, SVG_SHAPES, category_symbol, build_categories,
+                      combination_expression, build_rule_based_renderer, svg_marker_symbol, line_symbol,
+                      outline_symbol, simple_marker_symbol, fast_point_renderer, build_labeling)
+from .classification import METHODS, numeric_values, class_breaks, build_graduated_renderer
+from .live_categories import LiveCategoryUpdater
+from .legend_counts import LegendCountCache, set_native_counts
+from .processing_provider import QuickStyleProvider
+from .style_store import save_layer_styles
+from .templates import TemplateLibrary
+from .stylesheets import SYMBOLOGY_STYLE, LABELING_STYLE, CATEGORIZE_STYLE, set_selected
+from .preview import PreviewPane
+from .large_points import fast_point_mode
+from .raster_task import RasterPreparationQueue
+from .index_task import IndexBuildTask, missing_indexes
+from .render_presets import RENDER_PRESETS, vertex_sample, suggested_preset, apply_render_preset
+
 
 class QuickStyle:
     def __init__(self, iface):
@@ -51,13 +69,44 @@ class QuickStyle:
         self.crs_menu = None
         self.crs_tool_button = None
         
+        # Selection summary dock, created on first use
+        self.summary_dock = None
+        
+        # Live category updaters by layer id
+        self.live_updaters = {}
+        
+        # Legend counts reused from the categorize scans
+        self.legend_counts = LegendCountCache()
+        
+        # Exact rule-based counting running in the background
+        self.rule_based_task = None
+        self.rule_based_combinations = {}
+        self.rule_based_estimated = False
+        self.rule_based_rect = None
+        self.rule_based_layer = None
+        self.rule_based_fields = []
+        self.rule_based_apply_pending = False
+        
+        # Processing algorithms of the tools
+        self.provider = None
+        
+        # Tool dialogs, built once and bound to the active layer on open
+        self.symbology_dialogs = {}
+        self.labeling_dialog = None
+        self.categorize_dialog = None
+        self.rule_based_dialog = None
+        
+        # Style templates, compiled once per session
+        self.templates = TemplateLibrary()
+        
+        # Raster overviews and statistics built in the background
+        self.raster_queue = None
+        
+        # Spatial and attribute index builds running in the background
+        self.index_tasks = []
+        
         # Color palettes and options for different tools
-        self.colors = [
-            '#e41a1c', '#3579b1', '#00e4f6', '#0000ff', 
-            '#ff00ff', '#ff69b4', '#5e17eb', '#ffa500',
-            '#00fa9a', '#e10052', '#9bbce7', '#c8ff6d', 
-            '#22c89e', '#ffd93d', '#008e9b', '#ff9671'
-        ]
+        self.colors = list(PALETTE)
         
 
     def tr(self, message):
@@ -94,7 +143,14 @@ class QuickStyle:
         self.actions.append(action)
         return action
 
+    def initProcessing(self):
+        """Register the tools as Processing algorithms for batch and headless runs"""
+        self.provider = QuickStyleProvider()
+        QgsApplication.processingRegistry().addProvider(self.provider)
+
     def initGui(self):
+        self.initProcessing()
+        
         # Tool 1: Set CRS with dropdown
         self.create_crs_tool()
         
@@ -134,6 +190,17 @@ class QuickStyle:
             add_to_menu=False
         )
         
+        # Tool 4b: Selection Summary
+        self.add_action(
+            self.get_icon_path('show_selected_features.png'),
+            text=self.tr(u'Selection Summary'),
+            callback=self.show_selection_summary,
+            parent=self.iface.mainWindow(),
+            status_tip='Selection Summary',
+            whats_this='Show counts, sums and distinct values of the selected features',
+            add_to_toolbar=False
+        )
+        
         # Tool 5: Symbology
         icon_path = self.get_icon_path('Symbology.png')
         self.add_action(
@@ -181,6 +248,119 @@ class QuickStyle:
             whats_this='Apply rule-based categorization to vector layer',
             add_to_menu=False
         )
+        
+        # Tool 9: Graduate
+        icon_path = self.get_icon_path('categorize.png')
+        self.add_action(
+            icon_path,
+            text=self.tr(u'Graduate Layer'),
+            callback=self.run_graduate,
+            parent=self.iface.mainWindow(),
+            status_tip='Graduate Layer',
+            whats_this='Classify vector layer by numeric field ranges',
+            add_to_menu=False
+        )
+        
+        # Save styles of many layers at once
+        self.add_action(
+            '',
+            text=self.tr(u'Save Layer Styles'),
+            callback=self.save_styles,
+            parent=self.iface.mainWindow(),
+            status_tip='Save Layer Styles',
+            whats_this='Save the styles of the selected layers, or of all layers, with their data',
+            add_to_toolbar=False
+        )
+        
+        # Style templates
+        self.add_action(
+            '',
+            text=self.tr(u'Save Style Template'),
+            callback=self.save_style_template,
+            parent=self.iface.mainWindow(),
+            status_tip='Save Style Template',
+            whats_this='Store the renderer and labels of the active layer as a reusable template',
+            add_to_toolbar=False
+        )
+        self.add_action(
+            '',
+            text=self.tr(u'Apply Style Template'),
+            callback=self.apply_style_template,
+            parent=self.iface.mainWindow(),
+            status_tip='Apply Style Template',
+            whats_this='Apply a stored template to every layer with matching fields',
+            add_to_toolbar=False
+        )
+        self.add_action(
+            '',
+            text=self.tr(u'Delete Style Template'),
+            callback=self.delete_style_template,
+            parent=self.iface.mainWindow(),
+            status_tip='Delete Style Template',
+            whats_this='Remove a stored style template',
+            add_to_toolbar=False
+        )
+        
+        # Raster overviews and statistics
+        self.add_action(
+            '',
+            text=self.tr(u'Prepare Rasters'),
+            callback=self.prepare_rasters,
+            parent=self.iface.mainWindow(),
+            status_tip='Prepare Rasters',
+            whats_this='Build overviews and statistics of the selected rasters, or of all rasters, in the background',
+            add_to_toolbar=False
+        )
+        
+        # Spatial and attribute indexes
+        self.add_action(
+            '',
+            text=self.tr(u'Build Layer Indexes'),
+            callback=self.build_indexes,
+            parent=self.iface.mainWindow(),
+            status_tip='Build Layer Indexes',
+            whats_this='Build the missing spatial index and the attribute indexes of the categorized fields',
+            add_to_toolbar=False
+        )
+        
+        # Timing instrumentation toggle
+        timing_action = self.add_action(
+            '',
+            text=self.tr(u'Record Tool Timings'),
+            callback=profiler.set_enabled,
+            parent=self.iface.mainWindow(),
+            status_tip='Record Tool Timings',
+            whats_this='Log how long each QuickStyle tool and its phases take',
+            add_to_toolbar=False
+        )
+        timing_action.setCheckable(True)
+        timing_action.setChecked(profiler.enabled)
+        
+        # Live categories toggle
+        live_action = self.add_action(
+            '',
+            text=self.tr(u'Update Categories While Editing'),
+            callback=self.set_live_categories,
+            parent=self.iface.mainWindow(),
+            status_tip='Update Categories While Editing',
+            whats_this='Add categories for new values as features are edited',
+            add_to_toolbar=False
+        )
+        live_action.setCheckable(True)
+        live_action.setChecked(QSettings().value("Categorize/liveUpdate", False, type=bool))
+        
+        # Visible extent toggle
+        extent_action = self.add_action(
+            '',
+            text=self.tr(u'Categorize Visible Extent Only'),
+            callback=self.set_visible_extent_only,
+            parent=self.iface.mainWindow(),
+            status_tip='Categorize Visible Extent Only',
+            whats_this='Count and categorize only the features in the current map extent',
+            add_to_toolbar=False
+        )
+        extent_action.setCheckable(True)
+        extent_action.setChecked(QSettings().value("Categorize/visibleExtentOnly", False, type=bool))
 
     def create_crs_tool(self):
         """Create CRS tool with dropdown menu"""
@@ -231,6 +411,51 @@ class QuickStyle:
             self.iface.removePluginVectorMenu(self.tr(u'&QuickStyle'), action)
             self.iface.removeToolBarIcon(action)
         
+        # Drop the cached dialogs
+        for dialog in [*self.symbology_dialogs.values(), self.labeling_dialog,
+                       self.categorize_dialog, self.rule_based_dialog]:
+            if dialog is not None:
+                dialog.deleteLater()
+        self.symbology_dialogs = {}
+        self.labeling_dialog = None
+        self.categorize_dialog = None
+        self.rule_based_dialog = None
+        
+        # Stop preparing rasters, the plugin is gone when the tasks end
+        if self.raster_queue is not None:
+            self.raster_queue.cancel(notify=False)
+            self.raster_queue = None
+        
+        # Stop building indexes
+        for task in self.index_tasks:
+            task.callback = None
+            try:
+                task.cancel()
+            except RuntimeError:
+                # The task already ended and was deleted
+                pass
+        self.index_tasks = []
+        
+        # Remove Processing algorithms
+        if self.provider:
+            QgsApplication.processingRegistry().removeProvider(self.provider)
+            self.provider = None
+        
+        # Stop following edited layers
+        for layer_id in list(self.live_updaters):
+            self.stop_live_categories(layer_id)
+        
+        # Put back the legend labels replaced by counts
+        self.legend_counts.clear()
+        
+        # Remove selection summary dock
+        if self.summary_dock:
+            self.iface.currentLayerChanged.disconnect(self.summary_dock.bind)
+            self.summary_dock.bind(None)
+            self.iface.removeDockWidget(self.summary_dock)
+            self.summary_dock.deleteLater()
+            self.summary_dock = None
+        
         # Remove toolbar
         if self.toolbar:
             del self.toolbar
@@ -268,7 +493,334 @@ class QuickStyle:
             
         return active_layer
 
+    def set_live_categories(self, enabled):
+        """Turn live category updates on or off for categorized layers"""
+        QSettings().setValue("Categorize/liveUpdate", enabled)
+        if not enabled:
+            for layer_id in list(self.live_updaters):
+                self.stop_live_categories(layer_id)
+
+    def set_visible_extent_only(self, enabled):
+        """Limit categorize scans to the current map extent or not"""
+        QSettings().setValue("Categorize/visibleExtentOnly", enabled)
+
+    def scan_rect(self, layer):
+        """Get the rectangle categorize scans are limited to, None for the whole layer"""
+        if not QSettings().value("Categorize/visibleExtentOnly", False, type=bool):
+            return None
+        return visible_rect(layer, iface.mapCanvas())
+
+    def large_point_renderer(self, layer, renderer):
+        """Put the categories of a large point layer behind clusters"""
+        # Category markers are already simple and a heatmap would drop the categories
+        mode = fast_point_mode(layer, self.iface.mapCanvas(), self.iface.mainWindow(), ['cluster'])
+        return fast_point_renderer(renderer, mode)
+
+    def watch_categories(self, layer):
+        """Keep the categories of a layer complete while it is edited"""
+        if not QSettings().value("Categorize/liveUpdate", False, type=bool):
+            return
+        if layer.id() in self.live_updaters:
+            # The updater reads the new renderer on the next edit
+            self.live_updaters[layer.id()].reset()
+            return
+        
+        self.live_updaters[layer.id()] = LiveCategoryUpdater(layer, self.colors)
+        layer.willBeDeleted.connect(lambda layer_id=layer.id(): self.live_updaters.pop(layer_id, None))
+
+    def stop_live_categories(self, layer_id):
+        """Stop following the edits of a layer"""
+        updater = self.live_updaters.pop(layer_id, None)
+        if updater is not None:
+            updater.detach()
+            updater.deleteLater()
+
+    # Style persistence
+    @profiler.tool("save_styles")
+    def save_styles(self):
+        """Save the styles of the selected layers, or of all layers, to their data sources"""
+        layers = [layer for layer in iface.layerTreeView().selectedLayers() if isinstance(layer, QgsVectorLayer)]
+        if not layers:
+            layers = [layer for layer in QgsProject.instance().mapLayers().values()
+                      if isinstance(layer, QgsVectorLayer)]
+        if not layers:
+            iface.messageBar().pushMessage(
+                "Error", "No vector layers to save styles for!", 
+                level=Qgis.Critical, duration=5
+            )
+            return
+        
+        # GeoPackages get one transaction each, other files a .qml sidecar
+        with profiler.phase("apply") as phase:
+            saved, skipped = save_layer_styles(layers)
+            phase.count(len(saved))
+        
+        if saved:
+            iface.messageBar().pushMessage(
+                "Success", f"Saved the styles of {len(saved)} layers", 
+                level=Qgis.Success, duration=5
+            )
+        if skipped:
+            names = ", ".join(f"{layer.name()} ({reason})" for layer, reason in skipped[:5])
+            if len(skipped) > 5:
+                names += f" and {len(skipped) - 5} more"
+            iface.messageBar().pushMessage(
+                "Warning", f"Styles not saved: {names}", 
+                level=Qgis.Warning, duration=10
+            )
+
+    # Raster preparation
+    @profiler.tool("prepare_rasters")
+    def prepare_rasters(self):
+        """Build the overviews and statistics of the selected rasters, or of all rasters"""
+        layers = [layer for layer in iface.layerTreeView().selectedLayers() if isinstance(layer, QgsRasterLayer)]
+        if not layers:
+            layers = [layer for layer in QgsProject.instance().mapLayers().values()
+                      if isinstance(layer, QgsRasterLayer)]
+        if not layers:
+            iface.messageBar().pushMessage(
+                "Error", "No raster layers to prepare!", 
+                level=Qgis.Critical, duration=5
+            )
+            return
+        
+        if self.raster_queue is None:
+            workers = int(QSettings().value("QuickStyle/rasterWorkers", 2))
+            self.raster_queue = RasterPreparationQueue(workers, self.finish_raster_preparation)
+        skipped = self.raster_queue.add(layers)
+        
+        queued = len(layers) - len(skipped)
+        if queued:
+            iface.messageBar().pushMessage(
+                "Info", f"Preparing {queued} rasters in the background", 
+                level=Qgis.Info, duration=5
+            )
+        if skipped:
+            iface.messageBar().pushMessage(
+                "Warning", f"{len(skipped)} rasters are not stored in a file and were skipped", 
+                level=Qgis.Warning, duration=5
+            )
+
+    def finish_raster_preparation(self, tasks):
+        """Reload the prepared rasters so they draw from their overviews"""
+        failed = []
+        for task in tasks:
+            if not task.succeeded:
+                failed.append(task)
+                continue
+            layer = QgsProject.instance().mapLayer(task.layer_id)
+            if layer is not None and task.built_overviews:
+                # GDAL only looks for overviews when the file is opened
+                layer.dataProvider().reloadData()
+                layer.triggerRepaint()
+        
+        prepared = len(tasks) - len(failed)
+        if prepared:
+            iface.messageBar().pushMessage(
+                "Success", f"Prepared {prepared} rasters", 
+                level=Qgis.Success, duration=5
+            )
+        if failed:
+            reasons = ", ".join(f"{task.path} ({task.error or 'canceled'})" for task in failed[:5])
+            if len(failed) > 5:
+                reasons += f" and {len(failed) - 5} more"
+            iface.messageBar().pushMessage(
+                "Warning", f"Rasters not prepared: {reasons}", 
+                level=Qgis.Warning, duration=10
+            )
+
+    # Layer indexes
+    @profiler.tool("build_indexes")
+    def build_indexes(self):
+        """Build the missing indexes of the selected layers, or of the active layer"""
+        layers = [layer for layer in iface.layerTreeView().selectedLayers() if isinstance(layer, QgsVectorLayer)]
+        if not layers:
+            layer = self.get_active_vector_layer()
+            if not layer:
+                return
+            layers = [layer]
+        
+        started = 0
+        indexed = []
+        skipped = []
+        with profiler.phase("scan") as phase:
+            for layer in layers:
+                missing = missing_indexes(layer)
+                if missing is None:
+                    skipped.append(layer)
+                    continue
+                path, name, spatial, fields = missing
+                if not spatial and not fields:
+                    indexed.append(layer)
+                    continue
+                task = IndexBuildTask(layer, path, name, spatial, fields, self.finish_index_build)
+                self.index_tasks.append(task)
+                QgsApplication.taskManager().addTask(task)
+                started += 1
+            phase.count(len(layers))
+        
+        if started:
+            iface.messageBar().pushMessage(
+                "Info", f"Building the indexes of {started} layers in the background", 
+                level=Qgis.Info, duration=5
+            )
+        if indexed:
+            iface.messageBar().pushMessage(
+                "Info", f"{len(indexed)} layers already have their indexes", 
+                level=Qgis.Info, duration=5
+            )
+        if skipped:
+            iface.messageBar().pushMessage(
+                "Warning", f"{len(skipped)} layers are not Shapefiles or GeoPackages and were skipped", 
+                level=Qgis.Warning, duration=5
+            )
+
+    def finish_index_build(self, task):
+        """Reopen the indexed layer and report how much faster filtered reads got"""
+        if task in self.index_tasks:
+            self.index_tasks.remove(task)
+        if not task.succeeded:
+            iface.messageBar().pushMessage(
+                "Warning", f"Indexes of {task.layer_name} not built: {task.error or 'canceled'}", 
+                level=Qgis.Warning, duration=10
+            )
+            return
+        
+        layer = QgsProject.instance().mapLayer(task.layer_id)
+        if layer is not None:
+            # The provider only picks up new index files when it reopens the file
+            layer.dataProvider().reloadData()
+        
+        built = (["spatial"] if task.spatial else []) + task.fields
+        speedup = task.before / task.after if task.after else 0
+        iface.messageBar().pushMessage(
+            "Success", 
+            f"Indexed {task.layer_name} ({', '.join(built)}): filtered scans took "
+            f"{task.after * 1000:.0f} ms instead of {task.before * 1000:.0f} ms ({speedup:.1f}x)", 
+            level=Qgis.Success, duration=10
+        )
+
+    # Style templates
+    @profiler.tool("save_template")
+    def save_style_template(self):
+        """Store the style of the active layer as a named template"""
+        layer = self.get_active_vector_layer()
+        if not layer:
+            return
+        
+        with profiler.waiting():
+            name, ok = QInputDialog.getText(self.iface.mainWindow(), "Save Style Template", "Template name:",
+                                            text=layer.name())
+        name = name.strip()
+        if not ok or not name:
+            return
+        
+        try:
+            with profiler.phase("apply"):
+                self.templates.save(name, layer)
+        except (IOError, OSError) as e:
+            iface.messageBar().pushMessage(
+                "Error", f"Failed to save template: {str(e)}", 
+                level=Qgis.Critical, duration=5
+            )
+            return
+        iface.messageBar().pushMessage(
+            "Success", f"Template '{name}' saved", 
+            level=Qgis.Success, duration=3
+        )
+
+    @profiler.tool("apply_template")
+    def apply_style_template(self):
+        """Apply a template to the selected layers, or to all layers, with matching fields"""
+        names = self.templates.names()
+        if not names:
+            iface.messageBar().pushMessage(
+                "Error", "No style templates saved yet!", 
+                level=Qgis.Critical, duration=5
+            )
+            return
+        
+        settings = QSettings()
+        last = settings.value("QuickStyle/template", "")
+        with profiler.waiting():
+            name, ok = QInputDialog.getItem(self.iface.mainWindow(), "Apply Style Template", "Template:",
+                                            names, names.index(last) if last in names else 0, False)
+        if not ok:
+            return
+        settings.setValue("QuickStyle/template", name)
+        
+        layers = [layer for layer in iface.layerTreeView().selectedLayers() if isinstance(layer, QgsVectorLayer)]
+        if not layers:
+            layers = [layer for layer in QgsProject.instance().mapLayers().values()
+                      if isinstance(layer, QgsVectorLayer)]
+        
+        # Prototypes are cloned, no layer data is read
+        try:
+            with profiler.phase("apply") as phase:
+                styled = self.templates.apply(name, layers)
+                phase.count(len(styled))
+        except (IOError, OSError) as e:
+            iface.messageBar().pushMessage(
+                "Error", f"Failed to apply template: {str(e)}", 
+                level=Qgis.Critical, duration=5
+            )
+            return
+        
+        with profiler.phase("refresh"):
+            for layer in styled:
+                layer.triggerRepaint()
+                iface.layerTreeView().refreshLayerSymbology(layer.id())
+        
+        if styled:
+            iface.messageBar().pushMessage(
+                "Success", f"Template '{name}' applied to {len(styled)} of {len(layers)} layers", 
+                level=Qgis.Success, duration=5
+            )
+        else:
+            iface.messageBar().pushMessage(
+                "Warning", f"No layer has the fields and geometry type of template '{name}'", 
+                level=Qgis.Warning, duration=5
+            )
+
+    @profiler.tool("delete_template")
+    def delete_style_template(self):
+        """Remove a stored template after confirmation"""
+        names = self.templates.names()
+        if not names:
+            iface.messageBar().pushMessage(
+                "Error", "No style templates saved yet!", 
+                level=Qgis.Critical, duration=5
+            )
+            return
+        
+        with profiler.waiting():
+            name, ok = QInputDialog.getItem(self.iface.mainWindow(), "Delete Style Template", "Template:",
+                                            names, 0, False)
+            if not ok:
+                return
+            answer = QMessageBox.question(
+                self.iface.mainWindow(),
+                "Delete Style Template",
+                f"Delete template '{name}'? Layers styled with it keep their style."
+            )
+        if answer != QMessageBox.Yes:
+            return
+        
+        try:
+            self.templates.delete(name)
+        except OSError as e:
+            iface.messageBar().pushMessage(
+                "Error", f"Failed to delete template: {str(e)}", 
+                level=Qgis.Critical, duration=5
+            )
+            return
+        iface.messageBar().pushMessage(
+            "Success", f"Template '{name}' deleted", 
+            level=Qgis.Success, duration=3
+        )
+
     # Tool 1: CRS Methods
+    @profiler.tool("set_crs")
     def set_predefined_crs(self, epsg_code):
         """Set predefined CRS for the selected layer"""
         layer = self.get_active_layer()
@@ -286,10 +838,12 @@ class QuickStyle:
                 return
             
             # Set CRS
-            layer.setCrs(crs)
+            with profiler.phase("apply"):
+                layer.setCrs(crs)
             
             # Refresh map
-            iface.mapCanvas().refresh()
+            with profiler.phase("refresh"):
+                iface.mapCanvas().refresh()
             
             # Show success message with layer type
             layer_type = "vector" if isinstance(layer, QgsVectorLayer) else "raster"
@@ -304,6 +858,7 @@ class QuickStyle:
                 level=Qgis.Critical, duration=5
             )
 
+    @profiler.tool("choose_crs")
     def choose_other_crs(self):
         """Open CRS selection dialog"""
         layer = self.get_active_layer()
@@ -315,14 +870,18 @@ class QuickStyle:
             crs_dialog = QgsProjectionSelectionDialog(self.iface.mainWindow())
             crs_dialog.setCrs(layer.crs())
             
-            if crs_dialog.exec():
+            with profiler.waiting():
+                accepted = crs_dialog.exec()
+            if accepted:
                 selected_crs = crs_dialog.crs()
                 if selected_crs.isValid():
                     # Set CRS
-                    layer.setCrs(selected_crs)
+                    with profiler.phase("apply"):
+                        layer.setCrs(selected_crs)
                     
                     # Refresh map
-                    iface.mapCanvas().refresh()
+                    with profiler.phase("refresh"):
+                        iface.mapCanvas().refresh()
                     
                     # Show success message with layer type
                     layer_type = "vector" if isinstance(layer, QgsVectorLayer) else "raster"
@@ -338,6 +897,7 @@ class QuickStyle:
             )
 
     # Tool 2: Add Field Methods
+    @profiler.tool("add_field")
     def add_field(self):
         """Add field to the selected layer with custom dialog"""
         layer = self.get_active_vector_layer()
@@ -441,9 +1001,13 @@ class QuickStyle:
             if not layer.isEditable():
                 layer.startEditing()
             
-            if layer.addAttribute(field):
+            with profiler.phase("apply"):
+                added = layer.addAttribute(field)
                 # Auto-save changes
-                if layer.commitChanges():
+                committed = added and layer.commitChanges()
+            
+            if added:
+                if committed:
                     # Re-enable editing mode to keep it active
                     layer.startEditing()
                     iface.messageBar().pushMessage(
@@ -472,16 +1036,26 @@ class QuickStyle:
         cancel_button.clicked.connect(on_cancel)
         
         # Show dialog
-        dialog.exec()
+        with profiler.waiting():
+            dialog.exec()
 
     # Tool 3: Open Attribute Table
+    @profiler.tool("open_attribute_table")
     def open_attribute_table(self):
         """Open attribute table for the selected layer"""
         layer = self.get_active_vector_layer()
         if not layer:
             return
         
+        profiler.annotate(layer=layer.name())
         try:
+            # Huge layers open in the paged read-only viewer, 0 disables it
+            threshold = int(QSettings().value("QuickStyle/fastTableThreshold", 1000000))
+            if threshold and layer.featureCount() >= threshold:
+                dialog = AttributeTableDialog(layer, parent=iface.mainWindow())
+                dialog.show()
+                return
+            
             # Use QGIS native functionality to open attribute table
             iface.showAttributeTable(layer)
             
@@ -492,6 +1066,7 @@ class QuickStyle:
             )
 
     # Tool 4: Show Selected Features
+    @profiler.tool("show_selected_features")
     def show_selected_features(self):
         """Show selected features in attribute table"""
         layer = self.get_active_vector_layer()
@@ -508,11 +1083,15 @@ class QuickStyle:
                 )
                 return
             
-            # Use QGIS native functionality with Shift+F6 shortcut
-            main_window = iface.mainWindow()
-            
-            # Send Shift+F6 shortcut to show selected features in attribute table
-            QTest.keyClick(main_window, Qt.Key_F6, Qt.ShiftModifier)
+            # Read only the selected features by id instead of filtering the full table
+            profiler.annotate(layer=layer.name(), selected=selected_count)
+            dialog = AttributeTableDialog(
+                layer,
+                fids=layer.selectedFeatureIds(),
+                title=f"Selected Features - {layer.name()}",
+                parent=iface.mainWindow()
+            )
+            dialog.show()
             
         except Exception as e:
             iface.messageBar().pushMessage(
@@ -520,7 +1099,21 @@ class QuickStyle:
                 level=Qgis.Critical, duration=5
             )
 
+    @profiler.tool("selection_summary")
+    def show_selection_summary(self):
+        """Show the dock summarizing the selection of the active layer"""
+        if self.summary_dock is None:
+            self.summary_dock = SelectionSummaryDock(self.iface.mainWindow())
+            self.iface.addDockWidget(Qt.RightDockWidgetArea, self.summary_dock)
+            # Follow the active layer while the dock exists
+            self.iface.currentLayerChanged.connect(self.summary_dock.bind)
+        
+        self.summary_dock.bind(iface.activeLayer())
+        self.summary_dock.show()
+        self.summary_dock.raise_()
+
     # Tool 5: Symbology Methods - UPDATED
+    @profiler.tool("symbology")
     def run_symbology(self):
         """Run the new SVG-based symbology dialog"""
         layer = self.iface.activeLayer()
@@ -533,13 +1126,26 @@ class QuickStyle:
             )
             return
             
-        # Create and show the NEW symbology dialog
-        dialog = SymbologyDialog(layer, self.iface.mainWindow())
+        profiler.annotate(layer=layer.name())
+        
+        # One dialog per geometry type, built on first use
+        with profiler.phase("build"):
+            dialog = self.symbology_dialogs.get(layer.geometryType())
+            if dialog is None:
+                dialog = SymbologyDialog(layer, self.iface.mainWindow())
+                self.symbology_dialogs[layer.geometryType()] = dialog
+            else:
+                dialog.bind(layer)
+        profiler.first_paint(dialog)
         
         # Run the dialog event loop
-        if dialog.exec_() == QDialog.Accepted:
+        with profiler.waiting():
+            accepted = dialog.exec_() == QDialog.Accepted
+        if accepted:
             # Apply symbology if user clicked OK
-            if dialog.apply_symbology():
+            with profiler.phase("apply"):
+                applied = dialog.apply_symbology()
+            if applied:
                 dialog.save_settings()
                 # Show success message
                 self.iface.messageBar().pushMessage(
@@ -550,6 +1156,7 @@ class QuickStyle:
                 )
 
     # Tool 6: Labeling Methods
+    @profiler.tool("labeling")
     def run_labeling(self):
         """Run labeling dialog"""
         # Check if there's an active layer
@@ -562,20 +1169,96 @@ class QuickStyle:
             )
             return
             
-        # Open dialog
-        dialog = LabelingDialog(active_layer, self)
-        dialog.exec_()
+        profiler.annotate(layer=active_layer.name())
+        
+        # Open dialog, built on first use
+        with profiler.phase("build"):
+            if self.labeling_dialog is None:
+                self.labeling_dialog = LabelingDialog(active_layer, self, self.iface.mainWindow())
+            else:
+                self.labeling_dialog.bind(active_layer)
+        profiler.first_paint(self.labeling_dialog)
+        with profiler.waiting():
+            self.labeling_dialog.exec_()
 
     # Tool 7: Categorize Methods
+    @profiler.tool("categorize")
     def run_categorize(self):
         """Run categorization dialog"""
         layer = self.iface.activeLayer()
         if not layer or not layer.isValid():
             return
 
-        dlg = QDialog()
+        # The dialog is built once, only the field buttons are rebuilt
+        with profiler.phase("build"):
+            if self.categorize_dialog is None:
+                self.categorize_dialog = self.create_categorize_dialog()
+        dlg = self.categorize_dialog
+        
+        widget = QWidget()
+        grid = QGridLayout(widget)
+        grid.setSpacing(15)
+        grid.setContentsMargins(25, 15, 25, 15)
+        
+        profiler.annotate(layer=layer.name())
+        
+        # Get fields with unique value counts and filter them
+        fields = []
+        many_value_fields = []
+        with profiler.phase("scan") as phase:
+            # Approximate counts come from cached HyperLogLog sketches, the
+            # exact values are only read for the field that gets clicked
+            if QSettings().value("Categorize/approximateCounts", True, type=bool):
+                counts = field_cardinalities(layer)
+            else:
+                counts = [(name, count, True) for name, count in field_unique_counts(layer)]
+            
+            for field_name, unique_count, exact in counts:
+                phase.count(unique_count)
+                count_text = str(unique_count) if exact else f"~{unique_count}"
+                # Apply filtering conditions
+                if 1 < unique_count <= 30:
+                    fields.append((field_name, count_text))
+                elif unique_count > 30:
+                    many_value_fields.append((field_name, count_text))
+        
+        if not fields and not many_value_fields:
+            no_fields_label = QLabel("No suitable fields found (need at least 2 unique values)")
+            no_fields_label.setAlignment(Qt.AlignCenter)
+            grid.addWidget(no_fields_label, 0, 0)
+        else:
+            row = self.add_field_buttons(
+                grid, 0, fields, lambda f: self.apply_categorization(layer, f, dlg))
+            
+            # Long-tail fields keep their most frequent values plus "Other"
+            if many_value_fields:
+                top_n_layout = QHBoxLayout()
+                top_n_label = QLabel("Fields with more than 30 values, categorize the most frequent:")
+                top_n_label.setFont(QFont("Arial", 10, QFont.Bold))
+                top_n_spin = QSpinBox()
+                top_n_spin.setMinimum(2)
+                top_n_spin.setMaximum(100)
+                top_n_spin.setValue(int(QSettings().value("Categorize/topN", 10)))
+                top_n_layout.addWidget(top_n_label)
+                top_n_layout.addWidget(top_n_spin)
+                top_n_layout.addStretch()
+                grid.addLayout(top_n_layout, row, 0, 1, 5)
+                
+                self.add_field_buttons(
+                    grid, row + 1, many_value_fields,
+                    lambda f: self.apply_top_n_categorization(layer, f, top_n_spin.value(), dlg))
+        
+        dlg.scroll.setWidget(widget)
+        profiler.first_paint(dlg)
+        with profiler.waiting():
+            dlg.exec_()
+
+    def create_categorize_dialog(self):
+        """Build the categorize dialog frame, the field grid is set per layer"""
+        dlg = QDialog(self.iface.mainWindow())
         dlg.setWindowTitle("Select Field for Categorization")
         dlg.setFixedSize(850, 400)
+        dlg.setStyleSheet(CATEGORIZE_STYLE)
         
         palette = QPalette()
         palette.setColor(QPalette.Window, QColor(245, 245, 245))
@@ -585,109 +1268,112 @@ class QuickStyle:
         title = QLabel("Click a field to categorize:")
         title.setFont(QFont("Arial", 12, QFont.Bold))
         title.setAlignment(Qt.AlignCenter)
-        title.setStyleSheet("padding: 10px;")
+        title.setProperty('role', 'title')
         layout.addWidget(title)
         
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        widget = QWidget()
-        grid = QGridLayout(widget)
-        grid.setSpacing(15)
-        grid.setContentsMargins(25, 15, 25, 15)
-        
-        # Get fields with unique value counts and filter them
-        fields = []
-        for field in layer.fields():
-            unique_values = layer.uniqueValues(layer.fields().lookupField(field.name()))
-            unique_count = len(unique_values)
-            # Apply filtering conditions
-            if 1 < unique_count <= 30:
-                fields.append((field.name(), unique_count))
-        
-        if not fields:
-            no_fields_label = QLabel("No suitable fields found (need 2-30 unique values)")
-            no_fields_label.setAlignment(Qt.AlignCenter)
-            layout.addWidget(no_fields_label)
-        else:
-            row, col = 0, 0
-            for i, (field_name, count) in enumerate(fields):
-                btn = QPushButton(f"{field_name} ({count})")
-                btn.setMinimumSize(150, 45)
-                btn.setFont(QFont("Arial", 10))
-                
-                bg_color = '#f8f8f8' if i % 2 == 0 else '#f0f0f0'
-                btn.setStyleSheet(f"""
-                    QPushButton {{
-                        background: {bg_color};
-                        border: 1px solid #ddd;
-                        border-radius: 6px;
-                        padding: 8px;
-                    }}
-                    QPushButton:hover {{
-                        background: #e0e0e0;
-                    }}
-                """)
-                
-                btn.clicked.connect(lambda _, f=field_name: self.apply_categorization(layer, f, dlg))
-                grid.addWidget(btn, row, col)
-                col += 1
-                if col >= 5:  # 5 columns
-                    col = 0
-                    row += 1
-        
-        scroll.setWidget(widget)
-        layout.addWidget(scroll)
+        dlg.scroll = QScrollArea()
+        dlg.scroll.setWidgetResizable(True)
+        layout.addWidget(dlg.scroll)
         dlg.setLayout(layout)
-        dlg.exec_()
+        return dlg
+
+    def add_field_buttons(self, grid, row, fields, callback):
+        """Add one button per field to the grid, returning the next free row"""
+        col = 0
+        for i, (field_name, count) in enumerate(fields):
+            btn = QPushButton(f"{field_name} ({count})")
+            btn.setMinimumSize(150, 45)
+            btn.setFont(QFont("Arial", 10))
+            
+            # Styled by the dialog style sheet, alternating backgrounds
+            btn.setProperty('role', 'field')
+            btn.setProperty('alternate', i % 2 == 1)
+            
+            btn.clicked.connect(lambda _, f=field_name: callback(f))
+            grid.addWidget(btn, row, col)
+            col += 1
+            if col >= 5:  # 5 columns
+                col = 0
+                row += 1
+        return row + 1 if col else row
 
     def apply_categorization(self, layer, field_name, dlg):
         """Apply categorization to layer"""
         dlg.close()
 
-        unique_values = sorted(layer.uniqueValues(layer.fields().lookupField(field_name)))
+        # Count every value in the same pass, the legend reuses the counts
+        rect = self.scan_rect(layer)
+        with profiler.phase("scan") as phase:
+            combinations = count_combinations(layer, [field_name], rect_request(rect))
+            counts = {key[0]: count for key, count in combinations.items()}
+            unique_values = sorted(counts, key=lambda value: (value is None, value))
+            phase.count(sum(counts.values()))
 
-        if layer.geometryType() == 0:  # Point
-            symbol = QgsMarkerSymbol.createSimple({'name': 'diamond', 'size': '4.4'})
-        elif layer.geometryType() == 1:  # Line
-            symbol = QgsLineSymbol.createSimple({'width': '1.0'})
-        else:  # Polygon
-            # Create QgsFillSymbol with outline-only configuration
-            symbol = QgsFillSymbol()
-            # Remove default fill layer and add simple line layer for outline
-            symbol.deleteSymbolLayer(0)  # Remove default simple fill layer
-            line_layer = QgsSimpleLineSymbolLayer(QColor('#000000'), 1.0)
-            symbol.appendSymbolLayer(line_layer)
+        with profiler.phase("build"):
+            categories = build_categories(layer.geometryType(), unique_values, self.colors)
+            if rect is not None:
+                # Values outside the extent fall into "Other"
+                other_symbol = category_symbol(layer.geometryType(), OTHER_COLOR)
+                categories.append(QgsRendererCategory('', other_symbol, "Other"))
 
-        categories = []
-        for i, value in enumerate(unique_values):
-            cat_symbol = symbol.clone()
-            if layer.geometryType() == 2:  # For polygons
-                cat_symbol.symbolLayer(0).setColor(QColor(self.colors[i % len(self.colors)]))
-            else:
-                cat_symbol.setColor(QColor(self.colors[i % len(self.colors)]))
-            category = QgsRendererCategory(value, cat_symbol, str(value))
-            categories.append(category)
+        renderer = self.large_point_renderer(layer, QgsCategorizedSymbolRenderer(field_name, categories))
+        with profiler.phase("apply"):
+            layer.setRenderer(renderer)
+        self.watch_categories(layer)
+        
+        if rect is None:
+            # Show feature counts from the scan instead of a second counting pass
+            self.legend_counts.apply(layer, counts)
+        else:
+            # The scan only counted the visible features
+            set_native_counts(layer, True)
+        
+        # Force refresh
+        with profiler.phase("refresh"):
+            layer.triggerRepaint()
+            iface.layerTreeView().refreshLayerSymbology(layer.id())
+            iface.mapCanvas().refreshAllLayers()
 
-        layer.setRenderer(QgsCategorizedSymbolRenderer(field_name, categories))
+    def apply_top_n_categorization(self, layer, field_name, top_n, dlg):
+        """Categorize the most frequent values of a field plus an "Other" category"""
+        dlg.close()
+        QSettings().setValue("Categorize/topN", top_n)
+        
+        # One bounded-memory pass finds the most frequent values
+        with profiler.phase("scan") as phase:
+            top = top_values(layer, field_name, top_n)
+            phase.count(len(top))
+        
+        with profiler.phase("build"):
+            values = sorted(value for value, count in top)
+            categories = build_categories(layer.geometryType(), values, self.colors)
+            # An empty value is the renderer's "all other values" category
+            other_symbol = category_symbol(layer.geometryType(), OTHER_COLOR)
+            categories.append(QgsRendererCategory('', other_symbol, "Other"))
+        
+        renderer = self.large_point_renderer(layer, QgsCategorizedSymbolRenderer(field_name, categories))
+        with profiler.phase("apply"):
+            layer.setRenderer(renderer)
         
-        # Enable feature counts through layer tree
-        root = QgsProject.instance().layerTreeRoot()
-        layer_tree_layer = root.findLayer(layer)
-        if layer_tree_layer:
-            layer_tree_layer.setCustomProperty("showFeatureCount", True)
+        # Enable feature counts through layer tree, the sketch counts are estimates
+        set_native_counts(layer, True)
         
         # Force refresh
-        layer.triggerRepaint()
-        iface.layerTreeView().refreshLayerSymbology(layer.id())
-        iface.mapCanvas().refreshAllLayers()
+        with profiler.phase("refresh"):
+            layer.triggerRepaint()
+            iface.layerTreeView().refreshLayerSymbology(layer.id())
+            iface.mapCanvas().refreshAllLayers()
 
     # Tool 8: Rule-Based Methods
+    @profiler.tool("rule_based_categorize")
     def run_rule_based(self):
         """Run rule-based categorization dialog"""
         layer = self.iface.activeLayer()
         if not layer or not isinstance(layer, QgsVectorLayer):
             return
 
+        profiler.annotate(layer=layer.name())
+        
         # Load saved field selections
         settings = QSettings()
         last_fields = {
@@ -696,7 +1382,42 @@ class QuickStyle:
             'field3': settings.value("RuleBasedCategorization/field3", "(Optional)")
         }
 
-        dlg = QDialog()
+        # The dialog is built once, the combos are refilled per layer
+        with profiler.phase("build"):
+            if self.rule_based_dialog is None:
+                self.rule_based_dialog = self.create_rule_based_dialog()
+        dlg = self.rule_based_dialog
+        self.rule_based_layer = layer
+        
+        fields = [field.name() for field in layer.fields()]
+        
+        # Populate combos and set saved selections, counting once afterwards
+        for combo, field_name in zip(
+            [self.field1_combo, self.field2_combo, self.field3_combo],
+            ['field1', 'field2', 'field3']
+        ):
+            combo.blockSignals(True)
+            combo.clear()
+            if combo == self.field3_combo:
+                combo.addItem("(Optional)")
+            combo.addItems(fields)
+            if last_fields[field_name] in fields:
+                combo.setCurrentText(last_fields[field_name])
+            elif combo == self.field3_combo:
+                combo.setCurrentText("(Optional)")
+            combo.blockSignals(False)
+        
+        output_index = self.rule_output_combo.findData(settings.value("RuleBasedCategorization/output", "categorized"))
+        self.rule_output_combo.setCurrentIndex(max(0, output_index))
+        
+        profiler.first_paint(dlg)
+        self.update_rule_based_results(layer)
+        with profiler.waiting():
+            dlg.exec_()
+
+    def create_rule_based_dialog(self):
+        """Build the rule-based categorization dialog for the layer set on open"""
+        dlg = QDialog(self.iface.mainWindow())
         dlg.setWindowTitle("Rule-Based Categorization")
         dlg.setMinimumSize(600, 400)
         dlg.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
@@ -713,20 +1434,6 @@ class QuickStyle:
         self.field1_combo = QComboBox()
         self.field2_combo = QComboBox()
         self.field3_combo = QComboBox()
-        self.field3_combo.addItem("(Optional)")
-        
-        fields = [field.name() for field in layer.fields()]
-        
-        # Populate combos and set saved selections
-        for combo, field_name in zip(
-            [self.field1_combo, self.field2_combo, self.field3_combo],
-            ['field1', 'field2', 'field3']
-        ):
-            combo.addItems(fields)
-            if last_fields[field_name] in fields:
-                combo.setCurrentText(last_fields[field_name])
-            elif combo == self.field3_combo:
-                combo.setCurrentText("(Optional)")
         
         field_layout.addWidget(QLabel("Field 1:"))
         field_layout.addWidget(self.field1_combo)
@@ -735,6 +1442,16 @@ class QuickStyle:
         field_layout.addWidget(QLabel("Field 3:"))
         field_layout.addWidget(self.field3_combo)
         
+        # Renderer to create, filter rules can be compiled by the provider
+        output_layout = QHBoxLayout()
+        self.rule_output_combo = QComboBox()
+        self.rule_output_combo.addItem("Categorized (expression)", "categorized")
+        self.rule_output_combo.addItem("Rule-based (filters)", "rules")
+        self.rule_output_combo.addItem("Rule-based grouped by Field 1", "grouped")
+        output_layout.addWidget(QLabel("Output:"))
+        output_layout.addWidget(self.rule_output_combo)
+        output_layout.addStretch()
+        
         # Results table
         self.results_table = QTableWidget()
         self.results_table.setColumnCount(2)
@@ -742,21 +1459,33 @@ class QuickStyle:
         self.results_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
         self.results_table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         
+        # Whether the counts are estimates or exact
+        self.results_status = QLabel()
+        
+        # The combinations drawn on the features in the map extent
+        self.rule_preview = PreviewPane(dlg)
+        
         # Apply button
         btn_apply = QPushButton("Apply Categorization")
-        btn_apply.clicked.connect(lambda: self.apply_rule_based_categorization(layer, dlg))
+        btn_apply.clicked.connect(lambda: self.apply_rule_based_categorization(self.rule_based_layer, dlg))
+        self.rule_apply_button = btn_apply
         
         # Connect signals
         for combo in [self.field1_combo, self.field2_combo, self.field3_combo]:
-            combo.currentTextChanged.connect(lambda: self.update_rule_based_results(layer))
+            combo.currentTextChanged.connect(lambda: self.update_rule_based_results(self.rule_based_layer))
+        dlg.finished.connect(self.cancel_rule_based_count)
+        dlg.finished.connect(lambda: self.set_rule_based_apply_pending(False))
+        dlg.finished.connect(self.rule_preview.clear_sample)
         
         layout.addLayout(field_layout)
+        layout.addLayout(output_layout)
         layout.addWidget(self.results_table)
+        layout.addWidget(self.results_status)
+        layout.addWidget(self.rule_preview, 0, Qt.AlignCenter)
         layout.addWidget(btn_apply)
         
         dlg.setLayout(layout)
-        self.update_rule_based_results(layer)
-        dlg.exec_()
+        return dlg
 
     def update_rule_based_results(self, layer):
         """Update results table for rule-based categorization"""
@@ -768,16 +1497,94 @@ class QuickStyle:
         if field3 != "(Optional)":
             fields.append(field3)
         
-        combinations = {}
-        for feature in layer.getFeatures():
-            values = [str(feature[field]) if feature[field] is not None else "NULL" for field in fields]
-            combo = " + ".join(values)
-            combinations[combo] = combinations.get(combo, 0) + 1
+        # Show estimates from a sample right away, count exactly in the background
+        self.cancel_rule_based_count()
+        self.set_rule_based_apply_pending(False)
+        self.rule_based_fields = fields
+        self.rule_based_rect = self.scan_rect(layer)
+        sample_size = int(QSettings().value("RuleBasedCategorization/sampleSize", 2000))
+        with profiler.phase("scan") as phase:
+            combinations, estimated = sample_combinations(layer, fields, sample_size, self.rule_based_rect)
+            phase.count(sum(combinations.values()))
+        self.show_rule_based_results(combinations, estimated)
+        
+        if estimated:
+            self.start_rule_based_count(layer, fields)
+
+    def start_rule_based_count(self, layer, fields):
+        """Count the combinations exactly in a background task"""
+        task = CombinationCountTask(
+            layer, fields, lambda combinations: self.finish_rule_based_count(task, combinations),
+            self.rule_based_rect)
+        self.rule_based_task = task
+        QgsApplication.taskManager().addTask(task)
+
+    def show_rule_based_results(self, combinations, estimated):
+        """Fill the results table, marking estimated counts with ~"""
+        # Spilled counts stay on disk and are read row by row, labels are built as they are shown
+        self.rule_based_combinations = combinations
+        self.rule_based_estimated = estimated
+        
+        with profiler.phase("table") as phase:
+            self.results_table.setRowCount(len(combinations))
+            for row, (values, count) in enumerate(combinations.items()):
+                self.results_table.setItem(row, 0, QTableWidgetItem(combination_label(values)))
+                self.results_table.setItem(row, 1, QTableWidgetItem(f"~{count}" if estimated else str(count)))
+            phase.count(self.results_table.rowCount())
+        
+        if estimated and self.rule_based_rect is not None:
+            self.results_status.setText("First visible features only, counting all visible features...")
+        elif estimated:
+            self.results_status.setText("Estimated from a sample, counting all features...")
+        elif self.rule_based_rect is not None:
+            self.results_status.setText("Features in the visible extent")
+        else:
+            self.results_status.setText("")
+        
+        self.preview_rule_based()
+
+    def preview_rule_based(self):
+        """Render the counted combinations in the preview pane"""
+        layer = self.rule_based_layer
+        categories = []
+        for i, values in enumerate(self.rule_based_combinations):
+            label = combination_label(values)
+            symbol = category_symbol(layer.geometryType(), self.colors[i % len(self.colors)])
+            categories.append(QgsRendererCategory(label, symbol, label))
+        renderer = QgsCategorizedSymbolRenderer(combination_expression(self.rule_based_fields), categories)
+        self.rule_preview.request(layer, renderer)
+
+    def finish_rule_based_count(self, task, combinations):
+        """Replace the estimates once the background count is done"""
+        if task is not self.rule_based_task:
+            return
+        self.rule_based_task = None
+        if combinations is None:
+            self.set_rule_based_apply_pending(False)
+            self.results_status.setText("Counting all features failed")
+            return
+        self.show_rule_based_results(combinations, False)
         
-        self.results_table.setRowCount(len(combinations))
-        for row, (combo, count) in enumerate(combinations.items()):
-            self.results_table.setItem(row, 0, QTableWidgetItem(combo))
-            self.results_table.setItem(row, 1, QTableWidgetItem(str(count)))
+        if self.rule_based_apply_pending:
+            self.set_rule_based_apply_pending(False)
+            self.apply_rule_based_categorization(self.rule_based_layer, self.rule_based_dialog)
+
+    def set_rule_based_apply_pending(self, pending):
+        """Apply the categorization once the exact counts arrive, instead of waiting for them"""
+        self.rule_based_apply_pending = pending
+        self.rule_apply_button.setEnabled(not pending)
+        if pending:
+            self.results_status.setText("Counting all features, the categorization is applied when done...")
+
+    def cancel_rule_based_count(self):
+        """Stop the background count of the previous field selection"""
+        task, self.rule_based_task = self.rule_based_task, None
+        if task is not None:
+            try:
+                task.cancel()
+            except RuntimeError:
+                # The task already ended and was deleted
+                pass
 
     def apply_rule_based_categorization(self, layer, dlg):
         """Apply rule-based categorization"""
@@ -795,55 +1602,162 @@ class QuickStyle:
         if field3 != "(Optional)":
             fields.append(field3)
         
-        categories = []
-        for i in range(self.results_table.rowCount()):
-            combo = self.results_table.item(i, 0).text()
-            count = int(self.results_table.item(i, 1).text())
+        # Categories from a sample would miss rare combinations, apply once the exact count is in
+        if self.rule_based_estimated:
+            if self.rule_based_task is None:
+                self.start_rule_based_count(layer, fields)
+            self.set_rule_based_apply_pending(True)
+            return
+        
+        output = self.rule_output_combo.currentData()
+        settings.setValue("RuleBasedCategorization/output", output)
+        if output in ("rules", "grouped"):
+            # One equality filter per combination, no per-feature string building
+            with profiler.phase("build") as phase:
+                renderer = build_rule_based_renderer(
+                    layer.geometryType(), fields, list(self.rule_based_combinations), self.colors,
+                    group=output == "grouped", other=self.rule_based_rect is not None)
+                phase.count(len(self.rule_based_combinations))
             
-            if layer.geometryType() == 0:  # Point
-                symbol = QgsMarkerSymbol.createSimple({'name': 'diamond', 'size': '4.4'})
-            elif layer.geometryType() == 1:  # Line
-                symbol = QgsLineSymbol.createSimple({'width': '1.0'})
-            else:  # Polygon
-                # Create QgsFillSymbol with outline-only configuration
-                symbol = QgsFillSymbol()
-                # Remove default fill layer and add simple line layer for outline
-                symbol.deleteSymbolLayer(0)  # Remove default simple fill layer
-                line_layer = QgsSimpleLineSymbolLayer(QColor('#000000'), 1.0)
-                symbol.appendSymbolLayer(line_layer)
+            renderer = self.large_point_renderer(layer, renderer)
+            with profiler.phase("apply"):
+                layer.setRenderer(renderer)
             
-            color = QColor(self.colors[i % len(self.colors)])
-            if layer.geometryType() == 2:
-                symbol.symbolLayer(0).setColor(color)
-            else:
-                symbol.setColor(color)
+            # Rules are counted by the layer tree
+            set_native_counts(layer, True)
+        else:
+            with profiler.phase("build") as phase:
+                categories = []
+                counts = {}
+                for i, (values, count) in enumerate(self.rule_based_combinations.items()):
+                    combo = combination_label(values)
+                    counts[combo] = count
+                    symbol = category_symbol(layer.geometryType(), self.colors[i % len(self.colors)])
+                
+                    # Use clean combo text without counts
+                    combo_text = combo.split(' [')[0].strip()
+                    categories.append(QgsRendererCategory(combo, symbol, combo_text))
+                if self.rule_based_rect is not None:
+                    # Combinations outside the extent fall into "Other"
+                    other_symbol = category_symbol(layer.geometryType(), OTHER_COLOR)
+                    categories.append(QgsRendererCategory('', other_symbol, "Other"))
+                phase.count(len(categories))
+            
+            # Create and set renderer
+            renderer = self.large_point_renderer(
+                layer, QgsCategorizedSymbolRenderer(combination_expression(fields), categories))
+            with profiler.phase("apply"):
+                layer.setRenderer(renderer)
+            self.watch_categories(layer)
             
-            # Use clean combo text without counts
-            combo_text = combo.split(' [')[0].strip()
-            categories.append(QgsRendererCategory(combo, symbol, combo_text))
-        
-        # Create expression with proper field quoting
-        expression = "concat(" + ", ' + ', ".join([f'coalesce(to_string("{field}"), \'NULL\')' for field in fields]) + ")"
-        
-        # Create and set renderer
-        renderer = QgsCategorizedSymbolRenderer(expression, categories)
-        layer.setRenderer(renderer)
-        
-        # Configure feature count display
-        layer_tree_layer = QgsProject.instance().layerTreeRoot().findLayer(layer.id())
-        if layer_tree_layer:
-            layer_tree_layer.setCustomProperty("showFeatureCount", True)
-            # Force refresh by toggling visibility
-            was_visible = layer_tree_layer.isVisible()
-            layer_tree_layer.setItemVisibilityChecked(False)
-            layer_tree_layer.setItemVisibilityChecked(True)
-            if not was_visible:
-                layer_tree_layer.setItemVisibilityChecked(False)
+            # Configure feature count display with the counts already in the table
+            if self.rule_based_rect is None:
+                self.legend_counts.apply(layer, counts)
+            else:
+                set_native_counts(layer, True)
         
         # Refresh everything
-        layer.triggerRepaint()
-        iface.layerTreeView().refreshLayerSymbology(layer.id())
-        iface.mapCanvas().refreshAllLayers()
+        with profiler.phase("refresh"):
+            layer.triggerRepaint()
+            iface.layerTreeView().refreshLayerSymbology(layer.id())
+            iface.mapCanvas().refreshAllLayers()
+        
+        dlg.close()
+
+
+    # Tool 9: Graduate Methods
+    @profiler.tool("graduate")
+    def run_graduate(self):
+        """Run graduated classification dialog"""
+        layer = self.iface.activeLayer()
+        if not layer or not isinstance(layer, QgsVectorLayer):
+            return
+        
+        numeric_fields = [field.name() for field in layer.fields() if field.isNumeric()]
+        if not numeric_fields:
+            iface.messageBar().pushMessage(
+                "Error", "The layer has no numeric fields!", 
+                level=Qgis.Critical, duration=5
+            )
+            return
+        profiler.annotate(layer=layer.name())
+        
+        # Load saved selections
+        settings = QSettings()
+        
+        dlg = QDialog()
+        dlg.setWindowTitle("Graduate Layer")
+        dlg.setMinimumWidth(350)
+        
+        palette = QPalette()
+        palette.setColor(QPalette.Window, QColor(245, 245, 245))
+        dlg.setPalette(palette)
+        
+        layout = QVBoxLayout()
+        form_layout = QFormLayout()
+        
+        field_combo = QComboBox()
+        field_combo.addItems(numeric_fields)
+        saved_field = settings.value("Graduate/field", "")
+        if saved_field in numeric_fields:
+            field_combo.setCurrentText(saved_field)
+        form_layout.addRow("Field:", field_combo)
+        
+        method_combo = QComboBox()
+        method_combo.addItems(METHODS)
+        method_combo.setCurrentText(settings.value("Graduate/method", "Quantile"))
+        form_layout.addRow("Method:", method_combo)
+        
+        classes_spin = QSpinBox()
+        classes_spin.setMinimum(2)
+        classes_spin.setMaximum(len(self.colors))
+        classes_spin.setValue(int(settings.value("Graduate/classes", 5)))
+        form_layout.addRow("Classes:", classes_spin)
+        
+        layout.addLayout(form_layout)
+        
+        btn_apply = QPushButton("Apply Graduation")
+        btn_apply.clicked.connect(lambda: self.apply_graduation(
+            layer, field_combo.currentText(), method_combo.currentText(), classes_spin.value(), dlg))
+        layout.addWidget(btn_apply)
+        
+        dlg.setLayout(layout)
+        with profiler.waiting():
+            dlg.exec_()
+
+    def apply_graduation(self, layer, field_name, method, classes, dlg):
+        """Apply graduated classification to layer"""
+        # Save current selections
+        settings = QSettings()
+        settings.setValue("Graduate/field", field_name)
+        settings.setValue("Graduate/method", method)
+        settings.setValue("Graduate/classes", classes)
+        
+        # Read the column once, huge layers are sampled
+        with profiler.phase("scan") as phase:
+            values = numeric_values(layer, field_name)
+            phase.count(len(values))
+        
+        if len(values) == 0:
+            iface.messageBar().pushMessage(
+                "Error", f"Field '{field_name}' has no values!", 
+                level=Qgis.Critical, duration=5
+            )
+            return
+        
+        with profiler.phase("build"):
+            breaks = class_breaks(values, method, classes)
+            renderer = build_graduated_renderer(
+                field_name, layer.geometryType(), values, breaks, self.colors)
+        
+        with profiler.phase("apply"):
+            layer.setRenderer(renderer)
+        
+        # Force refresh
+        with profiler.phase("refresh"):
+            layer.triggerRepaint()
+            iface.layerTreeView().refreshLayerSymbology(layer.id())
+            iface.mapCanvas().refreshAllLayers()
         
         dlg.close()
 
@@ -856,7 +1770,7 @@ class SymbologyDialog(QDialog):
         super().__init__(parent)
         self.layer = layer
         self.geometry_type = layer.geometryType()
-        self.svg_folder = os.path.join(os.path.dirname(__file__), 'svg')
+        self.svg_folder = SVG_FOLDER
         
         # Color palette
         self.colors = [
@@ -866,11 +1780,7 @@ class SymbologyDialog(QDialog):
         ]
         
         # SVG marker shapes for points
-        self.svg_shapes = [
-            'diamond_red.svg', 'dot_blue.svg', 'effect_drop_shadow.svg', 
-            'honeycomb_faux_3d.svg', 'shield_disability.svg', 'topo_airport.svg',
-            'topo_hospital.svg', 'triangle_green.svg'
-        ]
+        self.svg_shapes = list(SVG_SHAPES)
         
         # Size options for points (mm)
         self.point_sizes = [6, 7, 8, 9, 10, 11, 12]
@@ -883,51 +1793,30 @@ class SymbologyDialog(QDialog):
         self.selected_size = 8  # default changed from 9 to 8
         self.selected_width = None
         self.selected_color = None
+        self.selected_preset = 'auto'
+        self.auto_preset = 'exact'
         
         self.init_ui()
         self.load_settings()
         
+    def bind(self, layer):
+        """Reuse the dialog for another layer of the same geometry type"""
+        self.layer = layer
+        self.load_settings()
+        
     def init_ui(self):
         """Initialize the user interface"""
         self.setWindowTitle('Symbology')
         self.setMinimumSize(400, 400)
-        self.resize(500, 530)
-        self.setStyleSheet("""
-            QDialog {
-                background-color: #f0f0f0;
-                font-family: 'Segoe UI', Arial, sans-serif;
-            }
-            QFrame {
-                background-color: white;
-                border: 1px solid #ddd;
-                border-radius: 5px;
-                padding: 10px;
-            }
-            QPushButton {
-                border: 2px solid #ddd;
-                border-radius: 5px;
-                background-color: white;
-                padding: 5px;
-            }
-            QPushButton:hover {
-                border-color: #4CAF50;
-                background-color: #f5f5f5;
-            }
-            QPushButton:pressed {
-                background-color: #e0e0e0;
-            }
-            QLabel {
-                font-weight: bold;
-                color: #333;
-            }
-        """)
+        self.resize(500, 800)
+        self.setStyleSheet(SYMBOLOGY_STYLE)
         
         layout = QVBoxLayout()
         
         # Geometry type label
         geometry_name = self.get_geometry_name()
         title_label = QLabel(f"Configure {geometry_name} Symbology")
-        title_label.setStyleSheet("font-size: 16px; margin: 10px 0px;")
+        title_label.setProperty('role', 'title')
         layout.addWidget(title_label)
         
         # Check for missing SVG files
@@ -936,7 +1825,7 @@ class SymbologyDialog(QDialog):
             if missing_svgs:
                 error_msg = f"Warning: Missing SVG files: {', '.join(missing_svgs)}"
                 error_label = QLabel(error_msg)
-                error_label.setStyleSheet("color: red; font-weight: bold; margin: 5px 0px;")
+                error_label.setProperty('role', 'error')
                 layout.addWidget(error_label)
         
         # Add geometry-specific controls
@@ -950,6 +1839,14 @@ class SymbologyDialog(QDialog):
         # Add color selection
         self.add_color_controls(layout)
         
+        # Simplification presets for lines and polygons
+        if self.geometry_type in (QgsWkbTypes.LineGeometry, QgsWkbTypes.PolygonGeometry):
+            self.add_performance_controls(layout)
+        
+        # Preview of the selection on the features in the map extent
+        self.preview = PreviewPane(self)
+        layout.addWidget(self.preview, 0, Qt.AlignCenter)
+        
         # Add buttons
         self.add_action_buttons(layout)
         
@@ -1094,7 +1991,8 @@ class SymbologyDialog(QDialog):
             
             btn = QPushButton()
             btn.setFixedSize(50, 30)
-            btn.setStyleSheet(f"background-color: {color}; border: 2px solid #ddd;")
+            btn.setProperty('role', 'swatch')
+            btn.setStyleSheet(f"background-color: {color};")
             btn.clicked.connect(lambda checked, c=color: self.select_color(c))
             self.color_buttons.append((btn, color))
             color_grid.addWidget(btn, row, col)
@@ -1103,6 +2001,28 @@ class SymbologyDialog(QDialog):
         frame.setLayout(frame_layout)
         layout.addWidget(frame)
     
+    def add_performance_controls(self, layout):
+        """Add rendering preset controls"""
+        frame = QFrame()
+        frame_layout = QVBoxLayout()
+        
+        preset_label = QLabel("Rendering:")
+        frame_layout.addWidget(preset_label)
+        
+        preset_layout = QHBoxLayout()
+        self.preset_buttons = []
+        
+        for preset, text in RENDER_PRESETS:
+            btn = QPushButton(text)
+            btn.setFixedHeight(30)
+            btn.clicked.connect(lambda checked, p=preset: self.select_preset(p))
+            self.preset_buttons.append((btn, preset))
+            preset_layout.addWidget(btn)
+        
+        frame_layout.addLayout(preset_layout)
+        frame.setLayout(frame_layout)
+        layout.addWidget(frame)
+    
     def add_action_buttons(self, layout):
         """Add OK and Cancel buttons"""
         button_layout = QHBoxLayout()
@@ -1110,12 +2030,12 @@ class SymbologyDialog(QDialog):
         
         ok_btn = QPushButton("OK")
         ok_btn.setFixedSize(70, 30)
-        ok_btn.setStyleSheet("background-color: #4CAF50; color: white; font-weight: bold;")
+        ok_btn.setProperty('role', 'ok')
         ok_btn.clicked.connect(self.accept)
         
         cancel_btn = QPushButton("Cancel")
         cancel_btn.setFixedSize(70, 30)
-        cancel_btn.setStyleSheet("background-color: #f44336; color: white; font-weight: bold;")
+        cancel_btn.setProperty('role', 'cancel')
         cancel_btn.clicked.connect(self.reject)
         
         button_layout.addWidget(ok_btn)
@@ -1126,53 +2046,87 @@ class SymbologyDialog(QDialog):
         """Select a marker shape"""
         self.selected_shape = shape
         self.update_shape_selection()
+        self.update_preview()
     
     def select_size(self, size):
         """Select marker size"""
         self.selected_size = size
         self.update_size_selection()
+        self.update_preview()
     
     def select_width(self, width):
         """Select line/polygon width"""
         self.selected_width = width
         self.update_width_selection()
+        self.update_preview()
     
     def select_color(self, color):
         """Select color"""
         self.selected_color = color
         self.update_color_selection()
+        self.update_preview()
+    
+    def select_preset(self, preset):
+        """Select a rendering preset"""
+        self.selected_preset = preset
+        self.update_preset_selection()
+    
+    def suggest_preset(self):
+        """Sample the vertices of the layer to pick the Auto preset"""
+        average = vertex_sample(self.layer)
+        self.auto_preset = suggested_preset(self.layer, average)
+        for btn, preset in self.preset_buttons:
+            if preset == 'auto':
+                btn.setText(f"Auto ({dict(RENDER_PRESETS)[self.auto_preset]})")
+                btn.setToolTip(f"About {average:.0f} vertices per feature")
+    
+    def selected_symbol(self):
+        """Create the symbol of the current selection, None while it is incomplete"""
+        if self.geometry_type == QgsWkbTypes.PointGeometry:
+            if not self.selected_shape:
+                return None
+            return svg_marker_symbol(self.selected_shape, self.selected_size, self.selected_color)
+        if self.selected_width is None or self.selected_color is None:
+            return None
+        if self.geometry_type == QgsWkbTypes.LineGeometry:
+            return line_symbol(self.selected_color, self.selected_width)
+        return outline_symbol(self.selected_color, self.selected_width)
+    
+    def update_preview(self):
+        """Render the current selection in the preview pane"""
+        symbol = self.selected_symbol()
+        if symbol is not None:
+            self.preview.request(self.layer, QgsSingleSymbolRenderer(symbol))
+    
+    def done(self, result):
+        # The sampled features are taken again on the next opening
+        self.preview.clear_sample()
+        super().done(result)
     
     def update_shape_selection(self):
         """Update visual selection for shapes"""
         for btn, shape in self.shape_buttons:
-            if shape == self.selected_shape:
-                btn.setStyleSheet("border: 3px solid #4CAF50; background-color: #e8f5e8;")
-            else:
-                btn.setStyleSheet("")
+            set_selected(btn, shape == self.selected_shape)
     
     def update_size_selection(self):
         """Update visual selection for sizes"""
         for btn in self.size_buttons:
-            if float(btn.text()) == self.selected_size:
-                btn.setStyleSheet("border: 3px solid #4CAF50; background-color: #e8f5e8; font-weight: bold;")
-            else:
-                btn.setStyleSheet("")
+            set_selected(btn, float(btn.text()) == self.selected_size)
     
     def update_width_selection(self):
         """Update visual selection for widths"""
         for btn in self.width_buttons:
-            if float(btn.text()) == self.selected_width:
-                btn.setStyleSheet("border: 3px solid #4CAF50; background-color: #e8f5e8; font-weight: bold;")
-            else:
-                btn.setStyleSheet("")
+            set_selected(btn, float(btn.text()) == self.selected_width)
     
     def update_color_selection(self):
         """Update visual selection for colors"""
         for btn, color in self.color_buttons:
-            if color == self.selected_color:
-                btn.setStyleSheet(f"background-color: {color}; border: 3px solid #4CAF50;")
-            else:
-                btn.setStyleSheet(f"background-color: {color}; border: 2px solid #ddd;")
+            set_selected(btn, color == self.selected_color)
+    
+    def update_preset_selection(self):
+        """Update visual selection for rendering presets"""
+        for btn, preset in self.preset_buttons:
+            set_selected(btn, preset == self.selected_preset)
     
     def load_settings(self):
         """Load saved settings"""
@@ -1216,6 +2170,11 @@ class SymbologyDialog(QDialog):
             self.update_width_selection()
         if hasattr(self, 'color_buttons'):
             self.update_color_selection()
+        if hasattr(self, 'preset_buttons'):
+            self.selected_preset = settings.value('symbology/render_preset', 'auto')
+            self.suggest_preset()
+            self.update_preset_selection()
+        self.update_preview()
     
     def save_settings(self):
         """Save current settings"""
@@ -1240,6 +2199,9 @@ class SymbologyDialog(QDialog):
                 settings.setValue('symbology/polygon_width', self.selected_width)
             if self.selected_color is not None:
                 settings.setValue('symbology/polygon_color', self.selected_color)
+        
+        if hasattr(self, 'preset_buttons'):
+            settings.setValue('symbology/render_preset', self.selected_preset)
     
     def apply_symbology(self):
         """Apply selected symbology to the layer"""
@@ -1269,19 +2231,15 @@ class SymbologyDialog(QDialog):
             QMessageBox.warning(self, "Warning", f"SVG file not found: {self.selected_shape}")
             return
         
-        # Create SVG marker symbol
-        symbol = QgsMarkerSymbol()
-        svg_layer = QgsSvgMarkerSymbolLayer(svg_path)
-        svg_layer.setSize(self.selected_size)
-        
-        # Apply color only to diamond shape using setColor
-        if self.selected_color and self.selected_shape == 'diamond_red.svg':
-            svg_layer.setColor(QColor(self.selected_color))
-        
-        symbol.changeSymbolLayer(0, svg_layer)
+        # Millions of SVG markers are slow to draw, offer a faster renderer
+        mode = fast_point_mode(self.layer, iface.mapCanvas(), self)
+        if mode == 'simple':
+            symbol = simple_marker_symbol(self.selected_size, self.selected_color)
+        else:
+            symbol = self.selected_symbol()
         
         # Apply renderer
-        renderer = QgsSingleSymbolRenderer(symbol)
+        renderer = fast_point_renderer(QgsSingleSymbolRenderer(symbol), mode, self.selected_color)
         self.layer.setRenderer(renderer)
     
     def apply_line_symbology(self):
@@ -1289,33 +2247,28 @@ class SymbologyDialog(QDialog):
         if self.selected_width is None or self.selected_color is None:
             return
         
-        symbol = QgsLineSymbol()
-        line_layer = QgsSimpleLineSymbolLayer()
-        line_layer.setWidth(self.selected_width)
-        line_layer.setColor(QColor(self.selected_color))
-        line_layer.setPenCapStyle(Qt.RoundCap)
-        line_layer.setPenJoinStyle(Qt.RoundJoin)
-        
-        symbol.changeSymbolLayer(0, line_layer)
+        symbol = self.selected_symbol()
         
         renderer = QgsSingleSymbolRenderer(symbol)
         self.layer.setRenderer(renderer)
+        self.apply_render_preset()
     
     def apply_polygon_symbology(self):
         """Apply polygon symbology"""
         if self.selected_width is None or self.selected_color is None:
             return
         
-        # Use your reference code approach
-        # Create QgsFillSymbol with outline-only configuration
-        symbol = QgsFillSymbol()
-        # Remove default fill layer and add simple line layer for outline
-        symbol.deleteSymbolLayer(0)  # Remove default simple fill layer
-        line_layer = QgsSimpleLineSymbolLayer(QColor(self.selected_color), self.selected_width)
-        symbol.appendSymbolLayer(line_layer)
+        # Outline-only fill symbol
+        symbol = self.selected_symbol()
         
         renderer = QgsSingleSymbolRenderer(symbol)
         self.layer.setRenderer(renderer)
+        self.apply_render_preset()
+    
+    def apply_render_preset(self):
+        """Set the simplification of the selected preset, Auto uses the sampled one"""
+        preset = self.auto_preset if self.selected_preset == 'auto' else self.selected_preset
+        apply_render_preset(self.layer, preset)
 
 
 # Labeling Dialog Class (keep this as it is)
@@ -1344,6 +2297,19 @@ class LabelingDialog(QDialog):
         # Update color buttons after UI is fully initialized
         self.update_color_buttons()
         
+    def bind(self, layer):
+        """Reuse the dialog for another layer, only the field buttons are rebuilt"""
+        self.layer = layer
+        self.selected_fields = []
+        self.selected_colors = []
+        self.load_layer_settings()
+        if not self.selected_colors:
+            self.selected_colors = ['#ffa500']
+        
+        self.populate_field_buttons()
+        self.on_text_size_selected(11)
+        self.update_color_buttons()
+        
     def load_layer_settings(self):
         """Load saved field and color selections for this layer (current project only)"""
         # Use project-specific storage instead of persistent QSettings
@@ -1376,7 +2342,7 @@ class LabelingDialog(QDialog):
         # Make dialog resizable instead of fixed size
         self.setMinimumSize(570, 490)
         self.resize(570, 490)
-        self.setStyleSheet("background-color: #f5f5f5;")
+        self.setStyleSheet(LABELING_STYLE)
         
         # Main layout
         main_layout = QVBoxLayout()
@@ -1413,32 +2379,32 @@ class LabelingDialog(QDialog):
         # Label
         label = QLabel("Select one or more fields to label:")
         label.setFont(QFont("Arial", 12))
-        label.setStyleSheet("color: #333333;")
+        label.setProperty('role', 'heading')
         layout.addWidget(label)
         
-        # Get layer fields
+        # Create scroll area for field buttons
+        self.field_scroll_area = QScrollArea()
+        self.field_scroll_area.setWidgetResizable(True)
+        self.field_scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.field_scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.field_scroll_area.setMaximumHeight(150)
+        self.field_scroll_area.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.populate_field_buttons()
+        layout.addWidget(self.field_scroll_area)
+        
+        return container
+        
+    def populate_field_buttons(self):
+        """Create one button per field of the layer"""
         fields = [field.name() for field in self.layer.fields()]
         
-        # Create scroll area for field buttons
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        scroll_area.setMaximumHeight(150)
-        scroll_area.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        
-        # Widget to hold buttons
+        # Widget to hold buttons, replaces the one of the previous layer
         button_widget = QWidget()
         
         # Determine layout based on number of fields (5 per row)
         if len(fields) <= 5:
-            rows = 1
-            cols = len(fields)
-        elif len(fields) <= 10:
-            rows = 2
-            cols = 5
+            cols = max(1, len(fields))
         else:
-            rows = (len(fields) + 4) // 5
             cols = 5
         
         grid_layout = QGridLayout(button_widget)
@@ -1449,20 +2415,7 @@ class LabelingDialog(QDialog):
             button = QPushButton(field)
             button.setFixedSize(75, 30)  # Increased width 1.5x (50 -> 75)
             button.setFont(QFont("Arial", 10))
-            button.setStyleSheet("""
-                QPushButton {
-                    border: 2px solid #555555;
-                    border-radius: 5px;
-                    background-color: transparent;
-                    color: #333333;
-                }
-                QPushButton:hover {
-                    border-color: #BBBBBB;
-                }
-                QPushButton:checked {
-                    border-color: #04AA6D;
-                }
-            """)
+            button.setProperty('role', 'option')
             button.setCheckable(True)
             button.setChecked(field in self.selected_fields)  # Set saved state
             button.clicked.connect(lambda checked, f=field: self.on_field_selected(f))
@@ -1472,10 +2425,7 @@ class LabelingDialog(QDialog):
             grid_layout.addWidget(button, row, col)
             self.field_buttons.append(button)
         
-        scroll_area.setWidget(button_widget)
-        layout.addWidget(scroll_area)
-        
-        return container
+        self.field_scroll_area.setWidget(button_widget)
         
     def create_text_size_section(self):
         container = QWidget()
@@ -1486,7 +2436,7 @@ class LabelingDialog(QDialog):
         # Label (changed from mm to points)
         label = QLabel("Select text size (points):")
         label.setFont(QFont("Arial", 12))
-        label.setStyleSheet("color: #333333;")
+        label.setProperty('role', 'heading')
         layout.addWidget(label)
         
         # Button layout
@@ -1498,20 +2448,7 @@ class LabelingDialog(QDialog):
             button = QPushButton(str(size))
             button.setFixedSize(50, 30)
             button.setFont(QFont("Arial", 10))
-            button.setStyleSheet("""
-                QPushButton {
-                    border: 2px solid #555555;
-                    border-radius: 5px;
-                    background-color: transparent;
-                    color: #333333;
-                }
-                QPushButton:hover {
-                    border-color: #BBBBBB;
-                }
-                QPushButton:checked {
-                    border-color: #04AA6D;
-                }
-            """)
+            button.setProperty('role', 'option')
             button.setCheckable(True)
             button.setChecked(size == 11)  # Default selection
             button.clicked.connect(lambda checked, s=size: self.on_text_size_selected(s))
@@ -1532,7 +2469,7 @@ class LabelingDialog(QDialog):
         # Label (removed "default: yellow" text)
         label = QLabel("Select text color:")
         label.setFont(QFont("Arial", 12))
-        label.setStyleSheet("color: #333333;")
+        label.setProperty('role', 'heading')
         layout.addWidget(label)
         
         # Color grid (2 rows, 8 columns)
@@ -1581,36 +2518,14 @@ class LabelingDialog(QDialog):
         ok_button = QPushButton("OK")
         ok_button.setFixedSize(75, 30)  # Increased width 1.5x (50 -> 75)
         ok_button.setFont(QFont("Arial", 10))
-        ok_button.setStyleSheet("""
-            QPushButton {
-                border: 2px solid #555555;
-                border-radius: 5px;
-                background-color: transparent;
-                color: #333333;
-            }
-            QPushButton:hover {
-                border-color: #04AA6D;
-                color: #04AA6D;
-            }
-        """)
+        ok_button.setProperty('role', 'ok')
         ok_button.clicked.connect(self.apply_labels)
         
         # Cancel button
         cancel_button = QPushButton("Cancel")
         cancel_button.setFixedSize(75, 30)  # Increased width 1.5x (50 -> 75)
         cancel_button.setFont(QFont("Arial", 10))
-        cancel_button.setStyleSheet("""
-            QPushButton {
-                border: 2px solid #555555;
-                border-radius: 5px;
-                background-color: transparent;
-                color: #333333;
-            }
-            QPushButton:hover {
-                border-color: #f44336;
-                color: #f44336;
-            }
-        """)
+        cancel_button.setProperty('role', 'cancel')
         cancel_button.clicked.connect(self.reject)
         
         layout.addWidget(ok_button)
@@ -1693,13 +2608,15 @@ class LabelingDialog(QDialog):
             # Save current selections for this layer (current project only)
             self.save_layer_settings()
             
-            if len(self.selected_fields) == 1:
-                self.apply_simple_labeling()
-            else:
-                self.apply_rule_based_labeling()
+            with profiler.phase("apply"):
+                if len(self.selected_fields) == 1:
+                    self.apply_simple_labeling()
+                else:
+                    self.apply_rule_based_labeling()
                 
             # Refresh map
-            iface.mapCanvas().refresh()
+            with profiler.phase("refresh"):
+                iface.mapCanvas().refresh()
             
             # Show success message
             iface.messageBar().pushMessage(
@@ -1717,89 +2634,16 @@ class LabelingDialog(QDialog):
             
     def apply_simple_labeling(self):
         """Apply simple labeling with one field"""
-        field = self.selected_fields[0]
-        color = self.selected_colors[0] if self.selected_colors else '#ffa500'  # Default to orange
-        
-        # Create label settings
-        label_settings = QgsPalLayerSettings()
-        label_settings.fieldName = field
-        label_settings.enabled = True
-        
-        # Set text format
-        text_format = QgsTextFormat()
-        text_format.setFont(QFont("Arial"))
-        text_format.setSize(self.selected_text_size)
-        text_format.setSizeUnit(QgsUnitTypes.RenderPoints)
-        text_format.setColor(self.hex_to_qcolor(color))
-        
-        label_settings.setFormat(text_format)
-        
-        # Set placement based on geometry type
-        geom_type = self.layer.geometryType()
-        if geom_type == 0:  # Point
-            label_settings.placement = QgsPalLayerSettings.Placement.OverPoint
-            label_settings.xOffset = 0
-            label_settings.yOffset = 15
-            label_settings.offsetUnits = QgsUnitTypes.RenderPoints
-        elif geom_type == 1:  # Line
-            label_settings.placement = QgsPalLayerSettings.Placement.Line
-        elif geom_type == 2:  # Polygon
-            label_settings.placement = QgsPalLayerSettings.Placement.OverPoint
-            
-        # Apply simple labeling
-        simple_labeling = QgsVectorLayerSimpleLabeling(label_settings)
-        self.layer.setLabeling(simple_labeling)
+        labeling = build_labeling(
+            self.layer.geometryType(), self.selected_fields[:1], self.selected_text_size, self.selected_colors)
+        self.layer.setLabeling(labeling)
         self.layer.setLabelsEnabled(True)
         
     def apply_rule_based_labeling(self):
         """Apply rule-based labeling with multiple fields - each on separate rows (max 3)"""
-        rules = QgsRuleBasedLabeling.Rule(QgsPalLayerSettings())
-        
-        for i, field in enumerate(self.selected_fields):
-            # Determine color for this field
-            if i < len(self.selected_colors):
-                color = self.selected_colors[i]
-            else:
-                color = '#ffa500'  # Default to orange
-                
-            # Create label settings for this field
-            label_settings = QgsPalLayerSettings()
-            label_settings.fieldName = field
-            label_settings.enabled = True
-            
-            # Set text format
-            text_format = QgsTextFormat()
-            text_format.setFont(QFont("Arial"))
-            text_format.setSize(self.selected_text_size)
-            text_format.setSizeUnit(QgsUnitTypes.RenderPoints)
-            text_format.setColor(self.hex_to_qcolor(color))
-            
-            label_settings.setFormat(text_format)
-            
-            # Set placement based on geometry type with offsets
-            geom_type = self.layer.geometryType()
-            if geom_type == 0:  # Point
-                label_settings.placement = QgsPalLayerSettings.Placement.OverPoint
-                label_settings.xOffset = 0
-                label_settings.yOffset = 15 + (i * 15)  # 15, 30, 45 points
-                label_settings.offsetUnits = QgsUnitTypes.RenderPoints
-            elif geom_type == 1:  # Line
-                label_settings.placement = QgsPalLayerSettings.Placement.Line
-                label_settings.yOffset = i * (self.selected_text_size + 2)
-                label_settings.offsetUnits = QgsUnitTypes.RenderPoints
-            elif geom_type == 2:  # Polygon
-                label_settings.placement = QgsPalLayerSettings.Placement.OverPoint
-                label_settings.yOffset = i * (self.selected_text_size + 2)
-                label_settings.offsetUnits = QgsUnitTypes.RenderPoints
-                
-            # Create rule for this field
-            rule = QgsRuleBasedLabeling.Rule(label_settings)
-            rule.setDescription(f"Label {field}")
-            rules.appendChild(rule)
-            
-        # Apply rule-based labeling
-        rule_based_labeling = QgsRuleBasedLabeling(rules)
-        self.layer.setLabeling(rule_based_labeling)
+        labeling = build_labeling(
+            self.layer.geometryType(), self.selected_fields, self.selected_text_size, self.selected_colors)
+        self.layer.setLabeling(labeling)
         self.layer.setLabelsEnabled(True)
         
     def hex_to_qcolor(self, hex_color):
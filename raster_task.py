@@ -0,0 +1,156 @@
+import os
+
+from osgeo import gdal
+from qgis.core import QgsTask, QgsApplication, QgsProviderRegistry, QgsRasterLayer
+
+
+# Overviews are built down to this size in pixels
+OVERVIEW_MIN_SIZE = 256
+
+
+def raster_path(layer):
+    """Get the file of a GDAL raster layer, None for other sources"""
+    if not isinstance(layer, QgsRasterLayer) or layer.providerType() != 'gdal':
+        return None
+    path = QgsProviderRegistry.instance().decodeUri('gdal', layer.source()).get('path')
+    if not path or not os.path.isfile(path):
+        return None
+    return path
+
+
+def overview_levels(width, height, min_size=OVERVIEW_MIN_SIZE):
+    """Get the decimation factors that halve a raster until it fits min_size"""
+    levels = []
+    factor = 2
+    while max(width, height) / factor >= min_size:
+        levels.append(factor)
+        factor *= 2
+    return levels
+
+
+class RasterPreparationTask(QgsTask):
+    """Builds the missing overviews and approximate statistics of a raster file
+
+    The file is opened read-only, so GDAL writes the overviews to a .ovr
+    sidecar and the statistics to the .aux.xml file, each once when the
+    dataset is closed. The source raster itself is never rewritten.
+    """
+
+    def __init__(self, layer, path, callback, resampling='AVERAGE'):
+        super().__init__(f"Preparing {layer.name()}", QgsTask.CanCancel)
+        self.layer_id = layer.id()
+        self.path = path
+        self.callback = callback
+        self.resampling = resampling
+        self.built_overviews = False
+        self.built_statistics = False
+        self.error = None
+        self.succeeded = False
+
+    def progress(self, complete, message, data):
+        # Overviews take most of the time, statistics the rest
+        self.setProgress(complete * 90)
+        return 0 if self.isCanceled() else 1
+
+    def run(self):
+        dataset = None
+        try:
+            dataset = gdal.Open(self.path, gdal.GA_ReadOnly)
+            if dataset is None:
+                self.error = f"Could not open {self.path}"
+                return False
+
+            first_band = dataset.GetRasterBand(1)
+            levels = overview_levels(dataset.RasterXSize, dataset.RasterYSize)
+            if levels and first_band.GetOverviewCount() == 0:
+                gdal.SetThreadLocalConfigOption('COMPRESS_OVERVIEW', 'DEFLATE')
+                try:
+                    if dataset.BuildOverviews(self.resampling, levels, callback=self.progress) != 0:
+                        self.error = gdal.GetLastErrorMsg() or "Overviews could not be built"
+                        return False
+                finally:
+                    gdal.SetThreadLocalConfigOption('COMPRESS_OVERVIEW', None)
+                self.built_overviews = True
+            self.setProgress(90)
+
+            for index in range(1, dataset.RasterCount + 1):
+                if self.isCanceled():
+                    return False
+                band = dataset.GetRasterBand(index)
+                if band.GetMetadataItem('STATISTICS_MEAN') is None:
+                    # Approximate statistics are read from the overviews
+                    band.ComputeStatistics(True)
+                    self.built_statistics = True
+                self.setProgress(90 + 10 * index / dataset.RasterCount)
+        except RuntimeError as e:
+            self.error = str(e)
+            return False
+        finally:
+            # Closing the dataset writes the sidecar files
+            dataset = None
+        return not self.isCanceled()
+
+    def finished(self, result):
+        self.succeeded = result
+        self.callback(self)
+
+
+class RasterPreparationQueue:
+    """Prepares many rasters in background tasks, a few at a time
+
+    Layers sharing a file are prepared once. The callback gets the
+    finished tasks once the queue is empty, unless the queue was canceled
+    with notify set to False.
+    """
+
+    def __init__(self, workers, callback):
+        self.workers = max(1, workers)
+        self.callback = callback
+        self.waiting = []
+        self.running = []
+        self.done = []
+        self.paths = set()
+
+    def add(self, layers):
+        """Queue the file-based rasters among the layers, returning the skipped ones"""
+        skipped = []
+        for layer in layers:
+            path = raster_path(layer)
+            if path is None:
+                skipped.append(layer)
+            elif path not in self.paths:
+                self.paths.add(path)
+                self.waiting.append(RasterPreparationTask(layer, path, self.task_finished))
+        self.start_next()
+        return skipped
+
+    def start_next(self):
+        while self.waiting and len(self.running) < self.workers:
+            task = self.waiting.pop(0)
+            self.running.append(task)
+            QgsApplication.taskManager().addTask(task)
+
+    def task_finished(self, task):
+        self.running.remove(task)
+        self.done.append(task)
+        self.start_next()
+        if not self.running and not self.waiting:
+            done, self.done = self.done, []
+            self.paths.clear()
+            if self.callback is not None:
+                self.callback(done)
+
+    def cancel(self, notify=True):
+        """Drop the waiting rasters and stop the running ones"""
+        if not notify:
+            self.callback = None
+        self.waiting = []
+        for task in list(self.running):
+            try:
+                task.cancel()
+            except RuntimeError:
+                # The task already ended and was deleted
+                pass
+
+    def is_active(self):
+        return bool(self.running or self.waiting)
@@ -0,0 +1,100 @@
+import json
+
+from qgis.core import QgsFeatureRequest, QgsVectorSimplifyMethod
+
+
+# Rendering presets of the line and polygon symbology
+RENDER_PRESETS = [
+    ('auto', "Auto"),
+    ('exact', "Exact"),
+    ('balanced', "Balanced"),
+    ('fast', "Fast"),
+]
+
+# Estimated vertex totals above which the auto preset simplifies more
+BALANCED_VERTICES = 500000
+FAST_VERTICES = 5000000
+
+# Layer property keeping the simplification a preset replaced
+SAVED_METHOD_PROPERTY = "QuickStyle/savedSimplifyMethod"
+
+
+def vertex_sample(layer, size=200):
+    """Estimate the average number of vertices per feature from the first features"""
+    request = QgsFeatureRequest().setLimit(size).setNoAttributes()
+    features = vertices = 0
+    for feature in layer.getFeatures(request):
+        geometry = feature.geometry()
+        if not geometry.isNull():
+            vertices += geometry.constGet().nCoordinates()
+            features += 1
+    return vertices / features if features else 0.0
+
+
+def suggested_preset(layer, average_vertices):
+    """Pick the preset for the estimated number of vertices of a layer"""
+    total = average_vertices * max(0, layer.featureCount())
+    if total >= FAST_VERTICES:
+        return 'fast'
+    if total >= BALANCED_VERTICES:
+        return 'balanced'
+    return 'exact'
+
+
+def simplify_method(preset):
+    """Create the on-the-fly simplification of the balanced or fast preset, the data is not changed"""
+    method = QgsVectorSimplifyMethod()
+    if preset == 'fast':
+        # Snapping to the pixel grid is the cheapest, providers that can
+        # simplify server-side send fewer vertices in the first place
+        method.setSimplifyHints(QgsVectorSimplifyMethod.FullSimplification)
+        method.setSimplifyAlgorithm(QgsVectorSimplifyMethod.SnapToGrid)
+        method.setThreshold(2.0)
+        method.setForceLocalOptimization(False)
+    else:
+        method.setSimplifyHints(QgsVectorSimplifyMethod.GeometrySimplification)
+        method.setSimplifyAlgorithm(QgsVectorSimplifyMethod.Distance)
+        method.setThreshold(1.0)
+        method.setForceLocalOptimization(True)
+    # Simplify at every scale, at large scales the threshold removes nothing visible
+    method.setMaximumScale(1)
+    return method
+
+
+def save_method(layer):
+    """Keep the simplification of a layer before a preset first replaces it"""
+    if layer.customProperty(SAVED_METHOD_PROPERTY):
+        return
+    method = layer.simplifyMethod()
+    layer.setCustomProperty(SAVED_METHOD_PROPERTY, json.dumps([
+        int(method.simplifyHints()), int(method.simplifyAlgorithm()), method.threshold(),
+        method.forceLocalOptimization(), method.maximumScale()]))
+
+
+def restore_method(layer):
+    """Put back the simplification a preset replaced, if any"""
+    saved = layer.customProperty(SAVED_METHOD_PROPERTY)
+    if not saved:
+        return
+    hints, algorithm, threshold, local, maximum_scale = json.loads(saved)
+    method = QgsVectorSimplifyMethod()
+    method.setSimplifyHints(QgsVectorSimplifyMethod.SimplifyHints(hints))
+    method.setSimplifyAlgorithm(QgsVectorSimplifyMethod.SimplifyAlgorithm(algorithm))
+    method.setThreshold(threshold)
+    method.setForceLocalOptimization(local)
+    method.setMaximumScale(maximum_scale)
+    layer.setSimplifyMethod(method)
+    layer.removeCustomProperty(SAVED_METHOD_PROPERTY)
+
+
+def apply_render_preset(layer, preset):
+    """Set the simplification of a layer for a preset
+
+    The exact preset keeps the simplification QGIS or the user gave the
+    layer, only undoing what an earlier preset changed.
+    """
+    if preset == 'exact':
+        restore_method(layer)
+        return
+    save_method(layer)
+    layer.setSimplifyMethod(simplify_method(preset))
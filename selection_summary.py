@@ -0,0 +1,267 @@
+from qgis.PyQt.QtCore import Qt, QVariant
+from qgis.PyQt.QtWidgets import (QDockWidget, QWidget, QVBoxLayout, QLabel, QListWidget,
+                                 QListWidgetItem, QTableWidget, QTableWidgetItem, QHeaderView)
+from qgis.core import QgsFeatureRequest, QgsVectorLayer
+
+
+class FrequencyTable:
+    """Counts of values that keep the most common ones ordered
+
+    Values are grouped in one bucket per count, and the non-empty counts
+    are chained in order around a sentinel 0, so adding or removing one
+    value costs O(1) and listing the k most common values O(k), whatever
+    the number of distinct values.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        # Count -> values with that count, in the order they reached it
+        self.buckets = {}
+        # Count -> next smaller and next larger non-empty count
+        self.lower = {0: 0}
+        self.higher = {0: 0}
+
+    def __len__(self):
+        return len(self.counts)
+
+    def get(self, value, default=0):
+        return self.counts.get(value, default)
+
+    def link(self, count, below):
+        """Create the empty bucket of a count just above another count"""
+        above = self.higher[below]
+        self.higher[below] = count
+        self.lower[count] = below
+        self.higher[count] = above
+        self.lower[above] = count
+        self.buckets[count] = {}
+
+    def move(self, value, old, new):
+        """Move a value from the bucket of one count to the next or previous"""
+        if new:
+            if new not in self.buckets:
+                self.link(new, old if new > old else self.lower[old])
+            self.buckets[new][value] = None
+            self.counts[value] = new
+        else:
+            del self.counts[value]
+        if old:
+            bucket = self.buckets[old]
+            del bucket[value]
+            if not bucket:
+                below, above = self.lower.pop(old), self.higher.pop(old)
+                self.higher[below] = above
+                self.lower[above] = below
+                del self.buckets[old]
+
+    def add(self, value):
+        count = self.counts.get(value, 0)
+        self.move(value, count, count + 1)
+
+    def remove(self, value):
+        count = self.counts.get(value, 0)
+        if count:
+            self.move(value, count, count - 1)
+
+    def most_common(self, n):
+        """Get the n most common (value, count) pairs"""
+        result = []
+        count = self.lower[0]
+        while count and len(result) < n:
+            for value in self.buckets[count]:
+                result.append((value, count))
+                if len(result) == n:
+                    break
+            count = self.lower[count]
+        return result
+
+
+class SelectionSummary:
+    """Running count, sum and distinct values of a selection
+
+    Values of every tracked feature are kept so a deselected feature can be
+    subtracted without reading it again from the provider.
+    """
+
+    def __init__(self, field_names, numeric):
+        self.field_names = field_names
+        self.numeric = numeric
+        self.reset()
+
+    def reset(self):
+        """Forget every tracked feature"""
+        self.rows = {}
+        self.sums = [0 for _ in self.field_names]
+        self.distinct = [FrequencyTable() for _ in self.field_names]
+
+    def add(self, fid, values):
+        """Add a newly selected feature"""
+        if fid in self.rows:
+            return
+        self.rows[fid] = values
+        for i, value in enumerate(values):
+            self.distinct[i].add(value)
+            if self.numeric[i] and value is not None:
+                self.sums[i] += value
+
+    def remove(self, fid):
+        """Remove a deselected feature"""
+        values = self.rows.pop(fid, None)
+        if values is None:
+            return
+        for i, value in enumerate(values):
+            self.distinct[i].remove(value)
+            if self.numeric[i] and value is not None:
+                self.sums[i] -= value
+
+    def count(self):
+        return len(self.rows)
+
+
+class SelectionSummaryDock(QDockWidget):
+    """Dock showing aggregates of the current selection of a layer"""
+
+    def __init__(self, parent=None):
+        super().__init__("Selection Summary", parent)
+        self.setObjectName("QuickStyleSelectionSummary")
+        self.layer = None
+        self.summary = None
+
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+
+        self.count_label = QLabel("No layer")
+        layout.addWidget(self.count_label)
+
+        layout.addWidget(QLabel("Fields to summarize:"))
+        self.field_list = QListWidget()
+        self.field_list.setMaximumHeight(120)
+        self.field_list.itemChanged.connect(self.on_fields_changed)
+        layout.addWidget(self.field_list)
+
+        self.results_table = QTableWidget()
+        self.results_table.setColumnCount(5)
+        self.results_table.setHorizontalHeaderLabels(["Field", "Sum", "Mean", "Distinct", "Most common"])
+        self.results_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.Stretch)
+        layout.addWidget(self.results_table)
+
+        self.setWidget(widget)
+
+    def bind(self, layer):
+        """Follow the selection of another layer"""
+        if layer is self.layer:
+            return
+        if self.layer is not None:
+            try:
+                self.layer.selectionChanged.disconnect(self.on_selection_changed)
+            except (TypeError, RuntimeError):
+                pass
+
+        self.layer = layer if isinstance(layer, QgsVectorLayer) else None
+
+        self.field_list.blockSignals(True)
+        self.field_list.clear()
+        if self.layer is not None:
+            for field in self.layer.fields():
+                item = QListWidgetItem(field.name())
+                item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+                item.setCheckState(Qt.Unchecked)
+                self.field_list.addItem(item)
+            self.layer.selectionChanged.connect(self.on_selection_changed)
+        self.field_list.blockSignals(False)
+
+        self.rebuild()
+
+    def checked_fields(self):
+        return [
+            self.field_list.item(i).text() for i in range(self.field_list.count())
+            if self.field_list.item(i).checkState() == Qt.Checked
+        ]
+
+    def on_fields_changed(self, item):
+        self.rebuild()
+
+    def rebuild(self):
+        """Summarize the whole selection, used when the layer or fields change"""
+        if self.layer is None:
+            self.summary = None
+            self.refresh_table()
+            return
+
+        field_names = self.checked_fields()
+        fields = self.layer.fields()
+        numeric = [fields.field(name).isNumeric() for name in field_names]
+        self.summary = SelectionSummary(field_names, numeric)
+        self.add_features(self.layer.selectedFeatureIds())
+        self.refresh_table()
+
+    def on_selection_changed(self, selected, deselected, clear_and_select):
+        """Apply only the added and removed feature ids to the aggregates"""
+        if self.summary is None:
+            return
+
+        tracked = self.summary.rows.keys()
+        if clear_and_select:
+            # The signal carries the new selection, diff it against what we track
+            current = set(self.layer.selectedFeatureIds())
+            added = current - tracked
+            removed = tracked - current
+        else:
+            added = set(selected) - tracked
+            removed = set(deselected) & tracked
+
+        for fid in removed:
+            self.summary.remove(fid)
+        self.add_features(added)
+        self.refresh_table()
+
+    def add_features(self, fids):
+        """Read the tracked fields of the given features only"""
+        if not fids:
+            return
+
+        fields = self.layer.fields()
+        indexes = [fields.lookupField(name) for name in self.summary.field_names]
+
+        request = QgsFeatureRequest()
+        request.setFilterFids(list(fids))
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes(indexes)
+
+        for feature in self.layer.getFeatures(request):
+            attributes = feature.attributes()
+            values = tuple(
+                None if isinstance(attributes[i], QVariant) and attributes[i].isNull() else attributes[i]
+                for i in indexes
+            )
+            self.summary.add(feature.id(), values)
+
+    def refresh_table(self):
+        """Show the current aggregates"""
+        if self.summary is None:
+            self.count_label.setText("No layer")
+            self.results_table.setRowCount(0)
+            return
+
+        count = self.summary.count()
+        self.count_label.setText(f"{self.layer.name()}: {count} selected")
+        self.results_table.setRowCount(len(self.summary.field_names))
+
+        for row, field_name in enumerate(self.summary.field_names):
+            counter = self.summary.distinct[row]
+            if self.summary.numeric[row]:
+                total = self.summary.sums[row]
+                non_null = count - counter.get(None, 0)
+                sum_text = f"{total:g}"
+                mean_text = f"{total / non_null:g}" if non_null else ""
+            else:
+                sum_text = mean_text = ""
+            common = ", ".join(
+                f"{'NULL' if value is None else value} ({n})" for value, n in counter.most_common(5)
+            )
+
+            self.results_table.setItem(row, 0, QTableWidgetItem(field_name))
+            self.results_table.setItem(row, 1, QTableWidgetItem(sum_text))
+            self.results_table.setItem(row, 2, QTableWidgetItem(mean_text))
+            self.results_table.setItem(row, 3, QTableWidgetItem(str(len(counter))))
+            self.results_table.setItem(row, 4, QTableWidgetItem(common))
@@ -0,0 +1,105 @@
+import os
+import sys
+import multiprocessing
+import concurrent.futures
+from concurrent.futures import ProcessPoolExecutor
+
+# No QGIS imports here, worker processes import this module on their own
+from .columnar import TooManyCombinations, combination_bytes, open_layer, count_combinations_columnar
+
+
+def process_context():
+    """Get a spawn context that starts a Python interpreter, not QGIS"""
+    context = multiprocessing.get_context('spawn')
+    if os.path.basename(sys.executable).lower().startswith('qgis'):
+        if os.name == 'nt':
+            python = os.path.join(sys.exec_prefix, 'pythonw.exe')
+        else:
+            python = os.path.join(sys.exec_prefix, 'bin', 'python3')
+        context.set_executable(python)
+    return context
+
+
+def shard_filters(source, shards):
+    """Split the feature id space of a layer into attribute filters
+
+    GeoPackage ids are read from the rowid range, other drivers number
+    their features from 0. The layer subset is kept in every filter.
+    """
+    dataset, ogr_layer = open_layer(source)
+    if ogr_layer is None:
+        raise IOError(f"Could not open {source['path']}")
+
+    fid_column = ogr_layer.GetFIDColumn()
+    if fid_column:
+        quoted = '"' + fid_column.replace('"', '""') + '"'
+        table = '"' + ogr_layer.GetName().replace('"', '""') + '"'
+        result = dataset.ExecuteSQL(f"SELECT MIN({quoted}), MAX({quoted}) FROM {table}")
+        row = result.GetNextFeature() if result is not None else None
+        low, high = (row.GetField(0), row.GetField(1)) if row is not None else (None, None)
+        if result is not None:
+            dataset.ReleaseResultSet(result)
+        if low is None:
+            return []
+        high += 1
+    else:
+        quoted = 'FID'
+        low, high = 0, ogr_layer.GetFeatureCount()
+
+    step = max(1, -(-(high - low) // shards))
+    filters = []
+    for start in range(low, high, step):
+        where = f"{quoted} >= {start} AND {quoted} < {start + step}"
+        if source['subset']:
+            where = f"({source['subset']}) AND {where}"
+        filters.append(where)
+    return filters
+
+
+def count_shard(source, where, max_bytes=None):
+    """Count the combinations of one shard, run inside a worker process"""
+    return count_combinations_columnar(dict(source, subset=where), max_bytes)
+
+
+def count_combinations_sharded(source, workers, max_bytes=None, canceled=None):
+    """Count combinations of a file-based layer across worker processes
+
+    Every worker opens the datasource read-only and counts its own id
+    range column-wise, the partial counters are then summed. The result is
+    identical to counting the whole layer in one process. Raises
+    TooManyCombinations once the combinations of a shard or of the sum
+    take more than their share of max_bytes: half for the sum, the other
+    half split between the workers. Returns None once canceled(), checked
+    while waiting for the shards, is true. The pending shards are then
+    dropped and the workers exit after their current shard.
+    """
+    # Several shards per worker even out ranges with deleted or filtered rows
+    filters = shard_filters(source, workers * 4)
+
+    shard_bytes = max_bytes // (2 * workers) if max_bytes is not None else None
+    combinations = {}
+    held = 0
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=process_context())
+    try:
+        futures = [executor.submit(count_shard, source, where, shard_bytes) for where in filters]
+        for future in futures:
+            while True:
+                try:
+                    partial = future.result(timeout=0.25)
+                    break
+                except concurrent.futures.TimeoutError:
+                    if canceled is not None and canceled():
+                        return None
+            for combination, count in partial.items():
+                previous = combinations.get(combination)
+                if previous is None:
+                    combinations[combination] = count
+                    held += combination_bytes(combination)
+                else:
+                    combinations[combination] = previous + count
+            if max_bytes is not None and held > max_bytes // 2:
+                raise TooManyCombinations(len(combinations))
+    finally:
+        # Nothing is left to wait for unless the count stopped early
+        executor.shutdown(wait=False, cancel_futures=True)
+    return combinations
@@ -0,0 +1,123 @@
+import math
+import heapq
+import hashlib
+
+
+class HeavyHitters:
+    """Misra-Gries summary of the most frequent values of a stream
+
+    At most capacity counters are kept. Every value occurring more than
+    n / (capacity + 1) times in a stream of n values is guaranteed to be
+    kept, and its counter underestimates the true count by at most
+    `error`. Summaries are mergeable, so chunks can be counted exactly and
+    folded in one at a time.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.error = 0
+        self.total = 0
+
+    def update(self, counts):
+        """Fold a mapping of value to count into the summary"""
+        merged = self.counts
+        for value, count in counts.items():
+            merged[value] = merged.get(value, 0) + count
+            self.total += count
+        self.prune()
+
+    def merge(self, other):
+        """Fold another summary into this one"""
+        self.update(other.counts)
+        self.total -= sum(other.counts.values())
+        self.total += other.total
+        self.error += other.error
+
+    def prune(self):
+        """Drop counters until at most capacity remain"""
+        if len(self.counts) <= self.capacity:
+            return
+        threshold = heapq.nlargest(self.capacity + 1, self.counts.values())[-1]
+        self.counts = {value: count - threshold for value, count in self.counts.items() if count > threshold}
+        self.error += threshold
+
+    def top(self, n):
+        """Get the n values with the highest counts as (value, count) pairs"""
+        return heapq.nlargest(n, self.counts.items(), key=lambda item: item[1])
+
+
+def hash64(value):
+    """Stable 64-bit hash of a value, identical across sessions and processes"""
+    digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class HyperLogLog:
+    """Approximate distinct counter using 2 ** precision one-byte registers
+
+    Values are kept exactly in a small set until it grows past
+    exact_limit, so low cardinalities are counted without error. Sketches
+    built with the same precision can be merged.
+    """
+
+    def __init__(self, precision=12, exact_limit=64):
+        self.precision = precision
+        self.exact_limit = exact_limit
+        self.registers = None
+        self.exact = set()
+
+    @property
+    def is_exact(self):
+        return self.registers is None
+
+    def add_hashes(self, hashes):
+        """Add values given by their hash64"""
+        if self.registers is None:
+            self.exact.update(hashes)
+            if len(self.exact) <= self.exact_limit:
+                return
+            # Too many values to keep, switch to registers
+            hashes = self.exact
+            self.exact = set()
+            self.registers = bytearray(1 << self.precision)
+
+        registers = self.registers
+        shift = 64 - self.precision
+        mask = (1 << shift) - 1
+        for h in hashes:
+            index = h >> shift
+            rank = shift - (h & mask).bit_length() + 1
+            if rank > registers[index]:
+                registers[index] = rank
+
+    def add(self, values):
+        """Add an iterable of values"""
+        self.add_hashes({hash64(value) for value in values})
+
+    def merge(self, other):
+        """Fold another sketch with the same precision into this one"""
+        if other.registers is None:
+            self.add_hashes(other.exact)
+            return
+        if self.registers is None:
+            exact = self.exact
+            self.exact = set()
+            self.registers = bytearray(other.registers)
+            self.add_hashes(exact)
+            return
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def estimate(self):
+        """Get the estimated number of distinct values"""
+        if self.registers is None:
+            return len(self.exact)
+
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
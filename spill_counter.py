@@ -0,0 +1,206 @@
+import os
+import pickle
+import sqlite3
+import struct
+import sys
+import tempfile
+from collections.abc import ItemsView, Mapping, ValuesView
+
+
+# Measured cost of one held combination: packed key, count and dict slot
+BYTES_PER_KEY = 120
+
+# Measured cost of one interned value besides the value itself: dict slot and list entry
+BYTES_PER_VALUE = 75
+
+# Bits per field code in a packed key
+CODE_BITS = 32
+
+
+def value_key(values):
+    """Encode a tuple of values into bytes that are equal exactly when the values are"""
+    # Each value is pickled on its own, so equal values always give the same bytes
+    parts = []
+    for value in values:
+        data = pickle.dumps(value, protocol=4)
+        parts.append(struct.pack('>I', len(data)))
+        parts.append(data)
+    return b''.join(parts)
+
+
+def key_values(key):
+    """Decode the values of a value_key"""
+    values = []
+    offset = 0
+    while offset < len(key):
+        size, = struct.unpack_from('>I', key, offset)
+        offset += 4
+        values.append(pickle.loads(key[offset:offset + size]))
+        offset += size
+    return tuple(values)
+
+
+class CombinationCounter:
+    """Counts combinations of field values in bounded memory
+
+    Every field value is interned once into an integer code, and a
+    combination is counted under one integer packing the codes of its
+    fields, so repeated strings are never held twice. When the held
+    combinations and interned values take more than max_bytes, the partial
+    counts are added to a temporary SQLite table keyed by the values
+    themselves, and counting starts over in memory with empty intern
+    tables. Once anything was spilled, result() reads the counts from that
+    table.
+    """
+
+    def __init__(self, field_count, max_bytes):
+        self.field_count = field_count
+        self.max_bytes = max(1, max_bytes)
+        self.codes = [{} for _ in range(field_count)]
+        self.values = [[] for _ in range(field_count)]
+        self.value_bytes = 0
+        self.counts = {}
+        self.spill = None
+        self.spill_path = None
+        self.spilled = 0
+
+    def code(self, field, value):
+        """Get the code of a value, interning it on first sight"""
+        codes = self.codes[field]
+        code = codes.get(value)
+        if code is None:
+            code = len(self.values[field])
+            codes[value] = code
+            self.values[field].append(value)
+            self.value_bytes += sys.getsizeof(value) + BYTES_PER_VALUE
+        return code
+
+    def add(self, values):
+        """Count one combination of values, one per field"""
+        key = 0
+        for field, value in enumerate(values):
+            key = (key << CODE_BITS) | self.code(field, value)
+        counts = self.counts
+        counts[key] = counts.get(key, 0) + 1
+        if len(counts) * BYTES_PER_KEY + self.value_bytes >= self.max_bytes:
+            self.flush()
+
+    def unpack(self, key):
+        """Get the values a packed key stands for"""
+        mask = (1 << CODE_BITS) - 1
+        codes = []
+        for _ in range(self.field_count):
+            codes.append(key & mask)
+            key >>= CODE_BITS
+        return tuple(values[code] for values, code in zip(self.values, reversed(codes)))
+
+    def flush(self):
+        """Add the counts held in memory to the spill table and forget the interned values"""
+        if self.counts:
+            if self.spill is None:
+                handle, self.spill_path = tempfile.mkstemp(prefix='quickstyle_counts_', suffix='.sqlite')
+                os.close(handle)
+                # The result is read on the thread that asked for the count
+                self.spill = sqlite3.connect(self.spill_path, check_same_thread=False)
+                self.spill.execute("PRAGMA journal_mode = OFF")
+                self.spill.execute("PRAGMA synchronous = OFF")
+                self.spill.execute("CREATE TABLE counts (key BLOB PRIMARY KEY, n INTEGER) WITHOUT ROWID")
+
+            self.spill.executemany(
+                "INSERT INTO counts VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET n = n + excluded.n",
+                ((value_key(self.unpack(key)), n) for key, n in self.counts.items()))
+            self.spill.commit()
+            self.spilled += len(self.counts)
+            self.counts = {}
+
+        # Spilled keys hold the values, the codes are only needed for the next counts
+        self.codes = [{} for _ in range(self.field_count)]
+        self.values = [[] for _ in range(self.field_count)]
+        self.value_bytes = 0
+
+    def result(self):
+        """Get the counts keyed by tuples of values
+
+        Counts that never spilled are returned as a dict. Otherwise the
+        spill table is handed over to a SpilledCounts mapping that reads
+        it on demand, so the counts are never all held in memory.
+        """
+        if self.spill is None:
+            return {self.unpack(key): n for key, n in self.counts.items()}
+
+        self.flush()
+        spill, spill_path = self.spill, self.spill_path
+        self.spill = self.spill_path = None
+        return SpilledCounts(spill, spill_path)
+
+    def close(self):
+        """Drop the spill table"""
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+            os.remove(self.spill_path)
+            self.spill_path = None
+
+
+class SpilledItems(ItemsView):
+    """Items of a SpilledCounts mapping, read in one pass over the table"""
+
+    def __iter__(self):
+        return self._mapping.rows()
+
+
+class SpilledValues(ValuesView):
+    """Counts of a SpilledCounts mapping, read in one pass over the table"""
+
+    def __iter__(self):
+        for values, n in self._mapping.rows():
+            yield n
+
+
+class SpilledCounts(Mapping):
+    """Read-only combination counts kept in the spill table of a counter
+
+    Iterating reads the table row by row, nothing else is held in memory.
+    The temporary file is removed by close() or when the mapping is
+    garbage collected.
+    """
+
+    def __init__(self, connection, path):
+        self.connection = connection
+        self.path = path
+
+    def rows(self):
+        """Yield (values, count) for every combination"""
+        for key, n in self.connection.execute("SELECT key, n FROM counts"):
+            yield key_values(key), n
+
+    def __getitem__(self, values):
+        row = None
+        if isinstance(values, tuple):
+            row = self.connection.execute("SELECT n FROM counts WHERE key = ?", (value_key(values),)).fetchone()
+        if row is None:
+            raise KeyError(values)
+        return row[0]
+
+    def __iter__(self):
+        for values, n in self.rows():
+            yield values
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM counts").fetchone()[0]
+
+    def items(self):
+        return SpilledItems(self)
+
+    def values(self):
+        return SpilledValues(self)
+
+    def close(self):
+        """Remove the spill table"""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+            os.remove(self.path)
+
+    def __del__(self):
+        self.close()
@@ -0,0 +1,164 @@
+import os
+from datetime import datetime
+
+from osgeo import gdal, ogr
+from qgis.core import QgsMapLayerStyle, QgsProviderRegistry, QgsVectorLayer
+
+
+# Columns of the layer_styles table as QGIS creates it
+LAYER_STYLES_FIELDS = [
+    ('f_table_catalog', ogr.OFTString, 256),
+    ('f_table_schema', ogr.OFTString, 256),
+    ('f_table_name', ogr.OFTString, 256),
+    ('f_geometry_column', ogr.OFTString, 256),
+    ('styleName', ogr.OFTString, 30),
+    ('styleQML', ogr.OFTString, 0),
+    ('styleSLD', ogr.OFTString, 0),
+    ('useAsDefault', ogr.OFTInteger, 0),
+    ('description', ogr.OFTString, 0),
+    ('owner', ogr.OFTString, 30),
+    ('ui', ogr.OFTString, 30),
+    ('update_time', ogr.OFTDateTime, 0),
+]
+
+
+def style_xml(layer):
+    """Serialize the renderer, labeling and the rest of a layer style as QML"""
+    style = QgsMapLayerStyle()
+    style.readFromLayer(layer)
+    return style.xmlData()
+
+
+def style_target(layer):
+    """Find where the style of a layer is stored
+
+    Returns ('gpkg', path, table name) for GeoPackage layers,
+    ('qml', sidecar path) for other files and None for layers without a
+    file, such as memory and database layers.
+    """
+    if not isinstance(layer, QgsVectorLayer) or layer.providerType() != 'ogr':
+        return None
+    parts = QgsProviderRegistry.instance().decodeUri('ogr', layer.source())
+    path = parts.get('path')
+    if not path or not os.path.isfile(path):
+        return None
+
+    if os.path.splitext(path)[1].lower() == '.gpkg':
+        table = parts.get('layerName')
+        if not table:
+            dataset = gdal.OpenEx(path, gdal.OF_VECTOR | gdal.OF_READONLY)
+            ogr_layer = dataset.GetLayer(parts.get('layerId') or 0) if dataset else None
+            if ogr_layer is None:
+                return None
+            table = ogr_layer.GetName()
+        return ('gpkg', path, table)
+    return ('qml', os.path.splitext(path)[0] + '.qml')
+
+
+def layer_styles_table(dataset):
+    """Get the layer_styles table of a GeoPackage, creating it when missing"""
+    styles = dataset.GetLayerByName('layer_styles')
+    if styles is not None:
+        return styles
+
+    styles = dataset.CreateLayer('layer_styles', geom_type=ogr.wkbNone)
+    for name, field_type, width in LAYER_STYLES_FIELDS:
+        definition = ogr.FieldDefn(name, field_type)
+        if width:
+            definition.SetWidth(width)
+        if name == 'useAsDefault':
+            definition.SetSubType(ogr.OFSTBoolean)
+        styles.CreateField(definition)
+    return styles
+
+
+def save_geopackage_styles(path, entries):
+    """Write default styles into a GeoPackage in one transaction
+
+    Entries are (table name, style name, QML) tuples. A stored style of
+    the same name is replaced, the other styles of the table are kept but
+    no longer used as default, as QGIS does.
+    """
+    dataset = gdal.OpenEx(path, gdal.OF_VECTOR | gdal.OF_UPDATE)
+    if dataset is None:
+        raise IOError(f"Could not open {path} for writing")
+
+    if dataset.StartTransaction() != ogr.OGRERR_NONE:
+        raise IOError(f"Could not start a transaction on {path}")
+    try:
+        styles = layer_styles_table(dataset)
+        now = datetime.now()
+        for table, name, qml in entries:
+            ogr_layer = dataset.GetLayerByName(table)
+            geometry_column = ogr_layer.GetGeometryColumn() if ogr_layer is not None else ''
+            quoted = "'" + table.replace("'", "''") + "'"
+            quoted_name = "'" + name[:30].replace("'", "''") + "'"
+            dataset.ExecuteSQL(f"DELETE FROM layer_styles WHERE f_table_name = {quoted} AND styleName = {quoted_name}")
+            dataset.ExecuteSQL(f"UPDATE layer_styles SET useAsDefault = 0 WHERE f_table_name = {quoted}")
+
+            feature = ogr.Feature(styles.GetLayerDefn())
+            feature.SetField('f_table_catalog', '')
+            feature.SetField('f_table_schema', '')
+            feature.SetField('f_table_name', table)
+            feature.SetField('f_geometry_column', geometry_column)
+            feature.SetField('styleName', name[:30])
+            feature.SetField('styleQML', qml)
+            feature.SetField('styleSLD', '')
+            feature.SetField('useAsDefault', 1)
+            feature.SetField('description', 'Saved by QuickStyle')
+            feature.SetField('owner', '')
+            feature.SetField('ui', '')
+            feature.SetField('update_time', now.year, now.month, now.day, now.hour, now.minute, now.second, 0)
+            if styles.CreateFeature(feature) != ogr.OGRERR_NONE:
+                raise IOError(f"Could not write the style of {table} to {path}")
+    except Exception:
+        dataset.RollbackTransaction()
+        raise
+    if dataset.CommitTransaction() != ogr.OGRERR_NONE:
+        raise IOError(f"Could not save the styles in {path}")
+
+
+def save_layer_styles(layers):
+    """Persist the styles of many layers in one go
+
+    Every style is serialized once. GeoPackage layers get a default style
+    in the layer_styles table with one transaction per file, other files
+    get a .qml sidecar. QGIS reads one sidecar per file, so layers sharing
+    a file other than a GeoPackage are skipped. Returns the saved layers
+    and the skipped ones with the reason.
+    """
+    geopackages = {}
+    sidecars = {}
+    skipped = []
+    for layer in layers:
+        target = style_target(layer)
+        if target is None:
+            skipped.append((layer, "not stored in a file"))
+        elif target[0] == 'gpkg':
+            geopackages.setdefault(target[1], []).append((layer, target[2]))
+        else:
+            sidecars.setdefault(target[1], []).append(layer)
+
+    saved = []
+    for path, members in geopackages.items():
+        entries = [(table, table, style_xml(layer)) for layer, table in members]
+        try:
+            save_geopackage_styles(path, entries)
+        except (IOError, RuntimeError) as e:
+            skipped.extend((layer, str(e)) for layer, table in members)
+        else:
+            saved.extend(layer for layer, table in members)
+
+    for path, members in sidecars.items():
+        if len(members) > 1:
+            skipped.extend((layer, f"shares {os.path.basename(path)} with other layers") for layer in members)
+            continue
+        layer = members[0]
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(style_xml(layer))
+        except OSError as e:
+            skipped.append((layer, str(e)))
+        else:
+            saved.append(layer)
+    return saved, skipped
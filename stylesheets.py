@@ -0,0 +1,120 @@
+# Style sheets shared by the tool dialogs. Each dialog sets its sheet once
+# when it is built, buttons pick their rules through the "role" and
+# "selected" properties instead of carrying their own style sheet.
+
+SYMBOLOGY_STYLE = """
+    QDialog {
+        background-color: #f0f0f0;
+        font-family: 'Segoe UI', Arial, sans-serif;
+    }
+    QFrame {
+        background-color: white;
+        border: 1px solid #ddd;
+        border-radius: 5px;
+        padding: 10px;
+    }
+    QPushButton {
+        border: 2px solid #ddd;
+        border-radius: 5px;
+        background-color: white;
+        padding: 5px;
+    }
+    QPushButton:hover {
+        border-color: #4CAF50;
+        background-color: #f5f5f5;
+    }
+    QPushButton:pressed {
+        background-color: #e0e0e0;
+    }
+    QPushButton[selected="true"] {
+        border: 3px solid #4CAF50;
+        background-color: #e8f5e8;
+        font-weight: bold;
+    }
+    QPushButton[role="swatch"] {
+        border: 2px solid #ddd;
+    }
+    QPushButton[role="swatch"][selected="true"] {
+        border: 3px solid #4CAF50;
+    }
+    QPushButton[role="ok"] {
+        background-color: #4CAF50;
+        color: white;
+        font-weight: bold;
+    }
+    QPushButton[role="cancel"] {
+        background-color: #f44336;
+        color: white;
+        font-weight: bold;
+    }
+    QLabel {
+        font-weight: bold;
+        color: #333;
+    }
+    QLabel[role="title"] {
+        font-size: 16px;
+        margin: 10px 0px;
+    }
+    QLabel[role="error"] {
+        color: red;
+        font-weight: bold;
+        margin: 5px 0px;
+    }
+"""
+
+LABELING_STYLE = """
+    * {
+        background-color: #f5f5f5;
+    }
+    QLabel[role="heading"] {
+        color: #333333;
+    }
+    QPushButton[role="option"], QPushButton[role="ok"], QPushButton[role="cancel"] {
+        border: 2px solid #555555;
+        border-radius: 5px;
+        background-color: transparent;
+        color: #333333;
+    }
+    QPushButton[role="option"]:hover {
+        border-color: #BBBBBB;
+    }
+    QPushButton[role="option"]:checked {
+        border-color: #04AA6D;
+    }
+    QPushButton[role="ok"]:hover {
+        border-color: #04AA6D;
+        color: #04AA6D;
+    }
+    QPushButton[role="cancel"]:hover {
+        border-color: #f44336;
+        color: #f44336;
+    }
+"""
+
+CATEGORIZE_STYLE = """
+    QPushButton[role="field"] {
+        background: #f8f8f8;
+        border: 1px solid #ddd;
+        border-radius: 6px;
+        padding: 8px;
+    }
+    QPushButton[role="field"][alternate="true"] {
+        background: #f0f0f0;
+    }
+    QPushButton[role="field"]:hover {
+        background: #e0e0e0;
+    }
+    QLabel[role="title"] {
+        padding: 10px;
+    }
+"""
+
+
+def set_selected(button, selected):
+    """Mark a button as selected and restyle it from the dialog style sheet"""
+    if button.property('selected') == selected:
+        return
+    button.setProperty('selected', selected)
+    # Property selectors are only evaluated when the widget is polished
+    button.style().unpolish(button)
+    button.style().polish(button)
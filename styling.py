@@ -0,0 +1,227 @@
+import os
+
+from qgis.PyQt.QtCore import Qt
+from qgis.PyQt.QtGui import QColor, QFont
+from qgis.core import (QgsMarkerSymbol, QgsLineSymbol, QgsFillSymbol, QgsSimpleLineSymbolLayer,
+                       QgsSvgMarkerSymbolLayer, QgsRendererCategory, QgsRuleBasedRenderer, QgsExpression,
+                       QgsPalLayerSettings, QgsTextFormat, QgsUnitTypes, QgsVectorLayerSimpleLabeling,
+                       QgsRuleBasedLabeling, QgsPointClusterRenderer, QgsHeatmapRenderer, QgsGradientColorRamp)
+
+from .counting import combination_label
+
+
+# Color palette shared by the categorize tools
+PALETTE = [
+    '#e41a1c', '#3579b1', '#00e4f6', '#0000ff',
+    '#ff00ff', '#ff69b4', '#5e17eb', '#ffa500',
+    '#00fa9a', '#e10052', '#9bbce7', '#c8ff6d',
+    '#22c89e', '#ffd93d', '#008e9b', '#ff9671'
+]
+
+# Color of the catch-all "Other" category
+OTHER_COLOR = '#bdbdbd'
+
+# SVG marker shapes for points
+SVG_FOLDER = os.path.join(os.path.dirname(__file__), 'svg')
+SVG_SHAPES = [
+    'diamond_red.svg', 'dot_blue.svg', 'effect_drop_shadow.svg',
+    'honeycomb_faux_3d.svg', 'shield_disability.svg', 'topo_airport.svg',
+    'topo_hospital.svg', 'triangle_green.svg'
+]
+
+# Label color when none was chosen
+LABEL_COLOR = '#ffa500'
+
+
+def category_symbol(geometry_type, color):
+    """Create the symbol used for one category of a layer"""
+    if geometry_type == 0:  # Point
+        symbol = QgsMarkerSymbol.createSimple({'name': 'diamond', 'size': '4.4'})
+        symbol.setColor(QColor(color))
+    elif geometry_type == 1:  # Line
+        symbol = QgsLineSymbol.createSimple({'width': '1.0'})
+        symbol.setColor(QColor(color))
+    else:  # Polygon
+        symbol = outline_symbol(color, 1.0)
+    return symbol
+
+
+def svg_marker_symbol(shape, size, color=None):
+    """Create a marker symbol from one of the plugin's SVG shapes"""
+    symbol = QgsMarkerSymbol()
+    svg_layer = QgsSvgMarkerSymbolLayer(os.path.join(SVG_FOLDER, shape))
+    svg_layer.setSize(size)
+    # Only the diamond takes a color, the other shapes keep their own
+    if color and shape == 'diamond_red.svg':
+        svg_layer.setColor(QColor(color))
+    symbol.changeSymbolLayer(0, svg_layer)
+    return symbol
+
+
+def simple_marker_symbol(size, color=None):
+    """Create a plain circle marker, which QGIS renders once and reuses as an image"""
+    color = QColor(color or PALETTE[1])
+    return QgsMarkerSymbol.createSimple({
+        'name': 'circle', 'size': str(size), 'color': color.name(), 'outline_style': 'no'})
+
+
+def fast_point_renderer(renderer, mode, color=None):
+    """Put a point renderer behind a cluster or heatmap renderer
+
+    Clusters draw one symbol per group of nearby points with the renderer
+    kept for the single points. A heatmap draws a density raster whatever
+    the number of points. Any other mode returns the renderer unchanged.
+    """
+    if mode == 'cluster':
+        cluster = QgsPointClusterRenderer()
+        cluster.setEmbeddedRenderer(renderer)
+        cluster.setTolerance(4)
+        cluster.setToleranceUnit(QgsUnitTypes.RenderMillimeters)
+        return cluster
+    if mode == 'heatmap':
+        heatmap = QgsHeatmapRenderer()
+        end = QColor(color or PALETTE[0])
+        start = QColor(end)
+        start.setAlpha(0)
+        heatmap.setColorRamp(QgsGradientColorRamp(start, end))
+        heatmap.setRadius(3)
+        heatmap.setRadiusUnit(QgsUnitTypes.RenderMillimeters)
+        # Coarser cells draw faster and look the same at this radius
+        heatmap.setRenderQuality(3)
+        return heatmap
+    return renderer
+
+
+def line_symbol(color, width):
+    """Create a round-capped line symbol"""
+    symbol = QgsLineSymbol()
+    line_layer = QgsSimpleLineSymbolLayer()
+    line_layer.setWidth(width)
+    line_layer.setColor(QColor(color))
+    line_layer.setPenCapStyle(Qt.RoundCap)
+    line_layer.setPenJoinStyle(Qt.RoundJoin)
+    symbol.changeSymbolLayer(0, line_layer)
+    return symbol
+
+
+def outline_symbol(color, width):
+    """Create a fill symbol that only draws the polygon outline"""
+    symbol = QgsFillSymbol()
+    # Remove default fill layer and add simple line layer for outline
+    symbol.deleteSymbolLayer(0)
+    symbol.appendSymbolLayer(QgsSimpleLineSymbolLayer(QColor(color), width))
+    return symbol
+
+
+def label_settings(geometry_type, field, size, color, row=0):
+    """Create the label settings of one field, rows are stacked below each other"""
+    settings = QgsPalLayerSettings()
+    settings.fieldName = field
+    settings.enabled = True
+
+    text_format = QgsTextFormat()
+    text_format.setFont(QFont("Arial"))
+    text_format.setSize(size)
+    text_format.setSizeUnit(QgsUnitTypes.RenderPoints)
+    text_format.setColor(QColor(color))
+    settings.setFormat(text_format)
+
+    # Set placement based on geometry type with offsets
+    if geometry_type == 0:  # Point
+        settings.placement = QgsPalLayerSettings.Placement.OverPoint
+        settings.xOffset = 0
+        settings.yOffset = 15 + (row * 15)  # 15, 30, 45 points
+        settings.offsetUnits = QgsUnitTypes.RenderPoints
+    elif geometry_type == 1:  # Line
+        settings.placement = QgsPalLayerSettings.Placement.Line
+        if row:
+            settings.yOffset = row * (size + 2)
+            settings.offsetUnits = QgsUnitTypes.RenderPoints
+    elif geometry_type == 2:  # Polygon
+        settings.placement = QgsPalLayerSettings.Placement.OverPoint
+        if row:
+            settings.yOffset = row * (size + 2)
+            settings.offsetUnits = QgsUnitTypes.RenderPoints
+    return settings
+
+
+def build_labeling(geometry_type, fields, size, colors):
+    """Create simple labeling for one field, rule-based labeling with one row per field"""
+    if len(fields) == 1:
+        color = colors[0] if colors else LABEL_COLOR
+        return QgsVectorLayerSimpleLabeling(label_settings(geometry_type, fields[0], size, color))
+
+    rules = QgsRuleBasedLabeling.Rule(QgsPalLayerSettings())
+    for i, field in enumerate(fields):
+        color = colors[i] if i < len(colors) else LABEL_COLOR
+        rule = QgsRuleBasedLabeling.Rule(label_settings(geometry_type, field, size, color, i))
+        rule.setDescription(f"Label {field}")
+        rules.appendChild(rule)
+    return QgsRuleBasedLabeling(rules)
+
+
+def build_categories(geometry_type, values, colors, labels=None):
+    """Create one renderer category per value, cycling through the colors"""
+    # Symbols are cloned from one prototype per color
+    prototypes = {}
+    categories = []
+    for i, value in enumerate(values):
+        color = colors[i % len(colors)]
+        if color not in prototypes:
+            prototypes[color] = category_symbol(geometry_type, color)
+        if labels is not None:
+            label = labels[i]
+        else:
+            label = "NULL" if value is None else str(value)
+        categories.append(QgsRendererCategory(value, prototypes[color].clone(), label))
+    return categories
+
+
+def combination_expression(fields):
+    """Get the expression giving the combination label of a feature"""
+    return "concat(" + ", ' + ', ".join([f'coalesce(to_string("{field}"), \'NULL\')' for field in fields]) + ")"
+
+
+def combination_filter(fields, values):
+    """Get a filter matching one combination with plain equality tests
+
+    Unlike the concat() expression such a filter can be compiled by the
+    provider, to SQL for database layers.
+    """
+    tests = []
+    for field, value in zip(fields, values):
+        column = QgsExpression.quotedColumnRef(field)
+        if value is None:
+            tests.append(f"{column} IS NULL")
+        else:
+            tests.append(f"{column} = {QgsExpression.quotedValue(value)}")
+    return " AND ".join(tests)
+
+
+def build_rule_based_renderer(geometry_type, fields, combinations, colors, group=False, other=False):
+    """Create a rule-based renderer with one filter rule per combination
+
+    With group the rules are nested under one rule per value of the first
+    field, so the remaining tests only run for features of that value.
+    With other an ELSE rule catches every feature no rule matches.
+    """
+    root = QgsRuleBasedRenderer.Rule(None)
+    parents = {}
+    for i, values in enumerate(combinations):
+        symbol = category_symbol(geometry_type, colors[i % len(colors)])
+        label = combination_label(values)
+        if group and len(fields) > 1:
+            parent = parents.get(values[0])
+            if parent is None:
+                parent = QgsRuleBasedRenderer.Rule(
+                    None, 0, 0, combination_filter(fields[:1], values[:1]), combination_label(values[:1]))
+                root.appendChild(parent)
+                parents[values[0]] = parent
+            parent.appendChild(QgsRuleBasedRenderer.Rule(
+                symbol, 0, 0, combination_filter(fields[1:], values[1:]), label))
+        else:
+            root.appendChild(QgsRuleBasedRenderer.Rule(symbol, 0, 0, combination_filter(fields, values), label))
+
+    if other:
+        root.appendChild(QgsRuleBasedRenderer.Rule(category_symbol(geometry_type, OTHER_COLOR), 0, 0, 'ELSE', "Other"))
+    return QgsRuleBasedRenderer(root)
@@ -0,0 +1,309 @@
+from collections import OrderedDict
+
+from qgis.PyQt.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+from qgis.PyQt.QtWidgets import (QDialog, QVBoxLayout, QLabel, QTableView, QHeaderView,
+                                 QAbstractItemView)
+from qgis.core import QgsFeatureRequest, QgsExpression, QgsAttributeTableConfig
+
+
+def visible_columns(layer):
+    """Get the names of the fields shown in the layer's attribute table"""
+    config = layer.attributeTableConfig()
+    names = [
+        column.name for column in config.columns()
+        if not column.hidden and column.type == QgsAttributeTableConfig.Field
+    ]
+    # A fresh layer has no table configuration yet
+    return names or [field.name() for field in layer.fields()]
+
+
+def display_value(value):
+    """Convert an attribute value to the text shown in a table cell"""
+    if value is None or (isinstance(value, QVariant) and value.isNull()):
+        return "NULL"
+    return str(value)
+
+
+class PagedFeatureModel(QAbstractTableModel):
+    """Read-only table model that fetches features in fixed-size pages
+
+    Only the requested columns are fetched and geometries are never loaded.
+    Fetched pages are kept in a bounded LRU cache, one tuple per column, so
+    memory stays fixed whatever the size of the layer. The key of the first
+    row of every page passed is remembered, so going back to a page resumes
+    the query from that key instead of reading the table from its start.
+    """
+
+    def __init__(self, layer, columns=None, fids=None, page_size=500, max_pages=16, parent=None):
+        super().__init__(parent)
+        self.layer = layer
+        self.columns = columns or visible_columns(layer)
+        self.field_indexes = [layer.fields().lookupField(name) for name in self.columns]
+        self.fids = sorted(fids) if fids is not None else None
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+        # Sort column and direction, None keeps provider order
+        self.sort_column = None
+        self.sort_ascending = True
+
+        self.pages = OrderedDict()
+        # Page number -> (sort value, feature id) of its first row
+        self.page_keys = {}
+        self.keys_usable = True
+        self._cursor = None
+        self._cursor_row = 0
+        self._row_count = self.count_rows()
+
+    def count_rows(self):
+        """Get the number of rows without reading attribute values"""
+        if self.fids is not None:
+            return len(self.fids)
+
+        count = self.layer.featureCount()
+        if count >= 0:
+            return count
+
+        # Provider does not know its feature count, walk the ids only
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setNoAttributes()
+        return sum(1 for _ in self.layer.getFeatures(request))
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+
+        page_no, offset = divmod(index.row(), self.page_size)
+        fids, columns = self.page(page_no)
+        if offset >= len(fids):
+            return None
+        return display_value(columns[index.column()][offset])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section]
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Sort through the provider, dropping every cached page"""
+        self.beginResetModel()
+        self.sort_column = column
+        self.sort_ascending = order == Qt.AscendingOrder
+        if self.fids is not None:
+            self.sort_fids()
+        self.pages.clear()
+        self.page_keys.clear()
+        self.keys_usable = True
+        self._cursor = None
+        self._cursor_row = 0
+        self.endResetModel()
+
+    def feature_id(self, row):
+        """Get the feature id shown on a row"""
+        page_no, offset = divmod(row, self.page_size)
+        fids, columns = self.page(page_no)
+        return fids[offset] if offset < len(fids) else None
+
+    def page(self, page_no):
+        """Get a page from the cache, fetching it when missing"""
+        page = self.pages.get(page_no)
+        if page is not None:
+            self.pages.move_to_end(page_no)
+            return page
+
+        page = self.fetch_page(page_no)
+        self.pages[page_no] = page
+        if len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        return page
+
+    def base_request(self):
+        """Create a request for the visible columns without geometry"""
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes(self.field_indexes)
+        if self.sort_column is not None:
+            # Providers that compile ORDER BY sort on their side
+            request.addOrderBy(
+                QgsExpression.quotedColumnRef(self.columns[self.sort_column]),
+                self.sort_ascending, False
+            )
+            # Tied rows are ordered by id, so every query returns them in the same order
+            request.addOrderBy('$id', self.sort_ascending)
+        return request
+
+    def keyset_request(self, key):
+        """Create a request for the rows from a page key on
+
+        Unsorted pages are keyed by the feature id of their first row,
+        sorted ones by its sort value and feature id, the two sort keys.
+        """
+        request = self.base_request()
+        if key is None:
+            return request
+
+        if self.sort_column is None:
+            request.setFilterExpression(f"$id >= {key}")
+            return request
+
+        value, fid = key
+        column = QgsExpression.quotedColumnRef(self.columns[self.sort_column])
+        beyond, same = ('>', '>=') if self.sort_ascending else ('<', '<=')
+        if value is None:
+            # NULLs sort last in both directions
+            request.setFilterExpression(f"{column} IS NULL AND $id {same} {fid}")
+        else:
+            quoted = QgsExpression.quotedValue(value)
+            request.setFilterExpression(
+                f"{column} {beyond} {quoted} OR ({column} = {quoted} AND $id {same} {fid}) OR {column} IS NULL")
+        return request
+
+    def sort_value(self, feature):
+        value = feature.attributes()[self.field_indexes[self.sort_column]]
+        return None if isinstance(value, QVariant) and value.isNull() else value
+
+    def fetch_page(self, page_no):
+        """Read one page of attribute values from the provider"""
+        start = page_no * self.page_size
+        if self.fids is not None:
+            return self.fetch_page_by_ids(self.fids[start:start + self.page_size])
+
+        # Scrolling down continues the open cursor, other jumps resume from
+        # the nearest page key before the page instead of the first row
+        known = [number for number in self.page_keys if number <= page_no]
+        resume_page = max(known) if known else 0
+        resume_row = resume_page * self.page_size
+        if self._cursor is None or not resume_row <= self._cursor_row <= start:
+            request = self.keyset_request(self.page_keys.get(resume_page))
+            self._cursor = self.layer.getFeatures(request)
+            self._cursor_row = resume_row
+            self._last_fid = None
+
+        fids = []
+        columns = [[] for _ in self.field_indexes]
+        for feature in self._cursor:
+            row = self._cursor_row
+            self._cursor_row += 1
+            self.remember_key(row, feature)
+            if row < start:
+                continue
+            fids.append(feature.id())
+            attributes = feature.attributes()
+            for values, field_index in zip(columns, self.field_indexes):
+                values.append(attributes[field_index])
+            if len(fids) == self.page_size:
+                break
+        else:
+            self._cursor = None
+
+        return fids, [tuple(values) for values in columns]
+
+    def remember_key(self, row, feature):
+        """Keep the key of a row that starts a page"""
+        if self.sort_column is None:
+            fid = feature.id()
+            if self._last_fid is not None and fid < self._last_fid:
+                # The provider does not return features in id order, keys would skip rows
+                self.keys_usable = False
+                self.page_keys.clear()
+            self._last_fid = fid
+            key = fid
+        else:
+            key = (self.sort_value(feature), feature.id())
+
+        if self.keys_usable and row % self.page_size == 0:
+            self.page_keys.setdefault(row // self.page_size, key)
+
+    def sort_fids(self):
+        """Order the filtered feature ids by the sort column, read once"""
+        if self.sort_column is None:
+            self.fids.sort()
+            return
+
+        field_index = self.field_indexes[self.sort_column]
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes([field_index])
+        request.setFilterFids(self.fids)
+        keys = {}
+        for feature in self.layer.getFeatures(request):
+            value = feature.attributes()[field_index]
+            keys[feature.id()] = None if isinstance(value, QVariant) and value.isNull() else value
+
+        present = [fid for fid in self.fids if fid in keys]
+        values = sorted((fid for fid in present if keys[fid] is not None),
+                        key=lambda fid: (keys[fid], fid), reverse=not self.sort_ascending)
+        self.fids = values + sorted(fid for fid in present if keys[fid] is None)
+
+    def fetch_page_by_ids(self, page_fids):
+        """Read the features of one page directly by feature id"""
+        request = self.base_request()
+        request.setFilterFids(page_fids)
+
+        rows = {}
+        for feature in self.layer.getFeatures(request):
+            attributes = feature.attributes()
+            rows[feature.id()] = [attributes[field_index] for field_index in self.field_indexes]
+
+        # Features deleted since the ids were taken are dropped from the page
+        fids = [fid for fid in page_fids if fid in rows]
+        columns = [tuple(rows[fid][i] for fid in fids) for i in range(len(self.field_indexes))]
+        return fids, columns
+
+
+class AttributeTableDialog(QDialog):
+    """Lightweight read-only attribute table for very large layers"""
+
+    def __init__(self, layer, fids=None, title=None, parent=None):
+        super().__init__(parent)
+        self.layer = layer
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.setWindowTitle(title or f"Attribute Table - {layer.name()}")
+        self.resize(900, 500)
+
+        layout = QVBoxLayout()
+
+        self.model = PagedFeatureModel(layer, fids=fids, parent=self)
+        self.info_label = QLabel(f"Features: {self.model.rowCount()}")
+        layout.addWidget(self.info_label)
+
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.view.setWordWrap(False)
+
+        # Fixed row heights avoid measuring every row when scrolling
+        vertical_header = self.view.verticalHeader()
+        vertical_header.setSectionResizeMode(QHeaderView.Fixed)
+        vertical_header.setDefaultSectionSize(22)
+
+        header = self.view.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setSortIndicatorShown(True)
+        header.sectionClicked.connect(self.on_header_clicked)
+        layout.addWidget(self.view)
+
+        self.setLayout(layout)
+
+    def on_header_clicked(self, column):
+        """Toggle provider-side sorting on the clicked column"""
+        if self.model.sort_column == column and self.model.sort_ascending:
+            order = Qt.DescendingOrder
+        else:
+            order = Qt.AscendingOrder
+        self.view.horizontalHeader().setSortIndicator(column, order)
+        self.model.sort(column, order)
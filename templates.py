@@ -0,0 +1,174 @@
+import os
+import re
+
+from qgis.PyQt.QtXml import QDomDocument
+from qgis.core import (QgsApplication, QgsFeatureRenderer, QgsAbstractVectorLayerLabeling, QgsRenderContext,
+                       QgsReadWriteContext, QgsExpression, QgsVectorLayerSimpleLabeling, QgsRuleBasedLabeling)
+
+
+def template_folder():
+    """Get the folder the style templates are stored in"""
+    return os.path.join(QgsApplication.qgisSettingsDirPath(), 'QuickStyle', 'templates')
+
+
+def template_path(name):
+    """Get the file of a named template
+
+    Characters that are not safe in file names, and %, are percent-encoded
+    so distinct names never share a file.
+    """
+    file_name = re.sub(r'[^\w\- ]', lambda m: ''.join(f"%{b:02X}" for b in m.group().encode('utf-8')), name)
+    return os.path.join(template_folder(), f"{file_name}.xml")
+
+
+def label_fields(labeling):
+    """Get the fields the labels of a layer are built from"""
+    if isinstance(labeling, QgsVectorLayerSimpleLabeling):
+        settings = [labeling.settings()]
+    elif isinstance(labeling, QgsRuleBasedLabeling):
+        settings = [rule.settings() for rule in labeling.rootRule().descendants() if rule.settings()]
+    else:
+        return set()
+
+    fields = set()
+    for label_settings in settings:
+        if label_settings.isExpression:
+            fields.update(QgsExpression(label_settings.fieldName).referencedColumns())
+        elif label_settings.fieldName:
+            fields.add(label_settings.fieldName)
+    return fields
+
+
+class StyleTemplate:
+    """A renderer and labeling compiled once and cloned onto matching layers"""
+
+    def __init__(self, name, geometry_type, fields, renderer, labeling):
+        self.name = name
+        self.geometry_type = geometry_type
+        self.fields = fields
+        self.renderer = renderer
+        self.labeling = labeling
+
+    def matches(self, layer):
+        """Check that a layer has the geometry type and every field the template uses"""
+        if layer.geometryType() != self.geometry_type:
+            return False
+        layer_fields = layer.fields()
+        return all(layer_fields.lookupField(name) >= 0 for name in self.fields)
+
+    def apply(self, layer):
+        """Give a layer its own copy of the template style, no data is read"""
+        if self.renderer is not None:
+            layer.setRenderer(self.renderer.clone())
+        if self.labeling is not None:
+            layer.setLabeling(self.labeling.clone())
+            layer.setLabelsEnabled(True)
+
+
+class TemplateLibrary:
+    """Named style templates stored as XML in the QGIS settings folder
+
+    Templates are parsed into renderer and labeling prototypes the first
+    time they are used and kept, so restyling many layers only clones them.
+    """
+
+    def __init__(self):
+        self.compiled = {}
+
+    def names(self):
+        """Get the names of the stored templates"""
+        names = []
+        folder = template_folder()
+        if os.path.isdir(folder):
+            for file_name in sorted(os.listdir(folder)):
+                if file_name.endswith('.xml'):
+                    document = self.read_document(os.path.join(folder, file_name))
+                    if document is not None:
+                        names.append(document.documentElement().attribute('name'))
+        return names
+
+    def save(self, name, layer):
+        """Store the renderer and labeling of a layer as a template"""
+        document = QDomDocument()
+        root = document.createElement('quickstyle-template')
+        root.setAttribute('name', name)
+        root.setAttribute('geometry', int(layer.geometryType()))
+        document.appendChild(root)
+
+        context = QgsReadWriteContext()
+        fields = set()
+        renderer = layer.renderer()
+        if renderer is not None:
+            fields.update(renderer.usedAttributes(QgsRenderContext()))
+            root.appendChild(renderer.save(document, context))
+        labeling = layer.labeling() if layer.labelsEnabled() else None
+        if labeling is not None:
+            fields.update(label_fields(labeling))
+            root.appendChild(labeling.save(document, context))
+
+        for field_name in sorted(fields):
+            element = document.createElement('field')
+            element.setAttribute('name', field_name)
+            root.appendChild(element)
+
+        path = template_path(name)
+        existing = self.read_document(path) if os.path.exists(path) else None
+        if existing is not None and existing.documentElement().attribute('name') != name:
+            # Names differing only in case share a file on some file systems
+            raise IOError(f"Template '{existing.documentElement().attribute('name')}' uses the same file")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(document.toString())
+        self.compiled.pop(name, None)
+
+    def delete(self, name):
+        """Remove a stored template"""
+        path = template_path(name)
+        if os.path.exists(path):
+            os.remove(path)
+        self.compiled.pop(name, None)
+
+    def read_document(self, path):
+        document = QDomDocument()
+        with open(path, encoding='utf-8') as f:
+            if not document.setContent(f.read()):
+                return None
+        if document.documentElement().tagName() != 'quickstyle-template':
+            return None
+        return document
+
+    def template(self, name):
+        """Get a compiled template, parsing its file on first use"""
+        if name in self.compiled:
+            return self.compiled[name]
+
+        path = template_path(name)
+        document = self.read_document(path) if os.path.exists(path) else None
+        if document is None:
+            raise IOError(f"Template '{name}' not found")
+
+        root = document.documentElement()
+        context = QgsReadWriteContext()
+        renderer_element = root.firstChildElement('renderer-v2')
+        renderer = QgsFeatureRenderer.load(renderer_element, context) if not renderer_element.isNull() else None
+        labeling_element = root.firstChildElement('labeling')
+        labeling = (QgsAbstractVectorLayerLabeling.create(labeling_element, context)
+                    if not labeling_element.isNull() else None)
+
+        fields = []
+        element = root.firstChildElement('field')
+        while not element.isNull():
+            fields.append(element.attribute('name'))
+            element = element.nextSiblingElement('field')
+
+        template = StyleTemplate(name, int(root.attribute('geometry')), fields, renderer, labeling)
+        self.compiled[name] = template
+        return template
+
+    def apply(self, name, layers):
+        """Apply a template to every matching layer, returning the styled ones"""
+        template = self.template(name)
+        styled = [layer for layer in layers if template.matches(layer)]
+        for layer in styled:
+            template.apply(layer)
+        return styled